@@ -6,7 +6,7 @@ Agent responsible for escalating incidents to human operators.
 
 from typing import Dict, Any
 from .base_agent import BaseAgent
-from utils.email_notifier import EmailNotifier
+from utils.registry import get_email_notifier
 
 
 class EscalationAgent(BaseAgent):
@@ -15,7 +15,7 @@ class EscalationAgent(BaseAgent):
     def __init__(self):
         """Initialize escalation agent"""
         super().__init__("escalation")
-        self.email_notifier = EmailNotifier()
+        self.email_notifier = get_email_notifier()
         self.log("Escalation agent initialized")
     
     def analyze(self, service: str, escalation_reason: str, 
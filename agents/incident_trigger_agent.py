@@ -8,7 +8,7 @@ Uses AIAnalyzer for alert parsing and EmailNotifier for notifications.
 from typing import Dict, Any
 from .base_agent import BaseAgent
 from analyzers.ai_analyzer import AIAnalyzer
-from utils.email_notifier import EmailNotifier
+from utils.registry import get_email_notifier, get_service_catalog
 
 
 class IncidentTriggerAgent(BaseAgent):
@@ -18,7 +18,8 @@ class IncidentTriggerAgent(BaseAgent):
         """Initialize incident trigger agent"""
         super().__init__("incident_trigger")
         self.ai_analyzer = AIAnalyzer()
-        self.email_notifier = EmailNotifier()
+        self.email_notifier = get_email_notifier()
+        self.catalog = get_service_catalog()
         self.log("Incident Trigger agent initialized")
     
     def analyze(self, raw_alert: str, incident_id: str) -> Dict[str, Any]:
@@ -37,11 +38,15 @@ class IncidentTriggerAgent(BaseAgent):
         # Use AI analyzer to parse alert
         parsed = self.ai_analyzer.parse_incident_alert(raw_alert)
         
-        service = parsed.get('service', 'Unknown Service')
+        # Alerts and models name services loosely; downstream lookups need one name
+        service = self.catalog.canonical(parsed.get('service') or 'Unknown Service')
+        if service != parsed.get('service'):
+            self.log(f"Resolved service {parsed.get('service')!r} to {service!r}")
         severity = parsed.get('severity', 'MEDIUM')
         description = parsed.get('description', raw_alert[:100])
+        parse_tier = parsed.get('parse_tier', 'llm')
         
-        self.log(f"Parsed - Service: {service}, Severity: {severity}")
+        self.log(f"Parsed - Service: {service}, Severity: {severity} (tier: {parse_tier})")
         
         # Send initial alert email
         try:
@@ -53,5 +58,8 @@ class IncidentTriggerAgent(BaseAgent):
         return {
             "service": service,
             "severity": severity,
-            "description": description
+            "description": description,
+            "parse_tier": parse_tier,
+            "rule_confidence": parsed.get('rule_confidence', 0.0),
+            "llm_model": parsed.get('llm_model', '')
         }
@@ -5,7 +5,7 @@ Agent responsible for searching historical incidents.
 Uses KnowledgeSearcher as a tool for finding similar incidents.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base_agent import BaseAgent
 from analyzers.knowledge_searcher import KnowledgeSearcher
 
@@ -39,3 +39,18 @@ class KnowledgeLookupAgent(BaseAgent):
         self.log(f"Knowledge search complete: {match_count} similar incidents found")
         
         return results
+    
+    def learn(self, state: Any) -> Optional[int]:
+        """
+        Feed a finished incident back into the knowledge base
+        
+        Args:
+            state: Finished incident state
+        
+        Returns:
+            Document ID of the new entry, or None if it was not added
+        """
+        doc_id = self.searcher.add_incident(state)
+        if doc_id is not None:
+            self.log(f"Added {state.incident_id} to knowledge base")
+        return doc_id
@@ -5,7 +5,7 @@ Agent responsible for coordinating log analysis.
 Uses LogAnalyzer as a tool for anomaly detection.
 """
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from .base_agent import BaseAgent
 from analyzers.log_analyzer import LogAnalyzer
 
@@ -19,13 +19,14 @@ class LogAnalysisAgent(BaseAgent):
         self.analyzer = LogAnalyzer()
         self.log("Log Analysis agent initialized")
     
-    def analyze(self, service: str, description: str) -> Dict[str, Any]:
+    def analyze(self, service: str, description: str, incident_time: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze system logs for anomalies
         
         Args:
             service: Service name
             description: Incident description
+            incident_time: Incident timestamp; the log window ends here
         
         Returns:
             Dictionary with log analysis results
@@ -33,7 +34,7 @@ class LogAnalysisAgent(BaseAgent):
         self.log(f"Analyzing logs for {service}")
         
         # Use analyzer tool for actual analysis
-        results = self.analyzer.analyze_logs(service, description)
+        results = self.analyzer.analyze_logs(service, description, incident_time)
         
         anomalies_found = results.get('anomalies_found', False)
         anomaly_count = len(results.get('anomalies', []))
@@ -6,7 +6,7 @@ Agent responsible for executing automated mitigation actions.
 
 from typing import Dict, Any, List
 from .base_agent import BaseAgent
-from utils.email_notifier import EmailNotifier
+from utils.registry import get_email_notifier
 
 
 class MitigationAgent(BaseAgent):
@@ -15,7 +15,7 @@ class MitigationAgent(BaseAgent):
     def __init__(self):
         """Initialize mitigation agent"""
         super().__init__("mitigation")
-        self.email_notifier = EmailNotifier()
+        self.email_notifier = get_email_notifier()
         self.log("Mitigation agent initialized")
     
     def analyze(self, service: str, root_cause: str, 
@@ -8,6 +8,7 @@ Uses AIAnalyzer as a tool for determining root cause.
 from typing import Dict, Any
 from .base_agent import BaseAgent
 from analyzers.ai_analyzer import AIAnalyzer
+from config import get_config_value
 
 
 class RootCauseAgent(BaseAgent):
@@ -17,6 +18,7 @@ class RootCauseAgent(BaseAgent):
         """Initialize root cause agent with AI analyzer"""
         super().__init__("root_cause")
         self.ai_analyzer = AIAnalyzer()
+        self.hedge_variants = int(get_config_value("ROOT_CAUSE_HEDGE_VARIANTS", 1))
         self.log("Root Cause agent initialized")
     
     def analyze(self, service: str, description: str,
@@ -36,10 +38,15 @@ class RootCauseAgent(BaseAgent):
         """
         self.log(f"Analyzing root cause for {service}")
         
-        # Use AI analyzer for root cause determination
-        results = self.ai_analyzer.analyze_root_cause(
-            service, description, log_results, knowledge_results
-        )
+        # Use AI analyzer for root cause determination (hedged across variants if enabled)
+        if self.hedge_variants > 1:
+            results = self.ai_analyzer.analyze_root_cause_hedged(
+                service, description, log_results, knowledge_results, variants=self.hedge_variants
+            )
+        else:
+            results = self.ai_analyzer.analyze_root_cause(
+                service, description, log_results, knowledge_results
+            )
         
         confidence = results.get('confidence', 0.0)
         root_cause = results.get('root_cause', 'Unknown')
@@ -8,9 +8,36 @@ These are reusable across different workflows and agents.
 from .log_analyzer import LogAnalyzer
 from .knowledge_searcher import KnowledgeSearcher
 from .ai_analyzer import AIAnalyzer
+from .alert_classifier import AlertClassifier
+from .context_builder import ContextBuilder
+from .response_parser import StreamingFieldParser
+from .knowledge_index import InvertedIndex
+from .knowledge_bm25 import BM25Index
+from .knowledge_embeddings import HashingEmbedder, IVFIndex, EmbeddingIndex
+from .knowledge_store import KnowledgeStore, open_knowledge_store
+from .service_catalog import ServiceCatalog
+from .log_reader import LogReader, LogRecord
+from .log_detectors import SignatureDetector
+from .log_follower import LogFollower, LogMonitor
 
 __all__ = [
     'LogAnalyzer',
     'KnowledgeSearcher',
-    'AIAnalyzer'
+    'AIAnalyzer',
+    'AlertClassifier',
+    'ContextBuilder',
+    'StreamingFieldParser',
+    'InvertedIndex',
+    'BM25Index',
+    'HashingEmbedder',
+    'IVFIndex',
+    'EmbeddingIndex',
+    'KnowledgeStore',
+    'open_knowledge_store',
+    'ServiceCatalog',
+    'LogReader',
+    'LogRecord',
+    'SignatureDetector',
+    'LogFollower',
+    'LogMonitor'
 ]
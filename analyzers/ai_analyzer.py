@@ -4,32 +4,85 @@ Performs AI-powered analysis using Gemini
 NO state management, NO orchestration logic
 """
 
+import re
+import time
 import logging
-from typing import Dict, Any
-from utils.gemini_client import GeminiClient
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed
+from typing import Dict, Any, List, Optional
+from utils.llm_client import BaseLLMClient
+from utils.model_router import ModelRouter
+from utils.registry import get_llm_client, get_model_router
+from utils.single_flight import SingleFlight
+from config import get_config_value
+from .alert_classifier import AlertClassifier
+from .context_builder import ContextBuilder
+from .response_parser import ALERT_FIELDS, ROOT_CAUSE_FIELDS, parse_stream, parse_text
+
+# Fields that must be read before a streamed response can be abandoned: the
+# ones decisions are made on, which the prompts ask for first. Later fields
+# are kept when they arrive with them and default otherwise
+ALERT_REQUIRED_FIELDS = ('service', 'severity')
+ROOT_CAUSE_REQUIRED_FIELDS = ('root_cause', 'confidence')
+
+# Extra instructions that diversify hedged root-cause prompts (the first is
+# the plain prompt, so a single variant is identical to the unhedged call)
+ROOT_CAUSE_PROMPT_FOCUSES = [
+    "",
+    "Focus on resource exhaustion (connections, memory, threads) and recent changes.",
+    "Focus on failing dependencies and downstream services.",
+    "Focus on configuration, deployment and capacity issues.",
+]
 
 logger = logging.getLogger("ai_analyzer")
 
+# Shared by every AIAnalyzer so identical prompts from concurrent incidents
+# (and from different agents) result in a single LLM request
+_inflight_requests = SingleFlight()
+
 
 class AIAnalyzer:
     """Pure AI analysis tool - reusable across workflows"""
     
-    def __init__(self):
-        self.client = GeminiClient()
+    def __init__(self, client: Optional[BaseLLMClient] = None, router: Optional[ModelRouter] = None):
+        """
+        Initialize AI analyzer
+        
+        Args:
+            client: LLM client to use (default: the process-wide shared client)
+            router: Per-task model router (default: the process-wide shared router)
+        """
+        self.client = client if client is not None else get_llm_client()
+        self.router = router if router is not None else get_model_router()
         self.model = self.client.model
+        self.classifier = AlertClassifier()
+        self.context_builder = ContextBuilder()
+        self.fast_path_threshold = float(get_config_value("FAST_PATH_CONFIDENCE_THRESHOLD", 0.85))
+        self.streaming = int(get_config_value("LLM_STREAMING", 1)) > 0
+        self.single_flight_timeout = float(get_config_value("LLM_SINGLE_FLIGHT_WAIT_SECONDS", 60.0))
     
     def parse_incident_alert(self, raw_alert: str) -> Dict[str, Any]:
         """
         Parse unstructured incident alert into structured data
         
+        Alerts the rule table classifies with confidence at or above
+        FAST_PATH_CONFIDENCE_THRESHOLD skip the LLM entirely.
+        
         Args:
             raw_alert: Raw alert text
             
         Returns:
-            Dictionary with parsed incident data
+            Dictionary with parsed incident data, the parse tier used
+            ('fast_path', 'llm' or 'default') and the rule confidence
         """
+        classified = self.classifier.classify(raw_alert)
+        rule_confidence = classified.pop('confidence')
+        
+        if rule_confidence >= self.fast_path_threshold:
+            logger.info(f"Fast-path triage (confidence: {rule_confidence:.2f})")
+            return self._with_tier(classified, 'fast_path', rule_confidence)
+        
         if not self.model:
-            return self._default_parse(raw_alert)
+            return self._with_tier(self._default_parse(raw_alert), 'default', rule_confidence)
         
         try:
             prompt = f"""Parse this incident alert and extract structured information.
@@ -47,20 +100,22 @@ Severity: <severity_level>
 Description: <description>
 """
             
-            text = self.client.generate_content(prompt)
+            # Parse response (stops reading once service and severity are known)
+            model_name = self.router.select('parse')
+            parsed = self._parse_ai_response(
+                *self._run_prompt(prompt, ALERT_FIELDS, ALERT_REQUIRED_FIELDS, model_name)
+            )
             
-            # Parse response
-            parsed = self._parse_ai_response(text)
-            
-            return {
+            return self._with_tier({
                 'service': parsed.get('service', 'Unknown Service'),
                 'severity': parsed.get('severity', 'MEDIUM'),
-                'description': parsed.get('description', raw_alert[:100])
-            }
+                'description': parsed.get('description', raw_alert[:100]),
+                'llm_model': model_name
+            }, 'llm', rule_confidence)
             
         except Exception as e:
             logger.error(f"AI parsing error: {e}")
-            return self._default_parse(raw_alert)
+            return self._with_tier(self._default_parse(raw_alert), 'default', rule_confidence)
     
     def analyze_root_cause(self, service: str, description: str, 
                           log_results: Dict[str, Any], 
@@ -82,9 +137,109 @@ Description: <description>
         
         try:
             # Build context from other analyses
-            context = self._build_context(log_results, knowledge_results)
+            context = self._build_context(description, log_results, knowledge_results)
+            return self._root_cause_attempt(
+                self._root_cause_prompt(service, description, context),
+                self.router.select('root_cause')
+            )
+            
+        except Exception as e:
+            logger.error(f"AI root cause analysis error: {e}")
+            return self._default_root_cause(service)
+    
+    def analyze_root_cause_hedged(self, service: str, description: str,
+                                  log_results: Dict[str, Any],
+                                  knowledge_results: Dict[str, Any],
+                                  variants: int = 3,
+                                  deadline: Optional[float] = None,
+                                  confidence_threshold: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Root cause analysis from several prompt/model variants in parallel
+        
+        Returns as soon as one variant reaches the confidence threshold;
+        otherwise waits until every variant finished or the deadline passed
+        and keeps the most confident answer. Variants still running are
+        abandoned and queued ones cancelled.
+        
+        Args:
+            service: Service name
+            description: Incident description
+            log_results: Results from log analysis
+            knowledge_results: Results from knowledge lookup
+            variants: Number of variants to run
+            deadline: Seconds to wait for variants (default: ROOT_CAUSE_HEDGE_DEADLINE_SECONDS)
+            confidence_threshold: Confidence that ends the race early
+                (default: CONFIDENCE_THRESHOLD)
             
-            prompt = f"""Analyze this incident and determine the root cause.
+        Returns:
+            Dictionary with root cause analysis plus an 'ensemble' summary
+        """
+        if variants <= 1:
+            return self.analyze_root_cause(service, description, log_results, knowledge_results)
+        if not self.model:
+            return self._default_root_cause(service)
+        
+        if deadline is None:
+            deadline = float(get_config_value("ROOT_CAUSE_HEDGE_DEADLINE_SECONDS", 8.0))
+        if confidence_threshold is None:
+            confidence_threshold = float(get_config_value("CONFIDENCE_THRESHOLD", 0.8))
+        
+        context = self._build_context(description, log_results, knowledge_results)
+        models = self._hedge_models()
+        
+        executor = ThreadPoolExecutor(max_workers=variants, thread_name_prefix="root-cause-hedge")
+        futures = [
+            executor.submit(
+                self._root_cause_attempt,
+                self._root_cause_prompt(service, description, context,
+                                        ROOT_CAUSE_PROMPT_FOCUSES[i % len(ROOT_CAUSE_PROMPT_FOCUSES)]),
+                models[i % len(models)]
+            )
+            for i in range(variants)
+        ]
+        
+        results: List[Dict[str, Any]] = []
+        early_exit = False
+        try:
+            for future in as_completed(futures, timeout=deadline):
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"Root cause variant failed: {e}")
+                    continue
+                results.append(result)
+                if result['confidence'] >= confidence_threshold:
+                    early_exit = True
+                    break
+        except FutureTimeoutError:
+            logger.warning(f"Root cause hedge deadline ({deadline}s) reached with "
+                           f"{len(results)}/{variants} variants")
+        finally:
+            # Do not wait for stragglers; their results are no longer needed
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        if not results:
+            return self._default_root_cause(service)
+        
+        best = max(results, key=lambda r: r['confidence'])
+        best_key = self._normalize_root_cause(best['root_cause'])
+        best['ensemble'] = {
+            'variants': variants,
+            'completed': len(results),
+            'early_exit': early_exit,
+            'agreement': round(
+                sum(1 for r in results if self._normalize_root_cause(r['root_cause']) == best_key) / len(results), 2
+            ),
+            'confidences': [r['confidence'] for r in results]
+        }
+        logger.info(f"Hedged root cause: {len(results)}/{variants} variants, "
+                    f"best confidence {best['confidence']:.2f}, early exit: {early_exit}")
+        return best
+    
+    def _root_cause_prompt(self, service: str, description: str, context: str, focus: str = "") -> str:
+        """Build the root-cause prompt, optionally with an extra focus instruction"""
+        focus_line = f"{focus}\n" if focus else ""
+        return f"""Analyze this incident and determine the root cause.
 
 Service: {service}
 Description: {description}
@@ -95,67 +250,120 @@ Context:
 Provide:
 1. Root cause hypothesis
 2. Confidence level (0.0 to 1.0)
-3. Contributing factors
-4. Recommended solution
+3. Recommended solution
+4. Contributing factors
 5. Estimated resolution time
 
-Be specific and actionable.
+{focus_line}Be specific and actionable. Format your response as:
+Root Cause: <root_cause_hypothesis>
+Confidence: <0.0 to 1.0>
+Recommended Solution: <solution>
+Contributing Factors: <comma-separated factors>
+Estimated Resolution Time: <duration>
 """
-            
-            text = self.client.generate_content(prompt)
-            
-            # Parse response
-            analysis = self._parse_root_cause_response(text)
-            
-            return {
-                'root_cause': analysis.get('root_cause', 'Unknown'),
-                'confidence': analysis.get('confidence', 0.7),
-                'contributing_factors': analysis.get('contributing_factors', []),
-                'recommended_solution': analysis.get('solution', 'Manual investigation required'),
-                'urgency': analysis.get('urgency', 'MEDIUM'),
-                'estimated_resolution_time': analysis.get('resolution_time', '30 minutes')
-            }
-            
-        except Exception as e:
-            logger.error(f"AI root cause analysis error: {e}")
-            return self._default_root_cause(service)
     
-    def _build_context(self, log_results: Dict, knowledge_results: Dict) -> str:
-        """Build context string from other analyses"""
-        context_parts = []
+    def _root_cause_attempt(self, prompt: str, model_name: Optional[str]) -> Dict[str, Any]:
+        """Run one root-cause prompt and shape the parsed analysis"""
+        # Parse response (stops reading once the decision fields are known)
+        analysis = self._parse_root_cause_response(
+            *self._run_prompt(prompt, ROOT_CAUSE_FIELDS, ROOT_CAUSE_REQUIRED_FIELDS, model_name)
+        )
         
-        # Log analysis context
-        anomalies = log_results.get('anomalies', [])
-        if anomalies:
-            context_parts.append(f"Anomalies detected: {len(anomalies)}")
-            for anomaly in anomalies[:2]:
-                context_parts.append(f"  - {anomaly.get('type', 'unknown')}: {anomaly.get('pattern', '')}")
+        return {
+            'root_cause': analysis.get('root_cause', 'Unknown'),
+            'confidence': analysis.get('confidence', 0.7),
+            'contributing_factors': analysis.get('contributing_factors', []),
+            'recommended_solution': analysis.get('solution', 'Manual investigation required'),
+            'urgency': analysis.get('urgency', 'MEDIUM'),
+            'estimated_resolution_time': analysis.get('resolution_time', '30 minutes'),
+            'llm_model': model_name
+        }
+    
+    def _hedge_models(self) -> List[str]:
+        """Models hedged variants rotate through: the routed model, then the fallback"""
+        models = [self.router.select('root_cause')]
+        fallback = self.router.fallback_model
+        if fallback and fallback not in models:
+            models.append(fallback)
+        return models
+    
+    @staticmethod
+    def _normalize_root_cause(root_cause: str) -> str:
+        """Comparable form of a root cause for measuring variant agreement"""
+        return ' '.join(re.findall(r'\w+', root_cause.lower()))
+    
+    def _run_prompt(self, prompt: str, fields: Dict[str, str], required: tuple,
+                    model_name: Optional[str] = None) -> tuple:
+        """
+        Send a prompt and parse labeled fields from the response
         
-        # Knowledge base context
-        similar = knowledge_results.get('similar_incidents', [])
-        if similar:
-            context_parts.append(f"\\nSimilar past incidents: {len(similar)}")
-            for incident in similar[:2]:
-                context_parts.append(f"  - {incident.get('root_cause', 'unknown')}")
+        With LLM_STREAMING enabled the response is streamed and reading
+        stops as soon as every required field has been parsed. Concurrent
+        callers sending the same prompt to the same model share one
+        in-flight request.
         
-        return '\\n'.join(context_parts) if context_parts else "No additional context available"
+        Returns:
+            Tuple of (response text read, parsed fields)
+        """
+        key = (self.client.name, model_name, self.streaming, required, prompt)
+        return _inflight_requests.do(
+            key,
+            lambda: self._execute_prompt(prompt, fields, required, model_name),
+            timeout=self.single_flight_timeout
+        )
     
-    def _parse_ai_response(self, text: str) -> Dict[str, Any]:
+    def _execute_prompt(self, prompt: str, fields: Dict[str, str], required: tuple,
+                        model_name: Optional[str] = None) -> tuple:
+        """Send a prompt to the LLM client, parse the response and record its latency"""
+        start = time.monotonic()
+        try:
+            if not self.streaming:
+                text = self.client.generate_content(prompt, model_name)
+                result = text, parse_text(text, fields)
+            else:
+                parsed, text, early_exit = parse_stream(
+                    self.client.generate_content_stream(prompt, model_name), fields, required
+                )
+                if early_exit:
+                    logger.debug(f"Stopped streaming early after {len(text)} characters")
+                result = text, parsed
+        except Exception as e:
+            if model_name:
+                # Rejections (open circuit, rate limit) return at once and would
+                # pull the p95 down; only a timeout's wait counts, as a penalty
+                latency = time.monotonic() - start if isinstance(e, TimeoutError) else None
+                self.router.record(model_name, latency, success=False)
+            raise
+        
+        if model_name:
+            self.router.record(model_name, time.monotonic() - start)
+        return result
+    
+    def get_routing_metrics(self) -> Dict[str, Any]:
+        """Model routing decisions and per-model latency observed so far"""
+        return self.router.get_metrics()
+    
+    @staticmethod
+    def _with_tier(parsed: Dict[str, Any], tier: str, rule_confidence: float) -> Dict[str, Any]:
+        """Annotate a parse result with the triage tier that produced it"""
+        parsed['parse_tier'] = tier
+        parsed['rule_confidence'] = rule_confidence
+        return parsed
+    
+    def _build_context(self, description: str, log_results: Dict, knowledge_results: Dict) -> str:
+        """Build token-budgeted context string from other analyses"""
+        return self.context_builder.build(description, log_results, knowledge_results)
+    
+    def _parse_ai_response(self, text: str, fields: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Parse AI response for incident parsing"""
-        parsed = {}
+        parsed = dict(fields) if fields is not None else parse_text(text, ALERT_FIELDS)
         
-        for line in text.split('\\n'):
-            line = line.strip()
-            if line.startswith('Service:'):
-                parsed['service'] = line.split(':', 1)[1].strip()
-            elif line.startswith('Severity:'):
-                parsed['severity'] = line.split(':', 1)[1].strip().upper()
-            elif line.startswith('Description:'):
-                parsed['description'] = line.split(':', 1)[1].strip()
+        if 'severity' in parsed:
+            parsed['severity'] = parsed['severity'].upper()
         
         return parsed
     
-    def _parse_root_cause_response(self, text: str) -> Dict[str, Any]:
+    def _parse_root_cause_response(self, text: str, fields: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Parse AI response for root cause analysis"""
         analysis = {
             'root_cause': 'Unknown root cause',
@@ -166,9 +374,13 @@ Be specific and actionable.
             'resolution_time': '30 minutes'
         }
         
-        # Extract confidence if mentioned
-        import re
-        confidence_match = re.search(r'confidence[:\\s]+(\\d+\\.?\\d*)', text, re.IGNORECASE)
+        if fields is None:
+            fields = parse_text(text, ROOT_CAUSE_FIELDS)
+        
+        # Extract confidence from its field, else wherever it is mentioned
+        confidence_match = re.search(r'(\d+\.?\d*)', fields.get('confidence', ''))
+        if not confidence_match:
+            confidence_match = re.search(r'confidence[:\s*]+(\d+\.?\d*)', text, re.IGNORECASE)
         if confidence_match:
             try:
                 conf = float(confidence_match.group(1))
@@ -178,10 +390,22 @@ Be specific and actionable.
             except ValueError:
                 pass
         
-        # Extract root cause (first substantial line)
-        lines = [l.strip() for l in text.split('\\n') if l.strip()]
-        if lines:
-            analysis['root_cause'] = lines[0][:200]
+        # Extract root cause (labeled field, else first substantial line)
+        if fields.get('root_cause'):
+            analysis['root_cause'] = fields['root_cause'][:200]
+        else:
+            lines = [l.strip() for l in text.split('\n') if l.strip()]
+            if lines:
+                analysis['root_cause'] = lines[0][:200]
+        
+        if fields.get('solution'):
+            analysis['solution'] = fields['solution']
+        if fields.get('contributing_factors'):
+            analysis['contributing_factors'] = [
+                factor.strip() for factor in re.split(r'[,;]', fields['contributing_factors']) if factor.strip()
+            ]
+        if fields.get('resolution_time'):
+            analysis['resolution_time'] = fields['resolution_time']
         
         return analysis
     
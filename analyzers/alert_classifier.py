@@ -0,0 +1,121 @@
+"""
+Alert Classifier - Pure Tool
+Deterministic rule-based first tier for incident alert triage
+NO state management, NO orchestration logic
+"""
+
+import re
+import logging
+from typing import Dict, Any, List, Tuple
+
+logger = logging.getLogger("alert_classifier")
+
+
+# Canonical service -> (alias, weight). Full service names weigh more than
+# bare words that may also appear as context ("database" in a Payment API alert).
+SERVICE_ALIASES = {
+    'Payment API': [('payment api', 1.0), ('payments api', 1.0), ('payment service', 1.0),
+                    ('payments', 0.8), ('payment', 0.8), ('billing', 0.7)],
+    'Auth Service': [('auth service', 1.0), ('authentication service', 1.0), ('auth api', 1.0),
+                     ('authentication', 0.8), ('auth', 0.8), ('login', 0.7), ('sso', 0.7)],
+    'Database': [('database', 0.8), ('postgres', 0.8), ('postgresql', 0.8), ('mysql', 0.8),
+                 ('db', 0.7)],
+    'Load Balancer': [('load balancer', 1.0), ('load-balancer', 1.0), ('lb', 0.6)],
+    'API Gateway': [('api gateway', 1.0), ('api-gateway', 1.0), ('gateway', 0.8)],
+}
+
+# Severity -> cue words. HIGH is checked first, matching _default_parse.
+SEVERITY_CUES = {
+    'HIGH': ['critical', 'high', 'sev1', 'sev-1', 'p1', 'outage', 'down', 'fatal', 'emergency'],
+    'MEDIUM': ['medium', 'sev2', 'sev-2', 'p2', 'degraded', 'elevated'],
+    'LOW': ['low', 'minor', 'sev3', 'sev-3', 'p3'],
+}
+
+SERVICE_WEIGHT = 0.6
+SEVERITY_WEIGHT = 0.4
+AMBIGUITY_PENALTY = 0.3
+
+
+def _compile_alternation(terms: List[str]) -> "re.Pattern":
+    """Compile terms into one case-insensitive, word-bounded alternation"""
+    # Longest first so "payment api" wins over "payment" at the same position
+    ordered = sorted(set(terms), key=len, reverse=True)
+    body = '|'.join(re.escape(term) for term in ordered)
+    return re.compile(rf'(?<![\w-])(?:{body})(?![\w-])', re.IGNORECASE)
+
+
+class AlertClassifier:
+    """Pure rule-based alert classifier - reusable across workflows"""
+    
+    def __init__(self):
+        self._alias_lookup: Dict[str, Tuple[str, float]] = {}
+        for service, aliases in SERVICE_ALIASES.items():
+            for alias, weight in aliases:
+                self._alias_lookup[alias] = (service, weight)
+        self._service_pattern = _compile_alternation(list(self._alias_lookup))
+        
+        self._severity_lookup: Dict[str, str] = {}
+        for severity, cues in SEVERITY_CUES.items():
+            for cue in cues:
+                self._severity_lookup.setdefault(cue, severity)
+        self._severity_pattern = _compile_alternation(list(self._severity_lookup))
+    
+    def classify(self, raw_alert: str) -> Dict[str, Any]:
+        """
+        Classify an alert with the compiled rule table
+        
+        Args:
+            raw_alert: Raw alert text
+        
+        Returns:
+            Dictionary with service, severity, description and a
+            confidence score in [0.0, 1.0]
+        """
+        service, service_confidence = self._match_service(raw_alert)
+        severity, severity_confidence = self._match_severity(raw_alert)
+        
+        confidence = SERVICE_WEIGHT * service_confidence + SEVERITY_WEIGHT * severity_confidence
+        
+        return {
+            'service': service,
+            'severity': severity,
+            'description': raw_alert[:200],
+            'confidence': round(confidence, 2)
+        }
+    
+    def _match_service(self, raw_alert: str) -> Tuple[str, float]:
+        """Return the subject service and how sure the rules are about it"""
+        best: Dict[str, float] = {}
+        first_seen: Dict[str, int] = {}
+        
+        for match in self._service_pattern.finditer(raw_alert):
+            service, weight = self._alias_lookup[match.group(0).lower()]
+            if weight > best.get(service, 0.0):
+                best[service] = weight
+            first_seen.setdefault(service, match.start())
+        
+        if not best:
+            return 'Unknown Service', 0.0
+        
+        # The strongest alias wins; the earliest mention breaks ties
+        ranked = sorted(best, key=lambda s: (-best[s], first_seen[s]))
+        service = ranked[0]
+        confidence = best[service]
+        
+        # Another service named just as strongly makes the subject ambiguous
+        if len(ranked) > 1 and best[ranked[1]] >= confidence:
+            confidence -= AMBIGUITY_PENALTY
+        
+        return service, max(0.0, confidence)
+    
+    def _match_severity(self, raw_alert: str) -> Tuple[str, float]:
+        """Return the severity and whether an explicit cue was found"""
+        found = {self._severity_lookup[m.group(0).lower()]
+                 for m in self._severity_pattern.finditer(raw_alert)}
+        
+        for severity in ('HIGH', 'MEDIUM', 'LOW'):
+            if severity in found:
+                # Conflicting cues ("low latency, critical outage") lower trust
+                return severity, 1.0 if len(found) == 1 else 0.6
+        
+        return 'MEDIUM', 0.0
@@ -0,0 +1,174 @@
+"""
+Context Builder - Pure Tool
+Builds token-budgeted evidence context for root-cause prompts
+NO state management, NO orchestration logic
+"""
+
+import math
+import re
+import logging
+from typing import Dict, Any, List, Optional
+from config import get_config_value
+
+logger = logging.getLogger("context_builder")
+
+SEVERITY_WEIGHTS = {'HIGH': 1.0, 'MEDIUM': 0.7, 'LOW': 0.4}
+
+# Rendering order of evidence sections and their headings
+SECTIONS = [
+    ('anomaly', "Anomalies detected: {count}"),
+    ('similar', "Similar past incidents: {count}"),
+    ('pattern', "Log patterns: {count}"),
+]
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate LLM tokens for text without a tokenizer
+    
+    Uses the larger of ~4 characters per token and ~0.75 words per token,
+    which tracks Gemini/GPT-style tokenizers closely for English log text.
+    """
+    if not text:
+        return 0
+    words = len(_WORD_RE.findall(text))
+    return max(1, math.ceil(len(text) / 4), math.ceil(words * 4 / 3))
+
+
+class ContextBuilder:
+    """Pure prompt-context builder - reusable across workflows"""
+    
+    def __init__(self, token_budget: Optional[int] = None):
+        """
+        Initialize context builder
+        
+        Args:
+            token_budget: Maximum estimated tokens of context per prompt
+                (default: ROOT_CAUSE_CONTEXT_TOKEN_BUDGET)
+        """
+        if token_budget is None:
+            token_budget = get_config_value("ROOT_CAUSE_CONTEXT_TOKEN_BUDGET", 600)
+        self.token_budget = int(token_budget)
+    
+    def build(self, description: str, log_results: Dict[str, Any],
+              knowledge_results: Dict[str, Any]) -> str:
+        """
+        Build a context string that fits the token budget
+        
+        Args:
+            description: Incident description (used to rank evidence)
+            log_results: Results from log analysis
+            knowledge_results: Results from knowledge lookup
+        
+        Returns:
+            Context text with the highest-value evidence first per section
+        """
+        evidence = self.collect_evidence(description, log_results, knowledge_results)
+        if not evidence:
+            return "No additional context available"
+        
+        selected = self.pack(evidence)
+        
+        parts = []
+        for section, heading in SECTIONS:
+            items = [item for item in selected if item['section'] == section]
+            if not items:
+                continue
+            total = sum(1 for item in evidence if item['section'] == section)
+            if parts:
+                parts.append("")
+            parts.append(heading.format(count=total))
+            parts.extend(f"  - {item['text']}" for item in items)
+        
+        context = '\n'.join(parts) if parts else "No additional context available"
+        logger.debug(f"Context: {len(selected)}/{len(evidence)} evidence items, "
+                     f"~{estimate_tokens(context)} tokens (budget {self.token_budget})")
+        return context
+    
+    def collect_evidence(self, description: str, log_results: Dict[str, Any],
+                         knowledge_results: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Turn analysis results into scored, deduplicated evidence items
+        
+        Returns:
+            List of {'section', 'text', 'relevance', 'tokens'} dicts
+        """
+        query_terms = set(_WORD_RE.findall(description.lower()))
+        items = []
+        
+        anomalies = log_results.get('anomalies', []) or []
+        max_frequency = max([a.get('frequency', 0) or 0 for a in anomalies] + [1])
+        for anomaly in anomalies:
+            text = f"{anomaly.get('type', 'unknown')}: {anomaly.get('pattern', '')}"
+            if anomaly.get('time_range'):
+                text += f" ({anomaly.get('frequency', 0)}x, {anomaly['time_range']})"
+            severity = SEVERITY_WEIGHTS.get(str(anomaly.get('severity', '')).upper(), 0.5)
+            frequency = (anomaly.get('frequency', 0) or 0) / max_frequency
+            relevance = severity * (0.5 + 0.5 * frequency) + self._overlap(text, query_terms)
+            items.append(self._item('anomaly', text, relevance))
+        
+        for incident in knowledge_results.get('similar_incidents', []) or []:
+            text = incident.get('root_cause', 'unknown')
+            if incident.get('solution'):
+                text += f" -> {incident['solution']}"
+            relevance = float(incident.get('similarity_score', 0.5)) + self._overlap(text, query_terms)
+            items.append(self._item('similar', text, relevance))
+        
+        for pattern in log_results.get('log_patterns', []) or []:
+            items.append(self._item('pattern', pattern, 0.3 + self._overlap(pattern, query_terms)))
+        
+        return self._deduplicate(items)
+    
+    def pack(self, evidence: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Greedily select the most relevant evidence that fits the budget
+        
+        Section headings are charged against the budget the first time a
+        section is used. Items too large for the remaining budget are
+        skipped so smaller, lower-ranked items can still fit.
+        """
+        remaining = self.token_budget
+        opened = set()
+        selected = []
+        
+        for item in sorted(evidence, key=lambda i: i['relevance'], reverse=True):
+            cost = item['tokens']
+            if item['section'] not in opened:
+                cost += estimate_tokens(dict(SECTIONS)[item['section']] + "\n\n")
+            if cost > remaining:
+                continue
+            remaining -= cost
+            opened.add(item['section'])
+            selected.append(item)
+        
+        return selected
+    
+    @staticmethod
+    def _item(section: str, text: str, relevance: float) -> Dict[str, Any]:
+        """Build an evidence item with its token cost (including list prefix and newline)"""
+        return {
+            'section': section,
+            'text': text,
+            'relevance': round(relevance, 4),
+            'tokens': estimate_tokens(f"  - {text}\n")
+        }
+    
+    @staticmethod
+    def _overlap(text: str, query_terms: set) -> float:
+        """Bonus in [0, 0.3] for evidence sharing terms with the description"""
+        if not query_terms:
+            return 0.0
+        terms = set(_WORD_RE.findall(text.lower()))
+        return 0.3 * len(terms & query_terms) / len(query_terms)
+    
+    @staticmethod
+    def _deduplicate(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Keep the most relevant copy of evidence with the same normalized text"""
+        best: Dict[str, Dict[str, Any]] = {}
+        for item in items:
+            key = ' '.join(_WORD_RE.findall(item['text'].lower()))
+            if key not in best or item['relevance'] > best[key]['relevance']:
+                best[key] = item
+        return list(best.values())
@@ -0,0 +1,227 @@
+"""
+Knowledge BM25 - Pure Tool
+Vectorized BM25 relevance scoring over full incident text
+NO state management, NO orchestration logic
+"""
+
+import re
+import logging
+from collections import Counter
+from typing import Any, BinaryIO, Dict, Iterable, List, Sequence, Tuple, Union
+import numpy as np
+
+logger = logging.getLogger("knowledge_bm25")
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+STOPWORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'due', 'for', 'from', 'in',
+    'into', 'is', 'it', 'of', 'on', 'or', 'the', 'to', 'was', 'with',
+})
+
+# Largest (queries x documents) score matrix built at once by batch search
+MAX_BATCH_CELLS = 1 << 20
+
+# Incident fields that make up the searchable text
+TEXT_FIELDS = ('service', 'anomaly', 'root_cause', 'solution')
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in STOPWORDS]
+
+
+def incident_text(incident: Dict[str, Any]) -> str:
+    """Searchable text of an incident: its descriptive fields plus keywords"""
+    parts = [str(incident.get(field) or '') for field in TEXT_FIELDS]
+    parts.extend(incident.get('keywords') or [])
+    return ' '.join(parts)
+
+
+class BM25Index:
+    """
+    BM25 index stored as a term-major sparse matrix
+    
+    ``term_ptr``/``doc_ids``/``weights`` are the CSR arrays of the
+    term x document matrix of precomputed BM25 term weights, so scoring a
+    query is a sparse row sum. Scores are normalized to 0-1 by the best
+    weight each query term reaches in any document, scaled by the share
+    of query terms the knowledge base knows at all (so a query matching
+    on one common word out of several unknown ones does not score 1.0).
+    """
+    
+    def __init__(self, vocabulary: Dict[str, int], term_ptr: np.ndarray, doc_ids: np.ndarray,
+                 weights: np.ndarray, n_docs: int):
+        self.vocabulary = vocabulary
+        self.terms = sorted(vocabulary, key=vocabulary.get)
+        self.term_ptr = term_ptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.n_docs = n_docs
+        self.term_max = (np.maximum.reduceat(weights, term_ptr[:-1]) if len(weights)
+                         else np.zeros(len(vocabulary), dtype=np.float32))
+    
+    @classmethod
+    def build(cls, texts: Iterable[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """
+        Build an index from document texts
+        
+        Args:
+            texts: One text per document, in document order
+            k1: Term frequency saturation
+            b: Document length normalization
+        
+        Returns:
+            Populated index
+        """
+        vocabulary: Dict[str, int] = {}
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        frequencies: List[int] = []
+        lengths: List[int] = []
+        
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                term_ids.append(vocabulary.setdefault(term, len(vocabulary)))
+                doc_ids.append(doc_id)
+                frequencies.append(count)
+        
+        n_docs = len(lengths)
+        terms = np.asarray(term_ids, dtype=np.int64)
+        docs = np.asarray(doc_ids, dtype=np.int32)
+        tf = np.asarray(frequencies, dtype=np.float32)
+        doc_len = np.asarray(lengths, dtype=np.float32)
+        
+        # Group postings by term; a stable sort keeps documents ascending
+        order = np.argsort(terms, kind='stable')
+        terms, docs, tf = terms[order], docs[order], tf[order]
+        df = np.bincount(terms, minlength=len(vocabulary))
+        term_ptr = np.zeros(len(vocabulary) + 1, dtype=np.int64)
+        np.cumsum(df, out=term_ptr[1:])
+        
+        idf = np.log1p((n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        avg_len = float(doc_len.mean()) if n_docs else 1.0
+        norm = k1 * (1 - b + b * doc_len[docs] / max(avg_len, 1e-9))
+        weights = (idf[terms] * tf * (k1 + 1) / (tf + norm)).astype(np.float32)
+        
+        logger.debug(f"BM25 index: {n_docs} documents, {len(vocabulary)} terms, {len(weights)} postings")
+        return cls(vocabulary, term_ptr, docs, weights, n_docs)
+    
+    def __len__(self) -> int:
+        return self.n_docs
+    
+    def search(self, query_terms: Iterable[str], top_k: int = 5,
+               min_score: float = 0.0) -> List[Tuple[int, float, List[str]]]:
+        """
+        Top documents for one query
+        
+        Args:
+            query_terms: Query tokens
+            top_k: Maximum results
+            min_score: Normalized scores must exceed this to be returned
+        
+        Returns:
+            List of (document ID, score in 0-1, matched terms), best first
+        """
+        return self.search_batch([query_terms], top_k, min_score)[0]
+    
+    def search_batch(self, queries: Sequence[Iterable[str]], top_k: int = 5,
+                     min_score: float = 0.0) -> List[List[Tuple[int, float, List[str]]]]:
+        """
+        Top documents for many queries in one vectorized pass
+        
+        Queries are scored in chunks as a dense (queries x documents)
+        matrix accumulated with one bincount over all their postings; the
+        chunk size keeps that matrix under MAX_BATCH_CELLS.
+        
+        Args:
+            queries: Query token lists
+            top_k: Maximum results per query
+            min_score: Normalized scores must exceed this to be returned
+        
+        Returns:
+            One result list per query, as returned by search()
+        """
+        query_terms = [set(terms) for terms in queries]
+        query_ids = [self._term_ids(terms) for terms in query_terms]
+        
+        # Per-query factor turning raw BM25 sums into 0-1 scores
+        scale = np.zeros(len(query_ids))
+        for row, (ids, terms) in enumerate(zip(query_ids, query_terms)):
+            best_possible = float(self.term_max[ids].sum())
+            if best_possible > 0:
+                scale[row] = len(ids) / len(terms) / best_possible
+        
+        chunk = max(1, MAX_BATCH_CELLS // max(1, self.n_docs))
+        results = []
+        for first in range(0, len(query_ids), chunk):
+            last = min(first + chunk, len(query_ids))
+            scores = self._score_matrix(query_ids[first:last])
+            scores *= scale[first:last, None]
+            
+            # Threshold the whole chunk at once, then rank the few survivors:
+            # by query, score descending, ties in document order
+            cells = np.flatnonzero(scores > min_score)
+            values = scores.ravel()[cells]
+            rows, docs = np.divmod(cells, self.n_docs)
+            order = np.lexsort((docs, -values, rows))
+            rows, docs, values = rows[order], docs[order], values[order]
+            bounds = np.searchsorted(rows, np.arange(last - first + 1))
+            
+            for offset in range(last - first):
+                start, end = bounds[offset], min(bounds[offset + 1], bounds[offset] + top_k)
+                results.append([
+                    (int(docs[i]), float(values[i]), self.matched_terms(int(docs[i]), query_ids[first + offset]))
+                    for i in range(start, end)
+                ])
+        return results
+    
+    def _score_matrix(self, query_ids: List[List[int]]) -> np.ndarray:
+        """Raw BM25 scores as a (queries x documents) matrix"""
+        keys, weights = [], []
+        for row, ids in enumerate(query_ids):
+            for term_id in ids:
+                start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+                keys.append(self.doc_ids[start:end].astype(np.int64) + row * self.n_docs)
+                weights.append(self.weights[start:end])
+        size = len(query_ids) * self.n_docs
+        if not keys:
+            return np.zeros((len(query_ids), self.n_docs))
+        return np.bincount(np.concatenate(keys), weights=np.concatenate(weights),
+                           minlength=size).reshape(len(query_ids), self.n_docs)
+    
+    def matched_terms(self, doc_id: int, term_ids: Iterable[int]) -> List[str]:
+        """Query terms present in a document (postings are sorted by document)"""
+        matched = []
+        for term_id in term_ids:
+            start, end = self.term_ptr[term_id], self.term_ptr[term_id + 1]
+            position = start + np.searchsorted(self.doc_ids[start:end], doc_id)
+            if position < end and self.doc_ids[position] == doc_id:
+                matched.append(self.terms[term_id])
+        return sorted(matched)
+    
+    def _term_ids(self, terms: Iterable[str]) -> List[int]:
+        """Vocabulary IDs of the distinct known query terms"""
+        return sorted({self.vocabulary[term] for term in terms if term in self.vocabulary})
+    
+    def save(self, path: Union[str, BinaryIO], **extra: Any) -> None:
+        """Save the index arrays (plus extra metadata arrays) in .npz format"""
+        np.savez(path, terms=np.array(self.terms, dtype=str), term_ptr=self.term_ptr, doc_ids=self.doc_ids,
+                 weights=self.weights, n_docs=np.int64(self.n_docs), **extra)
+    
+    @classmethod
+    def load(cls, path: Union[str, BinaryIO]) -> Tuple["BM25Index", Dict[str, np.ndarray]]:
+        """
+        Load an index saved with save()
+        
+        Returns:
+            Tuple of (index, extra metadata arrays)
+        """
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        vocabulary = {str(term): i for i, term in enumerate(arrays.pop('terms'))}
+        index = cls(vocabulary, arrays.pop('term_ptr'), arrays.pop('doc_ids'),
+                    arrays.pop('weights'), int(arrays.pop('n_docs')))
+        return index, arrays
@@ -0,0 +1,305 @@
+"""
+Knowledge Embeddings - Pure Tool
+Hashed n-gram text embeddings and an IVF approximate nearest-neighbor index
+NO state management, NO orchestration logic
+"""
+
+import zlib
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from .knowledge_bm25 import tokenize
+
+logger = logging.getLogger("knowledge_embeddings")
+
+# Relative weights of the hashed feature families
+WORD_WEIGHT = 1.0
+BIGRAM_WEIGHT = 0.7
+TRIGRAM_WEIGHT = 0.35
+
+# Documents embedded per vectorized chunk
+EMBED_CHUNK = 8192
+
+
+@lru_cache(maxsize=1 << 18)
+def _hash_feature(feature: str, dim: int) -> Tuple[int, float]:
+    """Stable bucket and sign for a feature (crc32, so identical across runs)"""
+    h = zlib.crc32(feature.encode('utf-8'))
+    return h % dim, (1.0 if (h >> 31) & 1 else -1.0)
+
+
+@lru_cache(maxsize=1 << 16)
+def _token_features(token: str, dim: int) -> Tuple[Tuple[int, float], ...]:
+    """Hashed word and character-trigram features of one token"""
+    bucket, sign = _hash_feature(f"w:{token}", dim)
+    features = [(bucket, sign * WORD_WEIGHT)]
+    padded = f"<{token}>"
+    for i in range(len(padded) - 2):
+        bucket, sign = _hash_feature(f"c:{padded[i:i + 3]}", dim)
+        features.append((bucket, sign * TRIGRAM_WEIGHT))
+    return tuple(features)
+
+
+class HashingEmbedder:
+    """
+    Feature-hashed text embedder
+    
+    Texts become L2-normalized vectors of word, word-bigram and character
+    trigram features hashed into ``dim`` signed buckets. Character
+    trigrams let paraphrases and inflections ("timeouts", "timed out")
+    land close to each other without any model or vocabulary.
+    """
+    
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+    
+    def embed(self, text: str) -> np.ndarray:
+        """Embed one text"""
+        return self.embed_batch([text])[0]
+    
+    def embed_batch(self, texts: Iterable[str]) -> np.ndarray:
+        """
+        Embed many texts
+        
+        Args:
+            texts: Texts to embed
+        
+        Returns:
+            float32 array of shape (len(texts), dim), rows L2-normalized
+        """
+        chunks = []
+        rows: List[int] = []
+        buckets: List[int] = []
+        values: List[float] = []
+        count = 0
+        
+        for text in texts:
+            tokens = tokenize(text)
+            for token in tokens:
+                for bucket, value in _token_features(token, self.dim):
+                    rows.append(count)
+                    buckets.append(bucket)
+                    values.append(value)
+            for left, right in zip(tokens, tokens[1:]):
+                bucket, sign = _hash_feature(f"b:{left} {right}", self.dim)
+                rows.append(count)
+                buckets.append(bucket)
+                values.append(sign * BIGRAM_WEIGHT)
+            count += 1
+            if count == EMBED_CHUNK:
+                chunks.append(self._densify(rows, buckets, values, count))
+                rows, buckets, values, count = [], [], [], 0
+        
+        if count or not chunks:
+            chunks.append(self._densify(rows, buckets, values, count))
+        return np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+    
+    def _densify(self, rows: List[int], buckets: List[int], values: List[float], count: int) -> np.ndarray:
+        """Sum sparse features into normalized dense rows"""
+        flat = np.asarray(rows, dtype=np.int64) * self.dim + np.asarray(buckets, dtype=np.int64)
+        matrix = np.bincount(flat, weights=values, minlength=count * self.dim).reshape(count, self.dim)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return (matrix / np.maximum(norms, 1e-12)).astype(np.float32)
+
+
+class IVFIndex:
+    """
+    Inverted-file ANN index over unit vectors
+    
+    A k-means coarse quantizer splits the vectors into ``nlist`` cells.
+    Vectors are stored grouped by cell so each cell is one contiguous
+    slice (cheap to read from a memory map); a query scores only the
+    ``nprobe`` cells closest to it. nprobe = nlist is exact search.
+    """
+    
+    def __init__(self, centroids: np.ndarray, list_ptr: np.ndarray, doc_ids: np.ndarray, vectors: np.ndarray):
+        self.centroids = centroids
+        self.list_ptr = list_ptr
+        self.doc_ids = doc_ids
+        self.vectors = vectors
+    
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+    
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+    
+    @classmethod
+    def build(cls, vectors: np.ndarray, nlist: int = 0, iterations: int = 10,
+              sample_size: int = 50000, seed: int = 7) -> "IVFIndex":
+        """
+        Train the quantizer and bucket the vectors
+        
+        Args:
+            vectors: Unit vectors, one row per document
+            nlist: Number of cells (0 = about sqrt of the document count)
+            iterations: k-means iterations
+            sample_size: Vectors used to train the centroids
+            seed: Random seed
+        
+        Returns:
+            Populated index
+        """
+        n = len(vectors)
+        if nlist <= 0:
+            nlist = max(1, int(np.sqrt(n)))
+        nlist = max(1, min(nlist, n))
+        rng = np.random.default_rng(seed)
+        
+        sample = vectors[rng.choice(n, size=min(n, max(sample_size, nlist)), replace=False)] if n else vectors
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy() if n else \
+            np.zeros((1, vectors.shape[1]), dtype=np.float32)
+        for _ in range(iterations if n else 0):
+            assignment = cls._assign(sample, centroids)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            empty = np.bincount(assignment, minlength=nlist) == 0
+            # Spherical k-means: centroids are normalized means; empty cells keep their centroid
+            sums[empty] = centroids[empty]
+            centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-12)
+        
+        assignment = cls._assign(vectors, centroids) if n else np.zeros(0, dtype=np.int64)
+        order = np.argsort(assignment, kind='stable')
+        list_ptr = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assignment, minlength=len(centroids)), out=list_ptr[1:])
+        
+        logger.debug(f"IVF index: {n} vectors in {len(centroids)} cells")
+        return cls(centroids.astype(np.float32), list_ptr, order.astype(np.int64),
+                   np.ascontiguousarray(vectors[order]))
+    
+    @staticmethod
+    def _assign(vectors: np.ndarray, centroids: np.ndarray, chunk: int = 65536) -> np.ndarray:
+        """Nearest centroid (by inner product) of each vector"""
+        return np.concatenate([
+            np.argmax(vectors[i:i + chunk] @ centroids.T, axis=1) for i in range(0, len(vectors), chunk)
+        ]) if len(vectors) else np.zeros(0, dtype=np.int64)
+    
+    def search(self, query: np.ndarray, top_k: int = 5, nprobe: int = 8) -> List[Tuple[int, float]]:
+        """
+        Approximate top-k by cosine similarity
+        
+        Args:
+            query: Unit query vector
+            top_k: Maximum results
+            nprobe: Cells to scan (higher = better recall, slower)
+        
+        Returns:
+            List of (document ID, cosine similarity), best first
+        """
+        if not len(self.doc_ids):
+            return []
+        nprobe = max(1, min(nprobe, self.nlist))
+        cells = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        
+        # Cells are contiguous slices, so a memory map reads only the probed pages
+        spans = [(self.list_ptr[c], self.list_ptr[c + 1]) for c in cells if self.list_ptr[c + 1] > self.list_ptr[c]]
+        if not spans:
+            return []
+        scores = np.concatenate([self.vectors[start:end] @ query for start, end in spans])
+        doc_ids = np.concatenate([self.doc_ids[start:end] for start, end in spans])
+        return self._top(doc_ids, scores, top_k)
+    
+    def search_exact(self, query: np.ndarray, top_k: int = 5) -> List[Tuple[int, float]]:
+        """Brute-force top-k over every vector (the recall reference)"""
+        if not len(self.doc_ids):
+            return []
+        return self._top(self.doc_ids, self.vectors @ query, top_k)
+    
+    @staticmethod
+    def _top(doc_ids: np.ndarray, scores: np.ndarray, top_k: int) -> List[Tuple[int, float]]:
+        """Best (document ID, score) pairs; ties keep document order"""
+        if len(scores) > top_k:
+            keep = np.argpartition(-scores, top_k - 1)[:top_k]
+            doc_ids, scores = doc_ids[keep], scores[keep]
+        order = np.lexsort((doc_ids, -scores))
+        return [(int(doc_ids[i]), float(scores[i])) for i in order]
+    
+    def save(self, prefix: str, **meta: Any) -> None:
+        """
+        Save to ``<prefix>.vectors.npy`` (memory-mappable) and ``<prefix>.ivf.npz``
+        
+        Args:
+            prefix: Path prefix
+            meta: Extra metadata arrays stored with the quantizer
+        """
+        np.save(f"{prefix}.vectors.npy", self.vectors)
+        with open(f"{prefix}.ivf.npz", 'wb') as f:
+            np.savez(f, centroids=self.centroids, list_ptr=self.list_ptr, doc_ids=self.doc_ids, **meta)
+    
+    @classmethod
+    def load(cls, prefix: str, mmap: bool = True) -> Tuple["IVFIndex", Dict[str, np.ndarray]]:
+        """
+        Load an index saved with save()
+        
+        Args:
+            prefix: Path prefix
+            mmap: Memory-map the vectors instead of reading them into memory
+        
+        Returns:
+            Tuple of (index, extra metadata arrays)
+        """
+        with np.load(f"{prefix}.ivf.npz", allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        vectors = np.load(f"{prefix}.vectors.npy", mmap_mode='r' if mmap else None)
+        index = cls(arrays.pop('centroids'), arrays.pop('list_ptr'), arrays.pop('doc_ids'), vectors)
+        return index, arrays
+
+
+class EmbeddingIndex:
+    """Text-in, matches-out pairing of a HashingEmbedder and an IVFIndex"""
+    
+    def __init__(self, embedder: HashingEmbedder, ivf: IVFIndex):
+        self.embedder = embedder
+        self.ivf = ivf
+    
+    @classmethod
+    def build(cls, texts: Iterable[str], dim: int = 256, nlist: int = 0) -> "EmbeddingIndex":
+        """Embed texts and build the IVF index over them"""
+        embedder = HashingEmbedder(dim)
+        return cls(embedder, IVFIndex.build(embedder.embed_batch(texts), nlist=nlist))
+    
+    def __len__(self) -> int:
+        return len(self.ivf)
+    
+    def search(self, text: str, top_k: int = 5, nprobe: int = 8,
+               min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Most similar documents to a text
+        
+        Args:
+            text: Query text
+            top_k: Maximum results
+            nprobe: IVF cells to scan
+            min_score: Cosine similarities must exceed this to be returned
+        
+        Returns:
+            List of (document ID, cosine similarity), best first
+        """
+        matches = self.ivf.search(self.embedder.embed(text), top_k, nprobe)
+        return [(doc_id, score) for doc_id, score in matches if score > min_score]
+    
+    def save(self, prefix: str, signature: Optional[str] = None) -> None:
+        """Persist the vectors and quantizer (see IVFIndex.save)"""
+        meta = {'dim': np.int64(self.embedder.dim)}
+        if signature is not None:
+            meta['signature'] = np.array(signature)
+        self.ivf.save(prefix, **meta)
+    
+    @classmethod
+    def load(cls, prefix: str) -> Tuple["EmbeddingIndex", Dict[str, np.ndarray]]:
+        """Load with memory-mapped vectors; returns (index, metadata)"""
+        ivf, meta = IVFIndex.load(prefix, mmap=True)
+        return cls(HashingEmbedder(int(meta['dim'])), ivf), meta
+
+
+def recall_at_k(approximate: Sequence[Sequence[Tuple[int, float]]],
+                exact: Sequence[Sequence[Tuple[int, float]]]) -> float:
+    """Fraction of exact top-k documents that the approximate search also returned"""
+    found = total = 0
+    for approx, truth in zip(approximate, exact):
+        truth_ids = {doc_id for doc_id, _ in truth}
+        found += len(truth_ids & {doc_id for doc_id, _ in approx})
+        total += len(truth_ids)
+    return found / total if total else 1.0
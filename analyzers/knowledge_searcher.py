@@ -4,17 +4,80 @@ Searches historical incidents for similar patterns
 NO state management, NO orchestration logic
 """
 
+import copy
 import logging
-from typing import Dict, Any, List
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from config import get_config_value
+from utils.registry import get_knowledge_store, get_service_catalog
+from utils.lru_cache import LRUCache
+from .knowledge_bm25 import tokenize, incident_text
+from .knowledge_store import KnowledgeStore, InMemoryKnowledgeStore, service_key
 
 logger = logging.getLogger("knowledge_searcher")
 
+SCORERS = ('keyword', 'bm25', 'embedding')
+
+# Matches must score above this (every scorer produces 0-1 scores)
+MIN_SIMILARITY = 0.3
+
+# Cosine similarity of hashed n-gram vectors runs lower than the overlap
+# scores, and paraphrases typically land between 0.15 and 0.3
+EMBEDDING_MIN_SIMILARITY = 0.15
+TOP_K = 5
+
+# Keywords kept for an ingested incident (the keyword scorer divides
+# by the keyword count, so long lists would never clear MIN_SIMILARITY)
+MAX_INGESTED_KEYWORDS = 6
+
 
 class KnowledgeSearcher:
     """Pure knowledge search tool - reusable across workflows"""
     
-    def __init__(self):
-        self.past_incidents = self._load_knowledge_base()
+    def __init__(self, past_incidents: Optional[List[Dict[str, Any]]] = None,
+                 store: Optional[KnowledgeStore] = None, scorer: Optional[str] = None,
+                 shard_by_service: Optional[bool] = None):
+        """
+        Initialize knowledge searcher
+        
+        Args:
+            past_incidents: Historical incidents to search in memory
+            store: Knowledge store to search (default: the shared store for
+                KNOWLEDGE_BASE_PATH, else the built-in knowledge base)
+            scorer: 'keyword' (keyword-list overlap), 'bm25' (full-text
+                relevance) or 'embedding' (approximate nearest neighbors
+                of hashed n-gram vectors) (default: KNOWLEDGE_SCORER)
+            shard_by_service: Search the incident's service shard first and
+                the other shards only when it has fewer than TOP_K matches
+                (default: KNOWLEDGE_SHARD_BY_SERVICE)
+        
+        Raises:
+            ValueError: For an unknown scorer
+        """
+        scorer = (scorer or get_config_value("KNOWLEDGE_SCORER", "keyword")).lower()
+        if scorer not in SCORERS:
+            raise ValueError(f"Unknown knowledge scorer: {scorer}")
+        self.scorer = scorer
+        self.nprobe = int(get_config_value("KNOWLEDGE_IVF_NPROBE", 8))
+        if shard_by_service is None:
+            shard_by_service = bool(int(get_config_value("KNOWLEDGE_SHARD_BY_SERVICE", 1)))
+        self.shard_by_service = shard_by_service
+        self.shard_workers = int(get_config_value("KNOWLEDGE_SHARD_WORKERS", 4))
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        
+        cache_size = int(get_config_value("KNOWLEDGE_CACHE_SIZE", 1024))
+        self.cache = LRUCache(cache_size) if cache_size > 0 else None
+        self._cache_version = 0
+        
+        if store is None:
+            if past_incidents is not None:
+                store = InMemoryKnowledgeStore(past_incidents)
+            else:
+                store = get_knowledge_store() or InMemoryKnowledgeStore(self._load_knowledge_base())
+        self.store = store
     
     def search_similar_incidents(self, service: str, description: str) -> Dict[str, Any]:
         """
@@ -27,11 +90,157 @@ class KnowledgeSearcher:
         Returns:
             Dictionary with similar incidents data (NO orchestration fields)
         """
+        service = get_service_catalog().canonical(service)
         logger.info(f"Searching knowledge base for {service}")
         
+        key = self._cache_key(service, description)
+        cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         # Find similar incidents
         similar = self._find_similar(service, description)
         
+        results = self._build_results(similar)
+        if key is not None:
+            self.cache.put(key, copy.deepcopy(results))
+        return results
+    
+    def search_similar_incidents_batch(self, queries: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """
+        Search for similar incidents for many incidents at once
+        
+        With the BM25 scorer all queries are scored in one vectorized pass
+        (per service shard when sharding), which suits replays and alert
+        storms.
+        
+        Args:
+            queries: (service, description) pairs
+            
+        Returns:
+            One result dictionary per query, as from search_similar_incidents()
+        """
+        logger.info(f"Searching knowledge base for {len(queries)} incidents")
+        
+        catalog = get_service_catalog()
+        queries = [(catalog.canonical(service), description) for service, description in queries]
+        keys = [self._cache_key(service, description) for service, description in queries]
+        results: List[Optional[Dict[str, Any]]] = []
+        for key in keys:
+            cached = self.cache.get(key) if key is not None else None
+            results.append(copy.deepcopy(cached) if cached is not None else None)
+        
+        # Search each distinct uncached query once
+        pending: Dict[Any, List[int]] = {}
+        for position, result in enumerate(results):
+            if result is None:
+                pending.setdefault(keys[position] or position, []).append(position)
+        if not pending:
+            return results
+        misses = [queries[positions[0]] for positions in pending.values()]
+        
+        if self.scorer == 'bm25':
+            query_terms = [tokenize(f"{service} {description}") for service, description in misses]
+            if self.shard_by_service:
+                batch = self._search_shards_bm25_batch(misses, query_terms)
+            else:
+                batch = self.store.search_bm25_batch(query_terms, top_k=TOP_K, min_score=MIN_SIMILARITY)
+            found = [self._build_results(self._format_matches(matches)) for matches in batch]
+        else:
+            found = [self._build_results(self._find_similar(service, description)) for service, description in misses]
+        
+        for positions, result in zip(pending.values(), found):
+            if keys[positions[0]] is not None:
+                self.cache.put(keys[positions[0]], copy.deepcopy(result))
+            results[positions[0]] = result
+            for position in positions[1:]:
+                results[position] = copy.deepcopy(result)
+        return results
+    
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Result cache statistics
+        
+        Returns:
+            {'enabled', 'kb_version', plus LRUCache.get_stats() fields when enabled}
+        """
+        stats = {'enabled': self.cache is not None, 'kb_version': self.store.version}
+        if self.cache is not None:
+            stats.update(self.cache.get_stats())
+        return stats
+    
+    def _cache_key(self, service: str, description: str) -> Optional[tuple]:
+        """
+        Result cache key: what the scorer actually reads from the query
+        
+        Queries that differ only in case, spacing, word order (except for
+        embeddings, whose bigrams are order-sensitive) or repeated words
+        share a key. The knowledge base version is part of the key, and
+        a version change clears the cache, so appended incidents are never
+        missing from a cached result.
+        
+        Returns:
+            Key, or None when caching is disabled
+        """
+        if self.cache is None:
+            return None
+        
+        version = self.store.version
+        if version != self._cache_version:
+            self.cache.clear()
+            self._cache_version = version
+        
+        if self.scorer == 'embedding':
+            terms: Any = tuple(tokenize(f"{service} {description}"))
+        elif self.scorer == 'bm25':
+            terms = frozenset(tokenize(f"{service} {description}"))
+        else:
+            terms = frozenset(description.lower().split()) | {service.lower()}
+        return (version, service_key(service), terms)
+    
+    def add_incident(self, state: Any) -> Optional[int]:
+        """
+        Add a resolved incident to the knowledge base
+        
+        The incident becomes searchable immediately (see KnowledgeStore.append).
+        
+        Args:
+            state: Finished IncidentState
+            
+        Returns:
+            Document ID of the new entry, or None if the incident was not
+            resolved or has no identified root cause
+        """
+        report = state.final_report or {}
+        root_cause = (state.root_cause_results or {}).get('root_cause', '')
+        if report.get('status') != 'RESOLVED' or not root_cause:
+            logger.debug(f"Not adding {state.incident_id} to knowledge base: unresolved")
+            return None
+        
+        solution = (state.root_cause_results.get('recommended_solution')
+                    or '; '.join(report.get('actions_taken') or []))
+        
+        # Keywords are the most distinctive words of the description, then the root cause
+        service = get_service_catalog().canonical(state.service)
+        service_terms = set(tokenize(service))
+        keywords: List[str] = []
+        for term in tokenize(f"{state.description} {root_cause}"):
+            if term not in service_terms and term not in keywords and not term.isdigit():
+                keywords.append(term)
+        
+        doc_id = self.store.append({
+            'incident_id': state.incident_id,
+            'service': service,
+            'anomaly': state.description,
+            'root_cause': root_cause,
+            'solution': solution,
+            'keywords': keywords[:MAX_INGESTED_KEYWORDS]
+        })
+        logger.info(f"Added {state.incident_id} to knowledge base as document {doc_id}")
+        return doc_id
+    
+    def _build_results(self, similar: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Assemble the search result dictionary"""
         # Extract recommended solutions
         recommended_solutions = self._extract_solutions(similar)
         
@@ -115,37 +324,127 @@ class KnowledgeSearcher:
         ]
     
     def _find_similar(self, service: str, description: str) -> List[Dict[str, Any]]:
-        """Find similar incidents using keyword matching"""
-        similar = []
+        """Find similar incidents with the configured scorer"""
+        if self.shard_by_service:
+            matches = self._search_shards(service, description)
+        else:
+            matches = self._search_store(self.store, service, description)
+        
+        # Embedding matches carry no terms; report the query words they share
+        query_terms = set(tokenize(f"{service} {description}")) if self.scorer == 'embedding' else None
+        return self._format_matches(matches, query_terms)
+    
+    def _search_store(self, store: KnowledgeStore, service: str,
+                      description: str) -> List[Tuple[int, float, Optional[List[str]]]]:
+        """Top (document ID, score, matched terms) matches within one store or shard"""
+        if self.scorer == 'bm25':
+            return store.search_bm25_batch(
+                [tokenize(f"{service} {description}")], top_k=TOP_K, min_score=MIN_SIMILARITY
+            )[0]
+        
+        if self.scorer == 'embedding':
+            matches = store.search_embedding(
+                f"{service} {description}", top_k=TOP_K, nprobe=self.nprobe, min_score=EMBEDDING_MIN_SIMILARITY
+            )
+            return [(doc_id, score, None) for doc_id, score in matches]
         
         # Extract keywords from current incident
         current_keywords = set(description.lower().split())
         current_keywords.add(service.lower())
         
-        # Match against historical incidents
-        for incident in self.past_incidents:
-            # Calculate similarity score
-            incident_keywords = set(incident['keywords'])
-            matched_keywords = current_keywords & incident_keywords
-            
-            if matched_keywords:
-                similarity_score = len(matched_keywords) / len(incident_keywords)
-                
-                # Include if similarity > 0.3
-                if similarity_score > 0.3:
-                    similar.append({
-                        'incident_id': incident['incident_id'],
-                        'service': incident['service'],
-                        'similarity_score': round(similarity_score, 2),
-                        'root_cause': incident['root_cause'],
-                        'solution': incident['solution'],
-                        'keywords_matched': list(matched_keywords)
-                    })
-        
-        # Sort by similarity score
-        similar.sort(key=lambda x: x['similarity_score'], reverse=True)
-        
-        return similar[:5]  # Return top 5
+        # Score only incidents sharing a keyword; include if similarity > 0.3
+        return store.search_keywords(current_keywords, top_k=TOP_K, min_score=MIN_SIMILARITY)
+    
+    def _search_shards(self, service: str, description: str,
+                       home_matches: Optional[List[tuple]] = None) -> List[tuple]:
+        """
+        Search the service's own shard, fanning out to the rest if needed
+        
+        A full page of matches from the incident's own service is returned
+        as is; otherwise every other shard is searched in parallel and the
+        merged top TOP_K returned (document IDs are the store's).
+        
+        Args:
+            service: Service name
+            description: Incident description
+            home_matches: Matches already found in the service's shard
+        """
+        shards = self.store.shards
+        home = shards.get(service_key(service))
+        matches = []
+        if home is not None:
+            if home_matches is None:
+                home_matches = home.to_parent(self._search_store(home, service, description))
+            matches = home_matches
+            if len(matches) >= TOP_K:
+                return matches
+        
+        others = [shard for shard in shards.values() if shard is not home]
+        if others:
+            executor = self._get_executor()
+            futures = [executor.submit(self._search_store, shard, service, description) for shard in others]
+            for shard, future in zip(others, futures):
+                matches = matches + shard.to_parent(future.result())
+        
+        return sorted(matches, key=lambda match: (-match[1], match[0]))[:TOP_K]
+    
+    def _search_shards_bm25_batch(self, queries: List[Tuple[str, str]],
+                                  query_terms: List[List[str]]) -> List[List[tuple]]:
+        """Batch BM25 over service shards: one pass per shard, fan-out only where needed"""
+        shards = self.store.shards
+        positions_by_service = defaultdict(list)
+        for position, (service, _) in enumerate(queries):
+            positions_by_service[service_key(service)].append(position)
+        
+        home_matches: List[Optional[List[tuple]]] = [None] * len(queries)
+        for key, positions in positions_by_service.items():
+            home = shards.get(key)
+            if home is None:
+                continue
+            batch = home.search_bm25_batch([query_terms[p] for p in positions], top_k=TOP_K,
+                                           min_score=MIN_SIMILARITY)
+            for position, matches in zip(positions, batch):
+                home_matches[position] = home.to_parent(matches)
+        
+        return [
+            matches if matches is not None and len(matches) >= TOP_K
+            else self._search_shards(service, description, matches)
+            for (service, description), matches in zip(queries, home_matches)
+        ]
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for shard fan-out, created on first use"""
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.shard_workers, thread_name_prefix="knowledge-shard"
+                    )
+        return self._executor
+    
+    def _format_matches(self, matches: List[Tuple[int, float, Optional[List[str]]]],
+                        query_terms: Optional[set] = None) -> List[Dict[str, Any]]:
+        """
+        Materialize (document ID, score, matched terms) matches as incident dicts
+        
+        Matched terms given as None are computed as the query terms that
+        occur in the incident's text.
+        """
+        similar = []
+        for doc_id, similarity_score, matched_keywords in matches:
+            incident = self.store.get(doc_id)
+            if matched_keywords is None:
+                matched_keywords = sorted((query_terms or set()) & set(tokenize(incident_text(incident))))
+            similar.append({
+                'incident_id': incident['incident_id'],
+                'service': incident['service'],
+                'similarity_score': round(similarity_score, 2),
+                'root_cause': incident['root_cause'],
+                'solution': incident['solution'],
+                'keywords_matched': matched_keywords
+            })
+        
+        return similar
     
     def _extract_solutions(self, similar_incidents: List[Dict]) -> List[str]:
         """Extract recommended solutions from similar incidents"""
@@ -0,0 +1,864 @@
+"""
+Knowledge Store - Pure Tool
+Storage backends for the historical incident knowledge base
+NO state management, NO orchestration logic
+"""
+
+import os
+import re
+import json
+import mmap
+import pickle
+import zlib
+import sqlite3
+import threading
+import logging
+from array import array
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from config import get_config_value
+from utils.rw_lock import ReadWriteLock
+from utils.registry import get_service_catalog
+from .knowledge_index import InvertedIndex
+from .knowledge_bm25 import BM25Index, incident_text
+from .knowledge_embeddings import EmbeddingIndex, IVFIndex
+
+logger = logging.getLogger("knowledge_store")
+
+# Bump when the sidecar layout changes so stale files are rebuilt
+INDEX_FORMAT_VERSION = 1
+
+INCIDENT_FIELDS = ('incident_id', 'service', 'anomaly', 'root_cause', 'solution', 'keywords')
+
+
+def service_key(service: Optional[str]) -> str:
+    """Shard key of a service name: its canonical service, lowercased"""
+    return get_service_catalog().canonical(service or '').lower()
+
+
+class KnowledgeStore:
+    """
+    Base knowledge store
+    
+    Incidents are addressed by document ID (their position in the store).
+    ``index`` (keyword overlap), ``bm25_index`` (full-text relevance) and
+    ``embedding_index`` (approximate semantic neighbors) hold only what
+    scoring needs; full records are read with ``get`` once
+    an incident is actually returned as a match.
+    
+    Incidents added with ``append`` go into the keyword index directly.
+    The BM25 and embedding indexes are rebuilt only by ``compact``; until
+    then the search methods also score a small delta index over the
+    appended incidents and merge the results. Searches hold ``lock``
+    shared and appends hold it exclusively, so readers never see a
+    half-applied append.
+    
+    ``shards`` splits the store by service into KnowledgeShard views
+    with their own indexes, so a query can score its own service first.
+    """
+    
+    name = "base"
+    
+    def __init__(self):
+        self._index: Optional[InvertedIndex] = None
+        self._bm25_index: Optional[BM25Index] = None
+        self._embedding_index: Optional[EmbeddingIndex] = None
+        self._index_lock = threading.Lock()
+        self.lock = ReadWriteLock()
+        # Bumped on every append so callers can tell their cached view is stale
+        self.version = 0
+        self.compact_after = int(get_config_value("KNOWLEDGE_COMPACT_AFTER", 500))
+        self._appended = 0
+        self._deltas: Dict[str, Tuple[int, Any]] = {}
+        self._compaction: Optional[threading.Thread] = None
+        self._compaction_lock = threading.Lock()
+        self._shards: Optional[Dict[str, "KnowledgeShard"]] = None
+    
+    @property
+    def index(self) -> InvertedIndex:
+        """Keyword index, built or loaded on first use"""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = self._load_index()
+        return self._index
+    
+    @property
+    def bm25_index(self) -> BM25Index:
+        """BM25 index over incident text, built or loaded on first use"""
+        if self._bm25_index is None:
+            with self._index_lock:
+                if self._bm25_index is None:
+                    self._bm25_index = self._load_bm25_index()
+        return self._bm25_index
+    
+    @property
+    def embedding_index(self) -> EmbeddingIndex:
+        """Hashed-embedding IVF index over incident text, built or loaded on first use"""
+        if self._embedding_index is None:
+            with self._index_lock:
+                if self._embedding_index is None:
+                    self._embedding_index = self._load_embedding_index()
+        return self._embedding_index
+    
+    @property
+    def shards(self) -> Dict[str, "KnowledgeShard"]:
+        """Per-service shards keyed by service_key(), partitioned on first use"""
+        if self._shards is None:
+            with self.lock.read():
+                with self._index_lock:
+                    if self._shards is None:
+                        partition = self._load_partition()
+                        self._shards = {key: self._make_shard(key, doc_ids) for key, doc_ids in partition.items()}
+                        logger.debug(f"Partitioned {sum(map(len, partition.values()))} incidents "
+                                     f"into {len(partition)} service shards")
+        return self._shards
+    
+    def __len__(self) -> int:
+        return len(self.index)
+    
+    def search_keywords(self, query_terms: Iterable[str], top_k: int = 5,
+                        min_score: float = 0.3) -> List[Tuple[int, float, List[str]]]:
+        """Keyword-overlap search (see InvertedIndex.search)"""
+        with self.lock.read():
+            return self.index.search(query_terms, top_k, min_score)
+    
+    def search_bm25_batch(self, queries: List[List[str]], top_k: int = 5,
+                          min_score: float = 0.0) -> List[List[Tuple[int, float, List[str]]]]:
+        """BM25 search over compacted and appended incidents (see BM25Index.search_batch)"""
+        with self.lock.read():
+            main = self.bm25_index
+            results = main.search_batch(queries, top_k, min_score)
+            delta = self._delta('bm25', len(main))
+            if delta is not None:
+                pending = delta.search_batch(queries, top_k, min_score)
+                results = [_merge(found, extra, len(main), top_k) for found, extra in zip(results, pending)]
+        return results
+    
+    def search_embedding(self, text: str, top_k: int = 5, nprobe: int = 8,
+                         min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """Nearest-neighbor search over compacted and appended incidents (see EmbeddingIndex.search)"""
+        with self.lock.read():
+            main = self.embedding_index
+            results = main.search(text, top_k, nprobe, min_score)
+            delta = self._delta('embedding', len(main))
+            if delta is not None:
+                # The delta is a single cell, so one probe scans it exactly
+                results = _merge(results, delta.search(text, top_k, 1, min_score), len(main), top_k)
+        return results
+    
+    def append(self, incident: Dict[str, Any]) -> int:
+        """
+        Add an incident to the store and make it searchable
+        
+        The keyword index is updated in place; BM25 and embedding searches
+        pick the incident up through their delta index until the next
+        compaction, which starts in the background once
+        KNOWLEDGE_COMPACT_AFTER incidents have been appended.
+        
+        Args:
+            incident: Incident record with the INCIDENT_FIELDS keys
+        
+        Returns:
+            Document ID of the new incident
+        """
+        record = {field: incident.get(field) for field in INCIDENT_FIELDS}
+        record['keywords'] = list(record['keywords'] or [])
+        
+        with self.lock.write():
+            index = self.index  # Locate existing records before the backend grows
+            doc_id = self._append_record(record)
+            index.add(record['keywords'])
+            due = self._count_append()
+            
+            if self._shards is not None:
+                key = service_key(record['service'])
+                shard = self._shards.get(key)
+                if shard is None:
+                    # Copy on write: fan-out searches iterate the old dict unlocked
+                    shard = self._make_shard(key, array('I'))
+                    self._shards = {**self._shards, key: shard}
+                shard.add(doc_id, record)
+        
+        if due:
+            self.compact_in_background()
+        return doc_id
+    
+    def _count_append(self) -> bool:
+        """Record an append (caller holds the write lock); True when compaction is due"""
+        self.version += 1
+        self._appended += 1
+        return self.compact_after > 0 and self._appended >= self.compact_after
+    
+    def compact(self) -> None:
+        """
+        Fold appended incidents into the BM25 and embedding indexes
+        
+        The new indexes are built without holding the lock, so searches
+        and appends continue meanwhile; only the swap is exclusive.
+        Incidents appended during the rebuild stay in the delta.
+        """
+        with self.lock.read():
+            total = len(self.index)
+            rebuild_bm25 = self._bm25_index is not None and len(self._bm25_index) < total
+            rebuild_embedding = self._embedding_index is not None and len(self._embedding_index) < total
+            appended = self._appended
+        
+        bm25_index = embedding_index = None
+        if rebuild_bm25:
+            bm25_index = self._build_bm25_index(islice(self.iter_records(), total))
+        if rebuild_embedding:
+            embedding_index = self._build_embedding_index(islice(self.iter_records(), total))
+        
+        with self.lock.write():
+            if bm25_index is not None:
+                self._bm25_index = bm25_index
+            if embedding_index is not None:
+                self._embedding_index = embedding_index
+            self._deltas.clear()
+            self._appended -= appended
+            self._persist()
+        logger.info(f"Compacted knowledge base at {total} incidents")
+    
+    def compact_in_background(self) -> bool:
+        """
+        Start compact() on a daemon thread unless one is already running
+        
+        Returns:
+            True if a compaction was started
+        """
+        with self._compaction_lock:
+            if self._compaction is not None and self._compaction.is_alive():
+                return False
+            self._compaction = threading.Thread(
+                target=self._run_compaction, name="knowledge-compaction", daemon=True
+            )
+            self._compaction.start()
+            return True
+    
+    def wait_for_compaction(self, timeout: Optional[float] = None) -> None:
+        """Block until a background compaction (if any) finishes"""
+        compaction = self._compaction
+        if compaction is not None:
+            compaction.join(timeout)
+    
+    def _run_compaction(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Knowledge base compaction failed: {e}")
+    
+    def _delta(self, kind: str, covered: int) -> Optional[Any]:
+        """
+        Index over the incidents appended after the main index was built
+        
+        Rebuilt from the appended records whenever more arrive; callers
+        hold the read lock, so the record count cannot change underneath.
+        """
+        total = len(self.index)
+        if total <= covered:
+            return None
+        cached = self._deltas.get(kind)
+        if cached is not None and cached[0] == total:
+            return cached[1]
+        
+        texts = [incident_text(self.get(doc_id)) for doc_id in range(covered, total)]
+        if kind == 'bm25':
+            delta = BM25Index.build(texts)
+        else:
+            embedder = self.embedding_index.embedder
+            delta = EmbeddingIndex(embedder, IVFIndex.build(embedder.embed_batch(texts), nlist=1))
+        self._deltas[kind] = (total, delta)
+        return delta
+    
+    def _append_record(self, record: Dict[str, Any]) -> int:
+        """Write one record to the backend (caller holds the write lock)"""
+        raise NotImplementedError
+    
+    def _persist(self) -> None:
+        """Save indexes after compaction (caller holds the write lock)"""
+    
+    def _load_partition(self) -> Dict[str, array]:
+        """Document IDs of each service, keyed by service_key()"""
+        partition: Dict[str, array] = {}
+        for doc_id, service in enumerate(self.iter_services()):
+            partition.setdefault(service_key(service), array('I')).append(doc_id)
+        return partition
+    
+    def _make_shard(self, key: str, doc_ids: array) -> "KnowledgeShard":
+        return KnowledgeShard(self, key, doc_ids)
+    
+    def get(self, doc_id: int) -> Dict[str, Any]:
+        """
+        Materialize one incident record
+        
+        Args:
+            doc_id: Document ID from the index
+        
+        Returns:
+            Incident dictionary
+        """
+        raise NotImplementedError
+    
+    def iter_keywords(self) -> Iterator[List[str]]:
+        """Keyword lists of every incident in document order"""
+        raise NotImplementedError
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Every incident record in document order"""
+        raise NotImplementedError
+    
+    def iter_services(self) -> Iterator[str]:
+        """Service name of every incident in document order"""
+        return (record.get('service') for record in self.iter_records())
+    
+    def _load_index(self) -> InvertedIndex:
+        """Build the index from the stored keywords"""
+        index = InvertedIndex.build(self.iter_keywords())
+        index.compact()
+        return index
+    
+    def _load_bm25_index(self) -> BM25Index:
+        """Build the BM25 index from the stored records"""
+        return self._build_bm25_index(self.iter_records())
+    
+    def _load_embedding_index(self) -> EmbeddingIndex:
+        """Embed the stored records and build the IVF index"""
+        return self._build_embedding_index(self.iter_records())
+    
+    @staticmethod
+    def _build_bm25_index(records: Iterable[Dict[str, Any]]) -> BM25Index:
+        return BM25Index.build(incident_text(record) for record in records)
+    
+    @staticmethod
+    def _build_embedding_index(records: Iterable[Dict[str, Any]]) -> EmbeddingIndex:
+        return EmbeddingIndex.build(
+            (incident_text(record) for record in records),
+            dim=int(get_config_value("KNOWLEDGE_EMBEDDING_DIM", 256)),
+            nlist=int(get_config_value("KNOWLEDGE_IVF_NLIST", 0))
+        )
+
+
+class KnowledgeShard(KnowledgeStore):
+    """
+    One service's slice of a knowledge store
+    
+    Local document ``i`` is parent document ``doc_ids[i]``; records are
+    read through the parent and the shard builds its own (much smaller)
+    indexes over them on first use.
+    """
+    
+    name = "shard"
+    
+    def __init__(self, parent: KnowledgeStore, service: str, doc_ids: array):
+        super().__init__()
+        self.parent = parent
+        self.service = service
+        self.doc_ids = doc_ids
+    
+    def get(self, doc_id: int) -> Dict[str, Any]:
+        return self.parent.get(self.doc_ids[doc_id])
+    
+    def iter_keywords(self) -> Iterator[List[str]]:
+        return (record['keywords'] for record in self.iter_records())
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        return (self.parent.get(doc_id) for doc_id in self.doc_ids)
+    
+    def add(self, doc_id: int, record: Dict[str, Any]) -> None:
+        """Add a record the parent stored as doc_id (see KnowledgeStore.append)"""
+        with self.lock.write():
+            index = self.index
+            self.doc_ids.append(doc_id)
+            index.add(record['keywords'])
+            due = self._count_append()
+        if due:
+            self.compact_in_background()
+    
+    def to_parent(self, matches: List[tuple]) -> List[tuple]:
+        """Translate (local document ID, ...) matches to parent document IDs"""
+        return [(self.doc_ids[doc_id],) + tuple(rest) for doc_id, *rest in matches]
+
+
+def _merge(main: List[tuple], delta: List[tuple], offset: int, top_k: int) -> List[tuple]:
+    """Merge main-index matches with delta matches (whose IDs start at offset)"""
+    shifted = [(doc_id + offset,) + tuple(rest) for doc_id, *rest in delta]
+    return sorted(main + shifted, key=lambda match: (-match[1], match[0]))[:top_k]
+
+
+class InMemoryKnowledgeStore(KnowledgeStore):
+    """Knowledge store over a list of incident dicts"""
+    
+    name = "memory"
+    
+    def __init__(self, incidents: List[Dict[str, Any]]):
+        super().__init__()
+        self.incidents = list(incidents)
+    
+    def get(self, doc_id: int) -> Dict[str, Any]:
+        return self.incidents[doc_id]
+    
+    def _append_record(self, record: Dict[str, Any]) -> int:
+        self.incidents.append(record)
+        return len(self.incidents) - 1
+    
+    def iter_keywords(self) -> Iterator[List[str]]:
+        return (incident['keywords'] for incident in self.incidents)
+    
+    def iter_services(self) -> Iterator[str]:
+        return (incident.get('service') for incident in self.incidents)
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        return iter(self.incidents)
+
+
+def _read_pickle(path: str, signature: Any) -> Optional[Dict[str, Any]]:
+    """Load a pickled sidecar if it matches the current signature"""
+    try:
+        with open(path, 'rb') as f:
+            sidecar = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable index {path}: {e}")
+        return None
+    
+    if sidecar.get('signature') != signature:
+        logger.info(f"Index {path} is stale, rebuilding")
+        return None
+    return sidecar
+
+
+def _write_pickle(path: str, sidecar: Dict[str, Any]) -> None:
+    """Atomically replace a pickled sidecar (a read-only location just skips it)"""
+    tmp_path = f"{path}.tmp.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(sidecar, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"Could not write index {path}: {e}")
+
+
+class _PersistedIndexes:
+    """
+    Sidecar persistence for the keyword, BM25 and embedding indexes
+    
+    Mixed into stores whose contents have a cheap ``_signature()``; a
+    sidecar is reused only while its signature matches. Stores set
+    ``index_path``, ``bm25_path`` and ``embedding_prefix``.
+    """
+    
+    def _signature(self) -> tuple:
+        raise NotImplementedError
+    
+    def _load_bm25_index(self) -> BM25Index:
+        signature = str(self._signature())
+        try:
+            with open(self.bm25_path, 'rb') as f:
+                index, extra = BM25Index.load(f)
+            if str(extra.get('signature')) == signature:
+                return index
+            logger.info(f"Index {self.bm25_path} is stale, rebuilding")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index {self.bm25_path}: {e}")
+        
+        index = super()._load_bm25_index()
+        self._save_bm25(index, signature)
+        return index
+    
+    def _save_bm25(self, index: BM25Index, signature: str) -> None:
+        tmp_path = f"{self.bm25_path}.tmp.{os.getpid()}"
+        try:
+            os.makedirs(os.path.dirname(self.bm25_path) or '.', exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                index.save(f, signature=signature)
+            os.replace(tmp_path, self.bm25_path)
+        except OSError as e:
+            logger.warning(f"Could not write index {self.bm25_path}: {e}")
+    
+    def _embedding_signature(self) -> str:
+        # Embedding settings are part of the signature so changing them rebuilds
+        return str(self._signature() + (
+            int(get_config_value("KNOWLEDGE_EMBEDDING_DIM", 256)), int(get_config_value("KNOWLEDGE_IVF_NLIST", 0))
+        ))
+    
+    def _load_embedding_index(self) -> EmbeddingIndex:
+        signature = self._embedding_signature()
+        try:
+            index, meta = EmbeddingIndex.load(self.embedding_prefix)
+            if str(meta.get('signature')) == signature:
+                return index
+            logger.info(f"Index {self.embedding_prefix} is stale, rebuilding")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index {self.embedding_prefix}: {e}")
+        
+        index = super()._load_embedding_index()
+        self._save_embedding(index, signature)
+        return index
+    
+    def _save_embedding(self, index: EmbeddingIndex, signature: str) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.embedding_prefix) or '.', exist_ok=True)
+            index.save(self.embedding_prefix, signature=signature)
+        except OSError as e:
+            logger.warning(f"Could not write index {self.embedding_prefix}: {e}")
+    
+    def _persist_indexes(self, **locator: Any) -> None:
+        """Save every loaded index under the current signature"""
+        # Indexes still missing appended incidents are left stale so they
+        # are rebuilt in full on the next open rather than trusted
+        total = len(self._index)
+        _write_pickle(self.index_path, dict(locator, signature=self._signature(), index=self._index))
+        if self._bm25_index is not None and len(self._bm25_index) == total:
+            self._save_bm25(self._bm25_index, str(self._signature()))
+        if self._embedding_index is not None and len(self._embedding_index) == total:
+            self._save_embedding(self._embedding_index, self._embedding_signature())
+
+
+class _FileKnowledgeStore(_PersistedIndexes, KnowledgeStore):
+    """
+    Knowledge store backed by a file with a prebuilt index sidecar
+    
+    The index (plus whatever the backend needs to locate records) is
+    pickled to ``<path>.idx`` the first time the file is opened and
+    reused until the file's size or modification time changes. The BM25
+    index is saved the same way to ``<path>.bm25.npz`` and the embedding
+    index to ``<path>.emb.ivf.npz`` plus memory-mapped
+    ``<path>.emb.vectors.npy``. The service partition and each shard's
+    indexes go to ``<path>.shards/``. Appends change the file, so
+    compaction rewrites the sidecars under the new signature.
+    """
+    
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+        self.index_path = f"{path}.idx"
+        self.bm25_path = f"{path}.bm25.npz"
+        self.embedding_prefix = f"{path}.emb"
+        self.shard_dir = f"{path}.shards"
+    
+    def _signature(self) -> tuple:
+        """Identity of the current file contents"""
+        stat = os.stat(self.path)
+        return (INDEX_FORMAT_VERSION, self.name, stat.st_size, stat.st_mtime_ns)
+    
+    def _load_index(self) -> InvertedIndex:
+        signature = self._signature()
+        sidecar = _read_pickle(self.index_path, signature)
+        if sidecar is not None:
+            self._restore(sidecar)
+            return sidecar['index']
+        
+        index = InvertedIndex()
+        for keywords in self._scan():
+            index.add(keywords)
+        index.compact()
+        
+        _write_pickle(self.index_path, dict(self._locator(), signature=signature, index=index))
+        logger.info(f"Indexed {len(index)} incidents from {self.path}")
+        return index
+    
+    def _partition_signature(self) -> tuple:
+        """File identity plus the service catalog, which decides the shard keys"""
+        return self._signature() + (get_service_catalog().fingerprint,)
+    
+    def _load_partition(self) -> Dict[str, array]:
+        path = os.path.join(self.shard_dir, "partition.idx")
+        signature = self._partition_signature()
+        sidecar = _read_pickle(path, signature)
+        if sidecar is not None:
+            return sidecar['partition']
+        partition = super()._load_partition()
+        _write_pickle(path, {'signature': signature, 'partition': partition})
+        return partition
+    
+    def _make_shard(self, key: str, doc_ids: array) -> "KnowledgeShard":
+        return _FileKnowledgeShard(self, key, doc_ids)
+    
+    def _persist(self) -> None:
+        self._persist_indexes(**self._locator())
+        if self._shards is not None:
+            shards = self._shards
+            _write_pickle(os.path.join(self.shard_dir, "partition.idx"), {
+                'signature': self._partition_signature(),
+                'partition': {key: shard.doc_ids for key, shard in shards.items()}
+            })
+            # The file signature changed, so re-save shard indexes that are complete
+            for shard in shards.values():
+                if shard._index is not None:
+                    shard._persist()
+    
+    def _scan(self) -> Iterator[List[str]]:
+        """Read keyword lists from the file, recording record locations"""
+        raise NotImplementedError
+    
+    def _locator(self) -> Dict[str, Any]:
+        """Record locations to persist alongside the index"""
+        raise NotImplementedError
+    
+    def _restore(self, sidecar: Dict[str, Any]) -> None:
+        """Restore record locations from a sidecar"""
+        raise NotImplementedError
+    
+    def iter_keywords(self) -> Iterator[List[str]]:
+        return self._scan()
+
+
+class _FileKnowledgeShard(_PersistedIndexes, KnowledgeShard):
+    """Shard of a file-backed store, with its indexes persisted under ``<path>.shards/``"""
+    
+    def __init__(self, parent: "_FileKnowledgeStore", service: str, doc_ids: array):
+        super().__init__(parent, service, doc_ids)
+        # Readable and collision-free file name for any service name
+        slug = re.sub(r'[^a-z0-9]+', '-', service).strip('-') or 'unknown'
+        prefix = os.path.join(parent.shard_dir, f"{slug}-{zlib.crc32(service.encode('utf-8')):08x}")
+        self.index_path = f"{prefix}.idx"
+        self.bm25_path = f"{prefix}.bm25.npz"
+        self.embedding_prefix = f"{prefix}.emb"
+    
+    def _signature(self) -> tuple:
+        return self.parent._partition_signature() + (self.service, len(self.doc_ids))
+    
+    def _load_index(self) -> InvertedIndex:
+        signature = self._signature()
+        sidecar = _read_pickle(self.index_path, signature)
+        if sidecar is not None:
+            return sidecar['index']
+        index = super()._load_index()
+        _write_pickle(self.index_path, {'signature': signature, 'index': index})
+        return index
+    
+    def _persist(self) -> None:
+        self._persist_indexes()
+
+
+class JSONLKnowledgeStore(_FileKnowledgeStore):
+    """
+    Knowledge store over a JSON Lines file (one incident per line)
+    
+    The file is memory-mapped and records are located through a byte
+    offset table, so a lookup decodes a single line.
+    """
+    
+    name = "jsonl"
+    
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._offsets = array('Q')
+        self._mmap: Optional[mmap.mmap] = None
+        self._mmap_lock = threading.Lock()
+    
+    def get(self, doc_id: int) -> Dict[str, Any]:
+        self.index  # Loads the offset table alongside the index
+        start, end = self._offsets[doc_id], self._offsets[doc_id + 1]
+        return json.loads(self._mapped()[start:end])
+    
+    def _mapped(self) -> mmap.mmap:
+        """Read-only memory map of the file, opened on first record read"""
+        # A local, since an append may drop the attribute at any time
+        mapped = self._mmap
+        if mapped is None:
+            with self._mmap_lock:
+                mapped = self._mmap
+                if mapped is None:
+                    with open(self.path, 'rb') as f:
+                        mapped = self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return mapped
+    
+    def _append_record(self, record: Dict[str, Any]) -> int:
+        line = json.dumps(record).encode('utf-8') + b'\n'
+        with open(self.path, 'ab+') as f:
+            start = f.seek(0, os.SEEK_END)
+            if start:
+                f.seek(start - 1)
+                if f.read(1) != b'\n':
+                    # Terminate a final line written without a newline
+                    f.write(b'\n')
+                    start += 1
+            f.write(line)
+        # The map covers the old file length; drop it before publishing the
+        # new offsets, so a read of them maps the grown file. Readers still
+        # holding the old map keep it open until they are done
+        with self._mmap_lock:
+            self._mmap = None
+        self._offsets[-1] = start
+        self._offsets.append(start + len(line))
+        return len(self._offsets) - 2
+    
+    def _scan(self) -> Iterator[List[str]]:
+        offsets = array('Q')
+        position = 0
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    offsets.append(position)
+                    yield json.loads(line).get('keywords', [])
+                position += len(line)
+        # Sentinel end offset so record i spans offsets[i]:offsets[i + 1]
+        offsets.append(position)
+        self._offsets = offsets
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        with open(self.path, 'rb') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    
+    def _locator(self) -> Dict[str, Any]:
+        return {'offsets': self._offsets}
+    
+    def _restore(self, sidecar: Dict[str, Any]) -> None:
+        self._offsets = sidecar['offsets']
+
+
+class SQLiteKnowledgeStore(_FileKnowledgeStore):
+    """
+    Knowledge store over a SQLite database
+    
+    Expects an ``incidents`` table with the INCIDENT_FIELDS columns,
+    ``keywords`` holding a JSON array. Records are fetched by rowid.
+    """
+    
+    name = "sqlite"
+    
+    def __init__(self, path: str):
+        super().__init__(path)
+        self._rowids = array('q')
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+    
+    def get(self, doc_id: int) -> Dict[str, Any]:
+        self.index  # Loads the rowid table alongside the index
+        rowid = self._rowids[doc_id]
+        with self._conn_lock:
+            row = self._connection().execute(
+                f"SELECT {', '.join(INCIDENT_FIELDS)} FROM incidents WHERE rowid = ?", (rowid,)
+            ).fetchone()
+        record = dict(zip(INCIDENT_FIELDS, row))
+        record['keywords'] = json.loads(record['keywords'] or '[]')
+        return record
+    
+    def _append_record(self, record: Dict[str, Any]) -> int:
+        conn = sqlite3.connect(self.path)
+        try:
+            cursor = conn.execute(
+                f"INSERT INTO incidents ({', '.join(INCIDENT_FIELDS)}) VALUES ({', '.join('?' for _ in INCIDENT_FIELDS)})",
+                tuple(json.dumps(record[field]) if field == 'keywords' else record[field] for field in INCIDENT_FIELDS)
+            )
+            conn.commit()
+            self._rowids.append(cursor.lastrowid)
+        finally:
+            conn.close()
+        return len(self._rowids) - 1
+    
+    def _connection(self) -> sqlite3.Connection:
+        """Shared read-only connection (callers hold the connection lock)"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        return self._conn
+    
+    def _scan(self) -> Iterator[List[str]]:
+        rowids = array('q')
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            for rowid, keywords in conn.execute("SELECT rowid, keywords FROM incidents ORDER BY rowid"):
+                rowids.append(rowid)
+                yield json.loads(keywords or '[]')
+        finally:
+            conn.close()
+        self._rowids = rowids
+    
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            for row in conn.execute(f"SELECT {', '.join(INCIDENT_FIELDS)} FROM incidents ORDER BY rowid"):
+                record = dict(zip(INCIDENT_FIELDS, row))
+                record['keywords'] = json.loads(record['keywords'] or '[]')
+                yield record
+        finally:
+            conn.close()
+    
+    def iter_services(self) -> Iterator[str]:
+        conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+        try:
+            for (service,) in conn.execute("SELECT service FROM incidents ORDER BY rowid"):
+                yield service
+        finally:
+            conn.close()
+    
+    def _locator(self) -> Dict[str, Any]:
+        return {'rowids': self._rowids}
+    
+    def _restore(self, sidecar: Dict[str, Any]) -> None:
+        self._rowids = sidecar['rowids']
+
+
+BACKENDS = {
+    'memory': InMemoryKnowledgeStore,
+    'jsonl': JSONLKnowledgeStore,
+    'sqlite': SQLiteKnowledgeStore,
+}
+
+
+def open_knowledge_store(path: Optional[str] = None, backend: Optional[str] = None) -> Optional[KnowledgeStore]:
+    """
+    Open the configured on-disk knowledge base
+    
+    Args:
+        path: Knowledge base file (default: KNOWLEDGE_BASE_PATH)
+        backend: 'jsonl', 'sqlite' or 'auto' to pick by file extension
+            (default: KNOWLEDGE_BASE_BACKEND)
+    
+    Returns:
+        The store, or None when no knowledge base file is configured
+    
+    Raises:
+        ValueError: For an unknown backend
+    """
+    if path is None:
+        path = get_config_value("KNOWLEDGE_BASE_PATH", "")
+    if not path:
+        return None
+    if backend is None:
+        backend = get_config_value("KNOWLEDGE_BASE_BACKEND", "auto")
+    
+    backend = backend.lower()
+    if backend == 'auto':
+        backend = 'sqlite' if path.endswith(('.db', '.sqlite', '.sqlite3')) else 'jsonl'
+    if backend not in ('jsonl', 'sqlite'):
+        raise ValueError(f"Unknown knowledge base backend: {backend}")
+    
+    logger.info(f"Opening {backend} knowledge base: {path}")
+    return BACKENDS[backend](path)
+
+
+def write_jsonl(path: str, incidents: Iterable[Dict[str, Any]]) -> None:
+    """Write incidents to a JSON Lines knowledge base"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for incident in incidents:
+            f.write(json.dumps({field: incident.get(field) for field in INCIDENT_FIELDS}) + '\n')
+
+
+def write_sqlite(path: str, incidents: Iterable[Dict[str, Any]]) -> None:
+    """Write incidents to a SQLite knowledge base (replacing its incidents table)"""
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("DROP TABLE IF EXISTS incidents")
+        conn.execute(f"CREATE TABLE incidents ({', '.join(f'{field} TEXT' for field in INCIDENT_FIELDS)})")
+        conn.executemany(
+            f"INSERT INTO incidents VALUES ({', '.join('?' for _ in INCIDENT_FIELDS)})",
+            (
+                tuple(json.dumps(incident.get(field, [])) if field == 'keywords' else incident.get(field)
+                      for field in INCIDENT_FIELDS)
+                for incident in incidents
+            )
+        )
+        conn.commit()
+    finally:
+        conn.close()
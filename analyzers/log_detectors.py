@@ -0,0 +1,394 @@
+"""
+Log Detectors - Pure Tool
+Streaming anomaly detectors fed one log record at a time
+NO state management, NO orchestration logic
+"""
+
+import re
+import logging
+from array import array
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Sequence, Tuple
+import numpy as np
+from config import get_config_value
+from .log_reader import LogRecord
+
+logger = logging.getLogger("log_detectors")
+
+SEVERITY_ORDER = {'CRITICAL': 0, 'HIGH': 1, 'MEDIUM': 2, 'LOW': 3}
+
+# Example messages are cut to this length in anomaly reports
+MAX_EXAMPLE_CHARS = 200
+
+# Levels whose event rate is watched, and the severity of a spike in each
+RATE_LEVELS = {'CRITICAL': 'CRITICAL', 'ERROR': 'HIGH', 'WARN': 'MEDIUM'}
+
+# Trailing bins a rate needs before it can be judged
+MIN_HISTORY_BINS = 3
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class LogSignature(NamedTuple):
+    """A kind of anomaly and the log text that evidences it"""
+    name: str
+    severity: str
+    pattern: str
+
+
+# Anomaly types match those LogAnalyzer infers from incident descriptions.
+# Patterns are case-insensitive except inside (?-i:...)
+LOG_SIGNATURES = [
+    LogSignature('database_timeout', 'HIGH',
+                 r'\btime(?:d[ -]?)?[ -]?out\b|\bdeadline exceeded\b|\block wait timeout\b'),
+    LogSignature('memory_leak', 'HIGH',
+                 r'\bout ?of ?memory|\boom(?:killer|kill)?\b|\bheap (?:space|exhausted)\b'
+                 r'|\bmemory (?:usage|leak|pressure)\b|\bgc overhead limit\b'),
+    LogSignature('error_spike', 'MEDIUM',
+                 r'(?-i:\b(?:ERROR|CRITICAL)\b)|\bexception\b|\binternal server error\b|\bstatus[=: ]5\d\d\b'),
+    LogSignature('network_issue', 'MEDIUM',
+                 r'\bconnection (?:refused|reset|failed|closed|aborted)\b|\beconn(?:refused|reset)\b'
+                 r'|\bnetwork (?:error|unreachable)\b|\bbroken pipe\b|\bno route to host\b|\bhost unreachable\b'),
+]
+
+
+class CompiledSignatures:
+    """
+    All signatures compiled into one prefilter, plus each on its own
+    
+    The prefilter is the alternation of every signature, case-folded so it
+    runs without IGNORECASE (about twice as fast) over lowercased text and
+    matches a superset of the lines the signatures match. It finds
+    candidate lines in a single pass however many signatures there are;
+    the exact per-signature patterns then run only on those lines.
+    """
+    
+    def __init__(self, signatures: Tuple[LogSignature, ...], as_bytes: bool = False):
+        self.signatures = signatures
+        self.names = [signature.name for signature in signatures]
+        sources = [signature.pattern for signature in signatures]
+        prefilter = '|'.join(f'(?:{_casefold_pattern(source)})' for source in sources)
+        if as_bytes:
+            sources = [source.encode('utf-8') for source in sources]
+            prefilter = prefilter.encode('utf-8')
+        self.prefilter: Pattern = re.compile(prefilter)
+        self.patterns: List[Pattern] = [re.compile(source, re.IGNORECASE) for source in sources]
+    
+    def match_line(self, line) -> List[int]:
+        """Indexes of the signatures a line (bytes when compiled for bytes) matches"""
+        return [i for i, pattern in enumerate(self.patterns) if pattern.search(line)]
+
+
+def _casefold_pattern(pattern: str) -> str:
+    """Pattern for lowercased text: literals lowercased (escapes kept), case-sensitive groups relaxed"""
+    pattern = re.sub(r'\\.|[A-Z]', lambda m: m.group().lower() if len(m.group()) == 1 else m.group(), pattern)
+    return pattern.replace('(?-i:', '(?:')
+
+
+@lru_cache(maxsize=16)
+def _compile(signatures: Tuple[LogSignature, ...], as_bytes: bool) -> CompiledSignatures:
+    return CompiledSignatures(signatures, as_bytes)
+
+
+def compile_signatures(signatures: Optional[Sequence[LogSignature]] = None,
+                       as_bytes: bool = False) -> CompiledSignatures:
+    """
+    Compiled signatures, cached per signature set
+    
+    Args:
+        signatures: Signatures to compile (default: LOG_SIGNATURES)
+        as_bytes: Compile for raw bytes instead of str
+    
+    Returns:
+        CompiledSignatures
+    """
+    return _compile(tuple(signatures if signatures is not None else LOG_SIGNATURES), as_bytes)
+
+
+def format_time_range(first: Optional[datetime], last: Optional[datetime]) -> str:
+    """'HH:MM-HH:MM' of a span (dates included when it crosses midnight)"""
+    if first is None or last is None:
+        return 'unknown'
+    if first.date() != last.date():
+        return f"{first:%Y-%m-%d %H:%M}-{last:%Y-%m-%d %H:%M}"
+    return f"{first:%H:%M}-{last:%H:%M}"
+
+
+class SignatureDetector:
+    """
+    Counts log records matching each anomaly signature - reusable across workflows
+    
+    A signature is reported once at least min_count records match it,
+    with the real count, first and last timestamps and an example.
+    """
+    
+    def __init__(self, signatures: Optional[List[LogSignature]] = None, min_count: Optional[int] = None):
+        """
+        Initialize detector
+        
+        Args:
+            signatures: Signatures to detect (default: LOG_SIGNATURES)
+            min_count: Matches needed to report an anomaly
+                (default: LOG_ANOMALY_MIN_COUNT)
+        """
+        self.signatures = signatures if signatures is not None else LOG_SIGNATURES
+        self.min_count = min_count if min_count is not None else \
+            int(get_config_value("LOG_ANOMALY_MIN_COUNT", 3))
+        self._compiled = compile_signatures(self.signatures)
+        self._matches: Dict[str, Dict[str, Any]] = {}
+    
+    def observe(self, record: LogRecord) -> None:
+        """Count one record against every signature"""
+        text = f"{record.level} {record.message}"
+        # One prefilter search rejects the (usual) line matching nothing
+        if self._compiled.prefilter.search(text.lower()) is None:
+            return
+        for i in self._compiled.match_line(text):
+            self._count(self.signatures[i].name, record)
+    
+    def _count(self, name: str, record: LogRecord) -> None:
+        match = self._matches.get(name)
+        if match is None:
+            match = self._matches[name] = {'count': 0, 'first': None, 'last': None,
+                                           'example': record.message.split('\n', 1)[0][:MAX_EXAMPLE_CHARS],
+                                           'level': record.level}
+        match['count'] += 1
+        timestamp = record.timestamp
+        if timestamp is not None:
+            if match['first'] is None or timestamp < match['first']:
+                match['first'] = timestamp
+            if match['last'] is None or timestamp > match['last']:
+                match['last'] = timestamp
+    
+    def merge(self, other: "SignatureDetector") -> None:
+        """Add the matches another detector (of another part of the logs) counted"""
+        for name, theirs in other._matches.items():
+            mine = self._matches.get(name)
+            if mine is None:
+                self._matches[name] = dict(theirs)
+                continue
+            mine['count'] += theirs['count']
+            if theirs['first'] is not None and (mine['first'] is None or theirs['first'] < mine['first']):
+                mine['first'] = theirs['first']
+                mine['example'] = theirs['example']
+                mine['level'] = theirs['level']
+            if theirs['last'] is not None and (mine['last'] is None or theirs['last'] > mine['last']):
+                mine['last'] = theirs['last']
+    
+    def anomalies(self) -> List[Dict[str, Any]]:
+        """
+        Signatures matched at least min_count times
+        
+        Returns:
+            Anomaly dicts (type, severity, pattern, frequency, time_range,
+            first_seen, last_seen, level), most severe and frequent first
+        """
+        anomalies = []
+        for signature in self.signatures:
+            match = self._matches.get(signature.name)
+            if match is None or match['count'] < self.min_count:
+                continue
+            anomalies.append({
+                'type': signature.name,
+                'severity': signature.severity,
+                'pattern': match['example'],
+                'frequency': match['count'],
+                'time_range': format_time_range(match['first'], match['last']),
+                'first_seen': match['first'].strftime("%Y-%m-%d %H:%M:%S") if match['first'] else None,
+                'last_seen': match['last'].strftime("%Y-%m-%d %H:%M:%S") if match['last'] else None,
+                'level': match['level']
+            })
+        anomalies.sort(key=lambda a: (SEVERITY_ORDER.get(a['severity'], 9), -a['frequency']))
+        return anomalies
+
+
+class RateDetector:
+    """
+    Flags bursts in per-service, per-level event rates - reusable across workflows
+    
+    Records only have their timestamp appended to a typed array per
+    (service, level), so observing stays cheap. anomalies() then bins all
+    of them at once with NumPy and compares each bin to the mean and
+    standard deviation of the history_bins before it (rolling sums via
+    cumsum, so millions of events take milliseconds). A bin is a spike
+    when its z-score reaches z_threshold and it holds at least min_count
+    events; the deviation is floored at the Poisson sqrt(mean), and 1, so
+    a quiet history does not turn a few events into a spike.
+    """
+    
+    def __init__(self, bin_seconds: Optional[float] = None, history_bins: Optional[int] = None,
+                 z_threshold: Optional[float] = None, min_count: Optional[int] = None,
+                 levels: Optional[Dict[str, str]] = None):
+        """
+        Initialize detector
+        
+        Args:
+            bin_seconds: Width of a rate bin (default: LOG_RATE_BIN_SECONDS)
+            history_bins: Trailing bins a bin is compared to
+                (default: LOG_RATE_HISTORY_BINS)
+            z_threshold: z-score that counts as a spike
+                (default: LOG_RATE_Z_THRESHOLD)
+            min_count: Events a spiking bin needs (default: LOG_ANOMALY_MIN_COUNT)
+            levels: Level -> severity of its spikes (default: RATE_LEVELS)
+        """
+        self.bin_seconds = float(bin_seconds if bin_seconds is not None else
+                                 get_config_value("LOG_RATE_BIN_SECONDS", 60))
+        self.history_bins = int(history_bins if history_bins is not None else
+                                get_config_value("LOG_RATE_HISTORY_BINS", 15))
+        self.z_threshold = float(z_threshold if z_threshold is not None else
+                                 get_config_value("LOG_RATE_Z_THRESHOLD", 3.0))
+        self.min_count = int(min_count if min_count is not None else
+                             get_config_value("LOG_ANOMALY_MIN_COUNT", 3))
+        self.levels = levels if levels is not None else RATE_LEVELS
+        self._events: Dict[Tuple[str, str], array] = {}
+        self._first: Optional[float] = None
+        self._last: Optional[float] = None
+    
+    def observe(self, record: LogRecord) -> None:
+        """Note one record's time (records without a timestamp are ignored)"""
+        if record.timestamp is None:
+            return
+        seconds = (record.timestamp - _EPOCH).total_seconds()
+        # Every record extends the span, so quiet levels get zero bins
+        if self._first is None or seconds < self._first:
+            self._first = seconds
+        if self._last is None or seconds > self._last:
+            self._last = seconds
+        if record.level in self.levels:
+            key = (record.service, record.level)
+            events = self._events.get(key)
+            if events is None:
+                events = self._events[key] = array('d')
+            events.append(seconds)
+    
+    def observe_times(self, service: str, level: str, seconds: np.ndarray) -> None:
+        """Note many events of one service and level (seconds since the epoch, naive UTC)"""
+        if len(seconds) == 0:
+            return
+        self.extend(float(seconds.min()), float(seconds.max()))
+        if level in self.levels:
+            events = self._events.setdefault((service, level), array('d'))
+            events.frombytes(np.ascontiguousarray(seconds, dtype=np.float64).tobytes())
+    
+    def merge(self, other: "RateDetector") -> None:
+        """Add the events another detector (of another part of the logs) noted"""
+        for key, events in other._events.items():
+            self._events.setdefault(key, array('d')).extend(events)
+        if other._first is not None:
+            self.extend(other._first, other._last)
+    
+    def extend(self, first: float, last: float) -> None:
+        """Widen the observed span (seconds since the epoch) without adding events"""
+        self._first = first if self._first is None else min(self._first, first)
+        self._last = last if self._last is None else max(self._last, last)
+    
+    def discard_before(self, seconds: float) -> None:
+        """
+        Forget events before a time, so a detector fed forever stays bounded
+        
+        Args:
+            seconds: Seconds since the epoch, naive UTC; the span is cut
+                to start there
+        """
+        for key in list(self._events):
+            times = np.frombuffer(self._events[key], dtype=np.float64)
+            if not len(times) or times.min() >= seconds:
+                continue
+            kept = times[times >= seconds]
+            if len(kept):
+                self._events[key] = array('d', kept.tobytes())
+            else:
+                del self._events[key]
+        if self._first is not None and self._first < seconds:
+            self._first = min(seconds, self._last)
+    
+    def binned(self) -> Tuple[float, Dict[Tuple[str, str], np.ndarray]]:
+        """
+        Event counts per bin
+        
+        Returns:
+            (start of the first bin in seconds since the epoch,
+            {(service, level): counts over the whole observed span})
+        """
+        if self._first is None:
+            return 0.0, {}
+        origin = np.floor(self._first / self.bin_seconds) * self.bin_seconds
+        size = int((self._last - origin) // self.bin_seconds) + 1
+        counts = {}
+        for key, events in self._events.items():
+            bins = ((np.frombuffer(events, dtype=np.float64) - origin) // self.bin_seconds).astype(np.int64)
+            counts[key] = np.bincount(bins, minlength=size)
+        return float(origin), counts
+    
+    def scores(self, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Rolling z-scores of a count series
+        
+        Returns:
+            (z-score of each bin against the history_bins before it,
+            mean of that history); bins with fewer than MIN_HISTORY_BINS
+            of history score 0
+        """
+        values = counts.astype(np.float64)
+        total = np.concatenate(([0.0], np.cumsum(values)))
+        squares = np.concatenate(([0.0], np.cumsum(values * values)))
+        index = np.arange(len(values))
+        lower = np.maximum(index - self.history_bins, 0)
+        history = (index - lower).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = (total[index] - total[lower]) / history
+            variance = (squares[index] - squares[lower]) / history - mean * mean
+        mean = np.nan_to_num(mean)
+        std = np.maximum(np.sqrt(np.maximum(np.nan_to_num(variance), 0.0)), np.maximum(np.sqrt(mean), 1.0))
+        z = (values - mean) / std
+        z[history < MIN_HISTORY_BINS] = 0.0
+        return z, mean
+    
+    def anomalies(self, window_start: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """
+        Rate spikes per service and level
+        
+        Args:
+            window_start: Only report spikes from here on; earlier bins
+                only serve as history (default: report all)
+        
+        Returns:
+            Anomaly dicts (type '<level>_rate_spike', severity, pattern,
+            frequency (events in spiking bins), time_range, first_seen,
+            last_seen, level, service, peak_rate, baseline_rate, z_score),
+            most severe and strongest first
+        """
+        origin, counts = self.binned()
+        first_bin = 0
+        if window_start is not None:
+            first_bin = max(0, int(((window_start - _EPOCH).total_seconds() - origin) // self.bin_seconds))
+        
+        anomalies = []
+        for (service, level), series in counts.items():
+            z, mean = self.scores(series)
+            spikes = np.flatnonzero((z >= self.z_threshold) & (series >= self.min_count))
+            spikes = spikes[spikes >= first_bin]
+            if len(spikes) == 0:
+                continue
+            peak = spikes[np.argmax(z[spikes])]
+            first = _EPOCH + timedelta(seconds=origin + spikes[0] * self.bin_seconds)
+            last = _EPOCH + timedelta(seconds=origin + (spikes[-1] + 1) * self.bin_seconds)
+            per_minute = 60.0 / self.bin_seconds
+            anomalies.append({
+                'type': f"{level.lower()}_rate_spike",
+                'severity': self.levels[level],
+                'pattern': f"{level} rate {series[peak] * per_minute:.0f}/min "
+                           f"vs {mean[peak] * per_minute:.1f}/min baseline",
+                'frequency': int(series[spikes].sum()),
+                'time_range': format_time_range(first, last),
+                'first_seen': first.strftime("%Y-%m-%d %H:%M:%S"),
+                'last_seen': last.strftime("%Y-%m-%d %H:%M:%S"),
+                'level': level,
+                'service': service,
+                'peak_rate': round(float(series[peak] * per_minute), 2),
+                'baseline_rate': round(float(mean[peak] * per_minute), 2),
+                'z_score': round(float(z[peak]), 2)
+            })
+        anomalies.sort(key=lambda a: (SEVERITY_ORDER.get(a['severity'], 9), -a['z_score']))
+        return anomalies
@@ -0,0 +1,295 @@
+"""
+Log Follower - Pure Tool
+Tails log files and keeps incremental detectors over what is appended
+NO state management, NO orchestration logic
+"""
+
+import os
+import logging
+import numpy as np
+from datetime import datetime, timedelta
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from config import get_config_value
+from utils.registry import get_service_catalog
+from .log_reader import (LogReader, LogRecord, MAX_LINE_BYTES, READ_BUFFER_BYTES, _split_lines,
+                         is_compressed, iter_log_files, parse_log_sources, parse_records)
+from .log_detectors import (LogSignature, LOG_SIGNATURES, MAX_EXAMPLE_CHARS, SEVERITY_ORDER,
+                            RateDetector, compile_signatures)
+
+logger = logging.getLogger("log_follower")
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class _Tail:
+    """An open log file and how far it has been read"""
+    
+    __slots__ = ('path', 'service', 'handle', 'position')
+    
+    def __init__(self, path: str, service: str, handle: BinaryIO, position: int):
+        self.path = path
+        self.service = service
+        self.handle = handle
+        self.position = position  # start of the first line not yet read
+
+
+class LogFollower:
+    """
+    Tails configured log sources like ``tail -F`` - reusable across workflows
+    
+    Files are followed by identity (device and inode) rather than name,
+    and every poll reads only complete lines appended since the last one,
+    through the handle kept open:
+    
+    - a file renamed away (rotation) is read to its end and then closed,
+      while the new file at its name (or a file newly created in a watched
+      directory) is read from the start;
+    - a file shorter than what was read (copytruncate) is read again from
+      the start.
+    
+    Compressed files are finished rotations and are not followed.
+    """
+    
+    def __init__(self, sources: Union[str, Iterable[str]], since: Optional[datetime] = None):
+        """
+        Initialize follower (files are opened by the first poll)
+        
+        Args:
+            sources: Log source entries (see parse_log_sources)
+            since: Files found by the first poll are read from their first
+                line at or after this time (through time indexes, see
+                LogReader) so detectors get history; default: from their end
+        """
+        self.sources = parse_log_sources(sources)
+        self.since = since
+        self._tails: Dict[Tuple[int, int], _Tail] = {}
+        self._started = False
+    
+    def __enter__(self) -> "LogFollower":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Close every followed file"""
+        for tail in self._tails.values():
+            tail.handle.close()
+        self._tails.clear()
+    
+    def poll(self) -> Iterator[LogRecord]:
+        """
+        Records appended to the sources since the last poll
+        
+        Returns:
+            Iterator of LogRecord; consume it fully, as read positions
+            advance only once a file's new lines have all been yielded.
+            A partial last line is left for the next poll.
+        """
+        found = self._discover()
+        for identity, tail in list(self._tails.items()):
+            if identity not in found:
+                # Rotated out of the sources or deleted: read what is left, then let go
+                yield from self._read(tail, final=True)
+                tail.handle.close()
+                del self._tails[identity]
+                continue
+            size = os.fstat(tail.handle.fileno()).st_size
+            if size < tail.position:
+                logger.info(f"Log file {tail.path} was truncated, reading from the start")
+                tail.position = 0
+            yield from self._read(tail)
+    
+    def _discover(self) -> Dict[Tuple[int, int], str]:
+        """Open files new to the sources; returns identity -> path of every file found"""
+        first_poll = not self._started
+        self._started = True
+        starts = None
+        found = {}
+        for service, path in self.sources:
+            if not os.path.exists(path):
+                continue
+            for file_path in iter_log_files(path):
+                if is_compressed(file_path):
+                    continue
+                try:
+                    status = os.stat(file_path)
+                except OSError:
+                    continue
+                identity = (status.st_dev, status.st_ino)
+                found[identity] = file_path
+                tail = self._tails.get(identity)
+                if tail is not None:
+                    tail.path = file_path
+                    continue
+                if first_poll and self.since is not None and starts is None:
+                    starts = self._start_offsets()
+                try:
+                    self._open(identity, file_path, service, status.st_size,
+                               first_poll, starts or {})
+                except OSError as e:
+                    logger.error(f"Could not follow log file {file_path}: {e}")
+                    del found[identity]
+        return found
+    
+    def _start_offsets(self) -> Dict[str, int]:
+        """Offset of the first line at or after `since` in every file"""
+        reader = LogReader([f"{service}={path}" if service else path for service, path in self.sources],
+                           time_index=bool(int(get_config_value("LOG_TIME_INDEX", 1))))
+        return {chunk.path: chunk.start for chunk in reader.chunks(self.since)}
+    
+    def _open(self, identity: Tuple[int, int], path: str, service: str, size: int,
+              first_poll: bool, starts: Dict[str, int]) -> None:
+        handle = open(path, 'rb', buffering=READ_BUFFER_BYTES)
+        if not first_poll:
+            position = 0
+        elif self.since is not None:
+            position = starts.get(path, 0)
+        else:
+            position = self._last_line_start(handle, size)
+        self._tails[identity] = _Tail(path, service, handle, position)
+        logger.info(f"Following log file {path} from byte {position}")
+    
+    @staticmethod
+    def _last_line_start(handle: BinaryIO, size: int) -> int:
+        """End of the file, or the start of a last line still being written"""
+        step = min(size, MAX_LINE_BYTES)
+        handle.seek(size - step)
+        newline = handle.read(step).rfind(b'\n')
+        return size - step + newline + 1 if newline >= 0 else size
+    
+    def _read(self, tail: _Tail, final: bool = False) -> Iterator[LogRecord]:
+        yield from parse_records(self._lines(tail, final), tail.path, tail.service)
+    
+    def _lines(self, tail: _Tail, final: bool) -> Iterator[Tuple[int, str]]:
+        """Complete lines from the tail's position (the partial last one too when final)"""
+        f = tail.handle
+        f.seek(tail.position)
+        pending = None
+        for item in _split_lines(f, tail.position):
+            if pending is not None:
+                yield pending[0], pending[1].decode('utf-8', 'replace').rstrip('\r')
+            pending = item
+        end = f.tell()
+        if pending is not None:
+            f.seek(end - 1)
+            if not final and f.read(1) != b'\n':
+                # Still being written; read it whole next time
+                tail.position = pending[0]
+                return
+            yield pending[0], pending[1].decode('utf-8', 'replace').rstrip('\r')
+        tail.position = end
+
+
+class LogMonitor:
+    """
+    Incremental rate detectors over followed logs - reusable across workflows
+    
+    Records are fed as they are tailed into two RateDetectors: one per
+    (service, level) and one per (service, signature) for the anomaly
+    signatures. Only the rate history (history_bins of bin_seconds) is
+    kept, so memory stays bounded however long logs are followed. check()
+    reports spikes in the latest bins, at most one alert per service per
+    cooldown; time is the log's own (the latest timestamp seen).
+    """
+    
+    def __init__(self, signatures: Optional[List[LogSignature]] = None,
+                 cooldown_seconds: Optional[float] = None, **rate_options: Any):
+        """
+        Initialize monitor
+        
+        Args:
+            signatures: Signatures whose rates are watched (default: LOG_SIGNATURES)
+            cooldown_seconds: Quiet time after a service's alert
+                (default: LOG_FOLLOW_COOLDOWN_SECONDS)
+            **rate_options: RateDetector options (bin_seconds,
+                history_bins, z_threshold, min_count)
+        """
+        self.signatures = signatures if signatures is not None else LOG_SIGNATURES
+        self.cooldown_seconds = float(cooldown_seconds if cooldown_seconds is not None else
+                                      get_config_value("LOG_FOLLOW_COOLDOWN_SECONDS", 600))
+        self.level_rates = RateDetector(**rate_options)
+        self.signature_rates = RateDetector(levels={s.name: s.severity for s in self.signatures},
+                                            **rate_options)
+        self._compiled = compile_signatures(self.signatures)
+        self._matches: Dict[Tuple[str, str], List[float]] = {}
+        self._examples: Dict[Tuple[str, str], str] = {}
+        self._alerted: Dict[str, float] = {}
+        self._first: Optional[float] = None
+        self._latest: Optional[float] = None
+    
+    @property
+    def history_seconds(self) -> float:
+        """Span of logs the detectors compare the latest bins to"""
+        return self.level_rates.history_bins * self.level_rates.bin_seconds
+    
+    def observe(self, record: LogRecord) -> None:
+        """Feed one record (records without a timestamp are ignored)"""
+        if record.timestamp is None:
+            return
+        seconds = (record.timestamp - _EPOCH).total_seconds()
+        if self._first is None or seconds < self._first:
+            self._first = seconds
+        if self._latest is None or seconds > self._latest:
+            self._latest = seconds
+        self.level_rates.observe(record)
+        if record.level in self.level_rates.levels:
+            self._examples[record.service, record.level] = record.message
+        
+        text = f"{record.level} {record.message}"
+        if self._compiled.prefilter.search(text.lower()) is None:
+            return
+        for i in self._compiled.match_line(text):
+            key = (record.service, self.signatures[i].name)
+            self._matches.setdefault(key, []).append(seconds)
+            self._examples[key] = record.message
+    
+    def check(self) -> List[Dict[str, Any]]:
+        """
+        Alerts for rate spikes in the latest bins
+        
+        Returns:
+            Anomaly dicts of RateDetector.anomalies(), the most severe
+            and strongest per service not in cooldown, each with 'example' (a message of
+            the spiking kind) and 'alert' (text for the incident pipeline)
+        """
+        if self._latest is None:
+            return []
+        rates = self.signature_rates
+        for (service, name), times in self._matches.items():
+            rates.observe_times(service, name, np.array(times))
+        self._matches.clear()
+        # Signatures keep quiet stretches as zero bins like levels do
+        rates.extend(self._first, self._latest)
+        
+        latest = self._latest
+        # The bins checked need history_bins before them
+        cutoff = latest - (self.level_rates.history_bins + 2) * self.level_rates.bin_seconds
+        for detector in (self.level_rates, rates):
+            detector.discard_before(cutoff)
+        self._first = max(self._first, cutoff)
+        
+        window_start = _EPOCH + timedelta(seconds=latest - self.level_rates.bin_seconds)
+        anomalies = self.level_rates.anomalies(window_start) + rates.anomalies(window_start)
+        anomalies.sort(key=lambda a: (SEVERITY_ORDER.get(a['severity'], 9), -a['z_score']))
+        alerts = []
+        for anomaly in anomalies:
+            service = anomaly['service']
+            last = self._alerted.get(service)
+            if last is not None and latest - last < self.cooldown_seconds:
+                continue
+            self._alerted[service] = latest
+            kind = anomaly['level']
+            example = self._examples.get((service, kind), '').split('\n', 1)[0][:MAX_EXAMPLE_CHARS]
+            anomaly['example'] = example
+            anomaly['alert'] = self._alert_text(anomaly, example)
+            alerts.append(anomaly)
+        return alerts
+    
+    @staticmethod
+    def _alert_text(anomaly: Dict[str, Any], example: str) -> str:
+        service = get_service_catalog().canonical(anomaly['service']) or 'Unknown service'
+        text = (f"{service}: {anomaly['type'].replace('_', ' ')} "
+                f"({anomaly['peak_rate']:.0f}/min vs {anomaly['baseline_rate']:.1f}/min baseline) "
+                f"at {anomaly['time_range']}")
+        return f"{text} - {example}" if example else text
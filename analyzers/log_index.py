@@ -0,0 +1,224 @@
+"""
+Log Index - Pure Tool
+Sparse timestamp -> byte offset index for seeking into large log files
+NO state management, NO orchestration logic
+"""
+
+import os
+import re
+import pickle
+import zlib
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Optional, Tuple
+from .log_reader import TIMESTAMP_PATTERN, read_lines, parse_line, parse_timestamp
+
+logger = logging.getLogger("log_index")
+
+# Bump when the sidecar layout changes so stale files are rebuilt
+TSIDX_FORMAT_VERSION = 1
+
+# A new block starts at the first timestamped line this far past the last
+DEFAULT_STRIDE_BYTES = 256 * 1024
+
+# Bytes at the start of the file that identify it across appends
+HEAD_BYTES = 4096
+
+_TIMESTAMP_RE = re.compile(TIMESTAMP_PATTERN)
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def line_timestamp(line: str) -> Optional[datetime]:
+    """Timestamp a log line starts with (JSON lines included), or None"""
+    if line.startswith('{'):
+        record = parse_line(line)
+        return record.timestamp if record is not None else None
+    match = _TIMESTAMP_RE.match(line)
+    return parse_timestamp(match.group()) if match else None
+
+
+class TimestampIndex:
+    """
+    Sparse timestamp index of one log file - reusable across workflows
+    
+    The file is split into blocks of about stride bytes, each starting at
+    a timestamped line (so stack traces stay with their entry), and the
+    earliest and latest timestamp in every block is kept. Lines need not
+    be in order: a time window maps to the blocks whose span overlaps it,
+    found by binary search over the running maximum and minimum.
+    
+    The index is saved to ``<path>.tsidx`` and extended incrementally: an
+    update only reads bytes appended since the last one. A truncated or
+    rotated file (its head changed) is re-indexed from the start.
+    """
+    
+    def __init__(self, path: str, stride: Optional[int] = None):
+        """
+        Initialize index (call update() to load or build it)
+        
+        Args:
+            path: Log file path
+            stride: Approximate block size in bytes (default: DEFAULT_STRIDE_BYTES)
+        """
+        self.path = path
+        self.index_path = f"{path}.tsidx"
+        self.stride = stride or DEFAULT_STRIDE_BYTES
+        self._reset()
+    
+    def _reset(self) -> None:
+        self.offsets = array('q')    # block start offsets
+        self.min_times = array('d')  # seconds since the epoch, naive UTC
+        self.max_times = array('d')
+        self.indexed_to = 0          # end of the last complete line indexed
+        self.head_crc = 0
+        self._bounds = None
+    
+    def __len__(self) -> int:
+        return len(self.offsets)
+    
+    def update(self, save: bool = True) -> "TimestampIndex":
+        """
+        Load the sidecar and index lines appended since it was written
+        
+        Args:
+            save: Write the sidecar back when new lines were indexed
+        
+        Returns:
+            self
+        """
+        if not self.offsets and self.indexed_to == 0:
+            self._load()
+        size = os.path.getsize(self.path)
+        if self.indexed_to and (size < self.indexed_to or self._head_crc(self.indexed_to) != self.head_crc):
+            logger.info(f"Log file {self.path} was truncated or rotated, re-indexing")
+            self._reset()
+        if size > self.indexed_to:
+            before = self.indexed_to
+            self._extend()
+            if save and self.indexed_to > before:
+                self._save()
+        return self
+    
+    def byte_range(self, start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> Tuple[int, Optional[int]]:
+        """
+        Byte range holding every line timestamped within a window
+        
+        Args:
+            start: Earliest timestamp wanted, naive UTC (default: unbounded)
+            end: Latest timestamp wanted, naive UTC (default: unbounded)
+        
+        Returns:
+            (start offset, end offset or None for EOF), for read_lines();
+            bytes past the indexed part of the file are always included
+        """
+        count = len(self.offsets)
+        if count == 0:
+            return 0, None
+        if self._bounds is None:
+            # Both are non-decreasing, so they can be binary-searched
+            self._bounds = (self._running(self.max_times, max),
+                            self._running(self.min_times, min, reverse=True))
+        running_max, running_min = self._bounds
+        # First block reaching start, and the first from which all are after end
+        first = bisect_left(running_max, _seconds(start)) if start is not None else 0
+        last = bisect_right(running_min, _seconds(end)) if end is not None else count
+        if first >= last:
+            # Nothing indexed is in the window; only unindexed bytes can be
+            return self.indexed_to, None
+        end_offset = self.offsets[last] if last < count else None
+        return self.offsets[first], end_offset
+    
+    @staticmethod
+    def _running(values: array, pick, reverse: bool = False) -> array:
+        result = array('d', values)
+        indexes = range(len(result) - 2, -1, -1) if reverse else range(1, len(result))
+        step = 1 if reverse else -1
+        for i in indexes:
+            result[i] = pick(result[i], result[i + step])
+        return result
+    
+    def _extend(self) -> None:
+        """Index complete lines from indexed_to to the end of the file"""
+        # A partial last line is still being written; the next update reads it
+        end = self._complete_end()
+        offsets, min_times, max_times = self.offsets, self.min_times, self.max_times
+        next_block = offsets[-1] + self.stride if offsets else 0
+        for offset, line in read_lines(self.path, self.indexed_to, end):
+            timestamp = line_timestamp(line)
+            if timestamp is None:
+                continue
+            seconds = _seconds(timestamp)
+            if offset >= next_block:
+                offsets.append(offset)
+                min_times.append(seconds)
+                max_times.append(seconds)
+                next_block = offset + self.stride
+            elif offsets:
+                if seconds < min_times[-1]:
+                    min_times[-1] = seconds
+                if seconds > max_times[-1]:
+                    max_times[-1] = seconds
+        self.indexed_to = end
+        self.head_crc = self._head_crc(end)
+        self._bounds = None
+    
+    def _complete_end(self) -> int:
+        """Offset just past the last newline at or before the end of the file"""
+        size = os.path.getsize(self.path)
+        with open(self.path, 'rb') as f:
+            position = size
+            while position > self.indexed_to:
+                step = min(65536, position - self.indexed_to)
+                f.seek(position - step)
+                newline = f.read(step).rfind(b'\n')
+                if newline >= 0:
+                    return position - step + newline + 1
+                position -= step
+        return self.indexed_to
+    
+    def _head_crc(self, indexed_to: int) -> int:
+        with open(self.path, 'rb') as f:
+            return zlib.crc32(f.read(min(HEAD_BYTES, indexed_to)))
+    
+    def _signature(self) -> tuple:
+        return (TSIDX_FORMAT_VERSION, self.stride)
+    
+    def _load(self) -> None:
+        try:
+            with open(self.index_path, 'rb') as f:
+                sidecar = pickle.load(f)
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable index {self.index_path}: {e}")
+            return
+        if sidecar.get('signature') != self._signature():
+            logger.info(f"Index {self.index_path} is stale, rebuilding")
+            return
+        self.offsets = sidecar['offsets']
+        self.min_times = sidecar['min_times']
+        self.max_times = sidecar['max_times']
+        self.indexed_to = sidecar['indexed_to']
+        self.head_crc = sidecar['head_crc']
+        self._bounds = None
+    
+    def _save(self) -> None:
+        """Atomically replace the sidecar (a read-only location just skips it)"""
+        tmp_path = f"{self.index_path}.tmp.{os.getpid()}"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump({'signature': self._signature(), 'offsets': self.offsets,
+                             'min_times': self.min_times, 'max_times': self.max_times,
+                             'indexed_to': self.indexed_to, 'head_crc': self.head_crc},
+                            f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not write index {self.index_path}: {e}")
+
+
+def _seconds(timestamp: datetime) -> float:
+    return (timestamp - _EPOCH).total_seconds()
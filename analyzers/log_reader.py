@@ -0,0 +1,516 @@
+"""
+Log Reader - Pure Tool
+Streams parsed records out of local log files with bounded memory
+NO state management, NO orchestration logic
+"""
+
+import os
+import re
+import bz2
+import gzip
+import json
+import lzma
+import zlib
+import logging
+import threading
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+from utils.registry import get_service_catalog
+
+logger = logging.getLogger("log_reader")
+
+# Level names as written in logs -> the levels records carry
+LEVELS = {
+    'TRACE': 'DEBUG', 'DEBUG': 'DEBUG',
+    'INFO': 'INFO', 'NOTICE': 'INFO',
+    'WARN': 'WARN', 'WARNING': 'WARN',
+    'ERR': 'ERROR', 'ERROR': 'ERROR', 'SEVERE': 'ERROR',
+    'CRIT': 'CRITICAL', 'CRITICAL': 'CRITICAL', 'FATAL': 'CRITICAL',
+}
+
+# File read buffer; lines are decoded one at a time out of it
+READ_BUFFER_BYTES = 1 << 20
+
+# Longer lines are cut here and the rest of the line is skipped
+MAX_LINE_BYTES = 64 * 1024
+
+# Continuation lines (stack traces) are appended to their record up to this
+MAX_MESSAGE_CHARS = 8192
+
+# Files with these suffixes in a log directory are not logs
+SKIPPED_SUFFIXES = ('.idx', '.tsidx', '.pos')
+
+# Decompressors of rotated logs, by file suffix
+_DECOMPRESSORS = {'.gz': gzip.open, '.bz2': bz2.open, '.xz': lzma.open}
+
+# What a damaged or truncated compressed file raises on read
+DECOMPRESSION_ERRORS = (EOFError, zlib.error, lzma.LZMAError)
+
+# Files smaller than this are read whole rather than through a time index
+INDEX_MIN_BYTES = 1 << 20
+
+# ISO-8601 timestamp as it starts a log line
+TIMESTAMP_PATTERN = r'\d{4}-\d\d-\d\d[T ]\d\d:\d\d:\d\d(?:[.,]\d+)?(?:Z|[+-]\d\d:?\d\d)?'
+
+# "<timestamp> <LEVEL> [<service>] <message>"; every part is optional and a
+# line with neither timestamp nor level continues the previous record
+_LINE_RE = re.compile(
+    r'(?:(?P<ts>' + TIMESTAMP_PATTERN + r')(?:\s+|$))?'
+    r'(?:\[?(?P<level>' + '|'.join(sorted(LEVELS, key=len, reverse=True)) + r')\]?:?(?:\s+|$))?'
+    r'(?:\[(?P<service>[^\]]{1,64})\]:?\s*)?'
+    r'(?P<message>.*)',
+    re.DOTALL
+)
+
+_JSON_FIELDS = {
+    'timestamp': ('timestamp', '@timestamp', 'time', 'ts'),
+    'level': ('level', 'severity', 'lvl'),
+    'service': ('service', 'app'),
+    'message': ('message', 'msg'),
+}
+
+
+class LogChunk(NamedTuple):
+    """A byte range of one log file, analyzable on its own"""
+    service: str
+    path: str
+    start: int
+    end: Optional[int]
+
+
+class LogRecord(NamedTuple):
+    """One parsed log entry"""
+    timestamp: Optional[datetime]
+    level: str
+    service: str
+    message: str
+    source: str
+    offset: int
+
+
+def parse_log_sources(spec: Union[str, Iterable[str], None]) -> List[Tuple[str, str]]:
+    """
+    Parse log source entries
+    
+    Args:
+        spec: Comma-separated string or list of entries, each a file or
+            directory path optionally prefixed with "<service>=" to
+            attribute its untagged lines to that service
+    
+    Returns:
+        List of (service or '', path)
+    """
+    entries = spec.split(',') if isinstance(spec, str) else list(spec or [])
+    sources = []
+    for entry in entries:
+        entry = entry.strip()
+        if not entry:
+            continue
+        service, sep, path = entry.partition('=')
+        sources.append((service.strip(), path.strip()) if sep else ('', entry))
+    return sources
+
+
+def iter_log_files(path: str) -> Iterator[str]:
+    """
+    Log files under a path, in name order
+    
+    Args:
+        path: A log file, or a directory searched recursively (hidden
+            files and index sidecars are skipped)
+    
+    Returns:
+        Iterator of file paths
+    """
+    if not os.path.isdir(path):
+        yield path
+        return
+    for root, dirs, files in os.walk(path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            if not name.startswith('.') and not name.endswith(SKIPPED_SUFFIXES):
+                yield os.path.join(root, name)
+
+
+def is_compressed(path: str) -> bool:
+    """Whether a log file is read through a decompressor (by its suffix)"""
+    return os.path.splitext(path)[1].lower() in _DECOMPRESSORS
+
+
+def open_log(path: str) -> BinaryIO:
+    """
+    Open a log file for binary reading
+    
+    .gz, .bz2 and .xz files are decompressed on the fly with the stdlib
+    codecs, so rotated logs need no temporary copy; byte offsets then
+    count decompressed bytes. Other files are opened with a
+    READ_BUFFER_BYTES buffer.
+    """
+    opener = _DECOMPRESSORS.get(os.path.splitext(path)[1].lower())
+    if opener is not None:
+        return opener(path, 'rb')
+    return open(path, 'rb', buffering=READ_BUFFER_BYTES)
+
+
+def read_lines(path: str, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Stream lines of a file without loading it
+    
+    A line belongs to the byte range holding its first byte, so adjacent
+    ranges together yield every line exactly once. Compressed files are
+    decompressed as they are read (see open_log); seeking into one means
+    decompressing up to the offset, so they are best read whole.
+    
+    Args:
+        path: Log file path
+        start: Byte offset to start at; a partial first line is skipped
+        end: Byte offset of the first line start not to read (default: EOF)
+    
+    Returns:
+        Iterator of (byte offset of the line, line without its newline)
+    """
+    with open_log(path) as f:
+        offset = start
+        if start > 0:
+            f.seek(start - 1)
+            offset = start - 1 + len(f.readline())
+        for line_offset, raw in _split_lines(f, offset):
+            if end is not None and line_offset >= end:
+                return
+            yield line_offset, raw.decode('utf-8', 'replace').rstrip('\r')
+
+
+def _split_lines(f: BinaryIO, offset: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    (offset, line) of every line in a stream, read in READ_BUFFER_BYTES blocks
+    
+    Splitting whole blocks is faster than readline(), most of all through
+    a decompressor. Lines are cut at MAX_LINE_BYTES and the rest of such a
+    line is skipped without being held in memory.
+    """
+    carry = b''
+    skipped = 0  # bytes of an over-long line already yielded, while skipping its rest
+    # read1() returns what one underlying read gives, so a truncated
+    # compressed file still yields everything before the damage
+    for block in iter(lambda: f.read1(READ_BUFFER_BYTES), b''):
+        if skipped:
+            newline = block.find(b'\n')
+            if newline < 0:
+                skipped += len(block)
+                continue
+            offset += skipped + newline + 1
+            skipped = 0
+            block = block[newline + 1:]
+        elif carry:
+            block = carry + block
+        lines = block.split(b'\n')
+        carry = lines.pop()
+        for line in lines:
+            yield offset, line[:MAX_LINE_BYTES]
+            offset += len(line) + 1
+        if len(carry) >= MAX_LINE_BYTES:
+            yield offset, carry[:MAX_LINE_BYTES]
+            skipped = len(carry)
+            carry = b''
+    if carry:
+        yield offset, carry
+
+
+def parse_timestamp(text: str) -> Optional[datetime]:
+    """ISO-8601 timestamp as naive UTC (naive input is taken as-is), or None"""
+    try:
+        timestamp = datetime.fromisoformat(text.replace(',', '.'))
+    except ValueError:
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+def parse_line(line: str, source: str = '', offset: int = 0, service: str = '') -> Optional[LogRecord]:
+    """
+    Parse one log line
+    
+    Args:
+        line: Line text without its newline
+        source: File the line came from
+        offset: Byte offset of the line
+        service: Service to use when the line does not name one
+    
+    Returns:
+        LogRecord, or None when the line does not start a new entry
+        (no timestamp or level: a continuation such as a stack frame)
+    """
+    if line.startswith('{'):
+        record = _parse_json_line(line, source, offset, service)
+        if record is not None:
+            return record
+    
+    ts, level, named, message = _LINE_RE.match(line).groups()
+    if ts is None and level is None:
+        return None
+    # Positional construction: this runs once per log line
+    return LogRecord(parse_timestamp(ts) if ts else None, LEVELS[level] if level else 'INFO',
+                     named or service, message, source, offset)
+
+
+def _parse_json_line(line: str, source: str, offset: int, service: str) -> Optional[LogRecord]:
+    """Structured (JSON lines) log entry, or None if the line is not one"""
+    try:
+        entry = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(entry, dict):
+        return None
+    fields = {name: next((entry[key] for key in keys if key in entry), None)
+              for name, keys in _JSON_FIELDS.items()}
+    level = str(fields['level'] or 'INFO').upper()
+    return LogRecord(
+        timestamp=parse_timestamp(str(fields['timestamp'])) if fields['timestamp'] else None,
+        level=LEVELS.get(level, level),
+        service=str(fields['service'] or service),
+        message=str(fields['message'] if fields['message'] is not None else line),
+        source=source,
+        offset=offset
+    )
+
+
+def parse_records(lines: Iterable[Tuple[int, str]], source: str = '',
+                  service: str = '') -> Iterator[LogRecord]:
+    """
+    Group lines into records
+    
+    Args:
+        lines: (offset, line) pairs, as from read_lines()
+        source: File the lines came from
+        service: Service for records whose line does not name one
+    
+    Returns:
+        Iterator of LogRecord; continuation lines are joined to the
+        message of the record before them
+    """
+    pending: Optional[LogRecord] = None
+    for offset, line in lines:
+        if not line.strip():
+            continue
+        record = parse_line(line, source, offset, service)
+        if record is None:
+            if pending is not None:
+                if len(pending.message) < MAX_MESSAGE_CHARS:
+                    pending = pending._replace(message=f"{pending.message}\n{line}"[:MAX_MESSAGE_CHARS])
+                continue
+            # Leading continuation with nothing to attach to
+            record = LogRecord(None, '', service, line, source, offset)
+        if pending is not None:
+            yield pending
+        pending = record
+    if pending is not None:
+        yield pending
+
+
+def filter_records(records: Iterable[LogRecord], service: Optional[str] = None,
+                   start: Optional[datetime] = None, end: Optional[datetime] = None) -> Iterator[LogRecord]:
+    """
+    Keep records of a service within a time window
+    
+    Args:
+        records: Parsed records
+        service: Service name (any alias); records naming another service
+            are dropped, records naming none are kept
+        start: Earliest timestamp kept (inclusive)
+        end: Latest timestamp kept (inclusive); with either bound set,
+            records without a timestamp are dropped
+    
+    Returns:
+        Iterator of matching records
+    """
+    catalog = get_service_catalog()
+    wanted = catalog.canonical(service) if service else None
+    start = _naive_utc(start)
+    end = _naive_utc(end)
+    canonical: Dict[str, str] = {}
+    
+    for record in records:
+        if wanted and record.service:
+            name = canonical.get(record.service)
+            if name is None:
+                name = canonical[record.service] = catalog.canonical(record.service)
+            if name != wanted:
+                continue
+        if start is not None or end is not None:
+            timestamp = record.timestamp
+            if timestamp is None or (start is not None and timestamp < start) or \
+                    (end is not None and timestamp > end):
+                continue
+        yield record
+
+
+def _naive_utc(timestamp: Optional[datetime]) -> Optional[datetime]:
+    if timestamp is not None and timestamp.tzinfo is not None:
+        return timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+    return timestamp
+
+
+class LogReader:
+    """
+    Generator pipeline over configured log sources - reusable across workflows
+    
+    files -> lines -> records -> service/time filter. Every stage is a
+    generator, so memory stays bounded by one buffered read and one
+    record however large the files are. With time_index on, a time window
+    is first narrowed to a byte range through each file's TimestampIndex,
+    so only the blocks around the window are read.
+    """
+    
+    def __init__(self, sources: Union[str, Iterable[str]], time_index: bool = False):
+        """
+        Initialize reader
+        
+        Args:
+            sources: Log source entries (see parse_log_sources)
+            time_index: Seek to time windows through <file>.tsidx sidecar
+                indexes, built or extended as needed (files under
+                INDEX_MIN_BYTES are always read whole)
+        """
+        self.sources = parse_log_sources(sources)
+        self.time_index = time_index
+        self._indexes: Dict[str, "TimestampIndex"] = {}
+        self._index_lock = threading.Lock()
+    
+    def records(self, service: Optional[str] = None, start: Optional[datetime] = None,
+                end: Optional[datetime] = None, stats: Optional[Dict[str, int]] = None,
+                chunks: Optional[List[LogChunk]] = None) -> Iterator[LogRecord]:
+        """
+        Stream records of all sources
+        
+        Args:
+            service: Keep only this service's records (default: all)
+            start: Earliest timestamp kept
+            end: Latest timestamp kept
+            stats: Dict to accumulate 'files', 'lines', 'bytes' (bytes read,
+                decompressed for compressed files) and 'records' (records
+                kept) into
+            chunks: Read only these chunks (default: chunks(start, end))
+        
+        Returns:
+            Iterator of LogRecord
+        """
+        stats = stats if stats is not None else {}
+        for key in ('files', 'lines', 'bytes', 'records'):
+            stats.setdefault(key, 0)
+        start = _naive_utc(start)
+        end = _naive_utc(end)
+        if chunks is None:
+            chunks = self.chunks(start, end)
+        stats['files'] += len({chunk.path for chunk in chunks})
+        for record in filter_records(self._parse_chunks(chunks, stats), service, start, end):
+            stats['records'] += 1
+            yield record
+    
+    def chunks(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+               chunk_bytes: Optional[int] = None) -> List[LogChunk]:
+        """
+        Split the sources into byte ranges that can be read independently
+        
+        Args:
+            start: Earliest timestamp wanted (narrows indexed files)
+            end: Latest timestamp wanted
+            chunk_bytes: Split files larger than this (default: one chunk
+                per file); files split at timestamped lines (block starts
+                of indexed files), so no entry is cut from its stack trace
+        
+        Returns:
+            List of LogChunk in source order
+        """
+        start = _naive_utc(start)
+        end = _naive_utc(end)
+        chunks = []
+        for source_service, path in self.sources:
+            if not os.path.exists(path):
+                logger.warning(f"Log source not found: {path}")
+                continue
+            for file_path in iter_log_files(path):
+                try:
+                    first, last = self._byte_range(file_path, start, end)
+                    stop = last if last is not None else os.path.getsize(file_path)
+                except OSError as e:
+                    logger.error(f"Could not read log file {file_path}: {e}")
+                    continue
+                bounds = [first] + self._split_points(file_path, first, stop, chunk_bytes) + [last]
+                chunks.extend(LogChunk(source_service, file_path, lo, hi) for lo, hi in zip(bounds, bounds[1:]))
+        return chunks
+    
+    def _split_points(self, path: str, first: int, stop: int, chunk_bytes: Optional[int]) -> List[int]:
+        # Compressed files cannot be entered mid-way without decompressing up to there
+        if not chunk_bytes or stop - first <= chunk_bytes or is_compressed(path):
+            return []
+        points = list(range(first + chunk_bytes, stop, chunk_bytes))
+        index = self._indexes.get(path)
+        if index is None or not len(index):
+            return self._timestamped_points(path, points, stop, chunk_bytes)
+        # Snap to the nearest block start at or after each point
+        offsets = index.offsets
+        snapped = []
+        for point in points:
+            i = bisect_left(offsets, point)
+            if i < len(offsets) and offsets[i] < stop and (not snapped or offsets[i] > snapped[-1]):
+                snapped.append(offsets[i])
+        return snapped
+    
+    @staticmethod
+    def _timestamped_points(path: str, points: List[int], stop: int, chunk_bytes: int) -> List[int]:
+        """Move each point forward to the next timestamped line (within chunk_bytes, else drop it)"""
+        from .log_index import line_timestamp
+        
+        snapped: List[int] = []
+        for point in points:
+            if snapped and point <= snapped[-1]:
+                continue
+            for offset, line in read_lines(path, point, min(point + chunk_bytes, stop)):
+                if line_timestamp(line) is not None:
+                    snapped.append(offset)
+                    break
+        return snapped
+    
+    def _parse_chunks(self, chunks: List[LogChunk], stats: Dict[str, int]) -> Iterator[LogRecord]:
+        for chunk in chunks:
+            try:
+                lines = read_lines(chunk.path, chunk.start, chunk.end)
+                if is_compressed(chunk.path):
+                    # The size on disk is not what is read; count the lines' bytes
+                    lines = self._count_lines(lines, stats, chunk.start)
+                else:
+                    stop = chunk.end if chunk.end is not None else os.path.getsize(chunk.path)
+                    stats['bytes'] += stop - chunk.start
+                    lines = self._count_lines(lines, stats)
+                yield from parse_records(lines, chunk.path, chunk.service)
+            except (OSError, *DECOMPRESSION_ERRORS) as e:
+                logger.error(f"Could not read log file {chunk.path}: {e}")
+    
+    def _byte_range(self, path: str, start: Optional[datetime],
+                    end: Optional[datetime]) -> Tuple[int, Optional[int]]:
+        """Part of a file that can hold records in the window"""
+        if not self.time_index or (start is None and end is None) or is_compressed(path) or \
+                os.path.getsize(path) < INDEX_MIN_BYTES:
+            return 0, None
+        from .log_index import TimestampIndex
+        
+        with self._index_lock:
+            index = self._indexes.get(path)
+            if index is None:
+                index = self._indexes[path] = TimestampIndex(path)
+            return index.update().byte_range(start, end)
+    
+    @staticmethod
+    def _count_lines(lines: Iterator[Tuple[int, str]], stats: Dict[str, int],
+                     start: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+        """Count lines into stats, and with start given the bytes from there through the last line"""
+        last = None
+        for item in lines:
+            stats['lines'] += 1
+            last = item
+            yield item
+        if start is not None and last is not None:
+            # Offsets are exact up to the last line, whose own length ends the span
+            stats['bytes'] += last[0] + len(last[1].encode('utf-8')) + 1 - start
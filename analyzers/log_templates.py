@@ -0,0 +1,234 @@
+"""
+Log Templates - Pure Tool
+Online log template mining (Drain-style fixed-depth parse tree)
+NO state management, NO orchestration logic
+"""
+
+import re
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger("log_templates")
+
+# Marks a variable position in a template
+WILDCARD = '<*>'
+
+# Variable fields masked before mining, most specific first
+_MASKS = [
+    (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.IGNORECASE), '<UUID>'),
+    (re.compile(r'\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b'), '<IP>'),
+    (re.compile(r'\b0x[0-9a-f]+\b|\b[0-9a-f]{16,}\b', re.IGNORECASE), '<HEX>'),
+    (re.compile(r'(?<![A-Za-z])[-+]?\d+(?:\.\d+)?'), '<NUM>'),
+]
+
+# Emerging templates of more severe levels are listed first
+LEVEL_ORDER = {'CRITICAL': 0, 'ERROR': 1, 'WARN': 2, 'INFO': 3, 'DEBUG': 4}
+
+# Only the first tokens of a message's first line are mined
+MAX_TOKENS = 48
+
+# Masked token sequences remembered for a tree-free lookup; cleared when full
+MAX_CACHED_SEQUENCES = 65536
+
+_has_digit = re.compile(r'\d').search
+
+
+def mask_message(message: str) -> List[str]:
+    """Tokens of a message's first line with variable fields masked"""
+    line = message.split('\n', 1)[0]
+    # Every mask but an all-letter hex string needs a digit
+    if _has_digit(line):
+        for pattern, mask in _MASKS:
+            line = pattern.sub(mask, line)
+    return line.split()[:MAX_TOKENS]
+
+
+class LogTemplate:
+    """A mined template and how often it was seen"""
+    
+    __slots__ = ('template_id', 'level', 'tokens', 'count', 'baseline_count', 'example')
+    
+    def __init__(self, template_id: int, level: str, tokens: List[str], example: str):
+        self.template_id = template_id
+        self.level = level
+        self.tokens = tokens
+        self.count = 0
+        self.baseline_count = 0
+        self.example = example
+    
+    @property
+    def template(self) -> str:
+        return ' '.join(self.tokens)
+    
+    def similarity(self, tokens: List[str]) -> float:
+        """Share of positions where the tokens equal the template's constants"""
+        same = sum(1 for mine, theirs in zip(self.tokens, tokens) if mine == theirs and mine != WILDCARD)
+        return same / len(tokens) if tokens else 1.0
+    
+    def merge(self, tokens: List[str]) -> None:
+        """Turn positions where the tokens differ into wildcards"""
+        self.tokens = [mine if mine == theirs else WILDCARD for mine, theirs in zip(self.tokens, tokens)]
+
+
+class TemplateMiner:
+    """
+    Incremental log template miner - reusable across workflows
+    
+    Messages are routed down a fixed-depth tree (level, token count, then
+    the first `depth` tokens, where tokens holding digits go to a wildcard
+    branch) to a leaf of candidate templates. The most similar template
+    at or above sim_threshold absorbs the message, otherwise it starts a
+    new one. Children per node and templates per leaf are capped, and a
+    masked line seen recently skips the tree, so the cost per line stays
+    constant however many lines are mined.
+    
+    Lines are counted as baseline or current, so templates that are new
+    or spiking in an incident window can be told from the usual ones.
+    """
+    
+    def __init__(self, depth: int = 2, sim_threshold: float = 0.5,
+                 max_children: int = 100, max_leaf_templates: int = 64, spike_ratio: float = 3.0):
+        """
+        Initialize miner
+        
+        Args:
+            depth: Leading tokens used to route a message
+            sim_threshold: Similarity needed to join an existing template
+            max_children: Branches per tree node before the rest share a
+                wildcard branch
+            max_leaf_templates: Templates per leaf; once full, a message
+                joins the most similar template
+            spike_ratio: Current/baseline rate ratio that counts as a spike
+        """
+        self.depth = depth
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.max_leaf_templates = max_leaf_templates
+        self.spike_ratio = spike_ratio
+        self.templates: List[LogTemplate] = []
+        self._root: Dict[Any, Any] = {}
+        self._assigned: Dict[tuple, LogTemplate] = {}
+    
+    def __len__(self) -> int:
+        return len(self.templates)
+    
+    def add(self, message: str, level: str = '', baseline: bool = False) -> LogTemplate:
+        """
+        Mine one log message
+        
+        Args:
+            message: Log message (only the first line is used)
+            level: Log level; messages of different levels never share a template
+            baseline: Count the line as baseline rather than current
+        
+        Returns:
+            The LogTemplate the message was assigned to
+        """
+        tokens = mask_message(message)
+        key = (level, *tokens)
+        best = self._assigned.get(key)
+        if best is None:
+            best = self._match(level, tokens, message)
+            if len(self._assigned) >= MAX_CACHED_SEQUENCES:
+                self._assigned.clear()
+            self._assigned[key] = best
+        
+        if baseline:
+            best.baseline_count += 1
+        else:
+            best.count += 1
+        return best
+    
+    def merge(self, other: "TemplateMiner") -> None:
+        """Fold in the templates and counts another miner mined"""
+        for theirs in other.templates:
+            mine = self._match(theirs.level, theirs.tokens, theirs.example)
+            mine.count += theirs.count
+            mine.baseline_count += theirs.baseline_count
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        # The lookup cache is rebuilt on demand; leave it out of pickles
+        state = self.__dict__.copy()
+        state['_assigned'] = {}
+        return state
+    
+    def _match(self, level: str, tokens: List[str], message: str) -> LogTemplate:
+        """Template for a token sequence not seen recently, created or merged as needed"""
+        leaf = self._leaf(level, tokens)
+        best, best_similarity = None, -1.0
+        for candidate in leaf:
+            similarity = candidate.similarity(tokens)
+            if similarity > best_similarity:
+                best, best_similarity = candidate, similarity
+        
+        if best is None or (best_similarity < self.sim_threshold and len(leaf) < self.max_leaf_templates):
+            best = LogTemplate(len(self.templates), level, tokens, message.split('\n', 1)[0])
+            self.templates.append(best)
+            leaf.append(best)
+        elif best.tokens != tokens:
+            best.merge(tokens)
+        return best
+    
+    def _leaf(self, level: str, tokens: List[str]) -> List[LogTemplate]:
+        node = self._child(self._root, level)
+        node = self._child(node, len(tokens))
+        for token in tokens[:self.depth]:
+            node = self._child(node, WILDCARD if _has_digit(token) else token)
+        leaf = node.get(None)
+        if leaf is None:
+            leaf = node[None] = []
+        return leaf
+    
+    def _child(self, node: Dict[Any, Any], key: Any) -> Dict[Any, Any]:
+        child = node.get(key)
+        if child is None:
+            if len(node) >= self.max_children:
+                key = WILDCARD
+                child = node.get(key)
+            if child is None:
+                child = node[key] = {}
+        return child
+    
+    def top(self, limit: int = 10) -> List[LogTemplate]:
+        """Templates seen most often in the current lines"""
+        return sorted((t for t in self.templates if t.count), key=lambda t: -t.count)[:limit]
+    
+    def emerging(self, min_count: int = 3, baseline_scale: float = 1.0) -> List[Dict[str, Any]]:
+        """
+        Templates that are new or spiking in the current lines
+        
+        Args:
+            min_count: Current lines a template needs to be reported
+            baseline_scale: Length of the current period over the
+                baseline period, to compare rates
+        
+        Returns:
+            Template dicts (see describe), most severe level first, then
+            new before spiking, then by count
+        """
+        emerging = []
+        for template in self.templates:
+            if template.count >= min_count:
+                described = self.describe(template, baseline_scale)
+                if described['status'] != 'steady':
+                    emerging.append(described)
+        emerging.sort(key=lambda t: (LEVEL_ORDER.get(t['level'], 5), t['status'] != 'new', -t['count']))
+        return emerging
+    
+    def describe(self, template: LogTemplate, baseline_scale: float = 1.0) -> Dict[str, Any]:
+        """Report dict of a template (template, level, count, baseline_count, status, example)"""
+        if template.baseline_count == 0:
+            status = 'new'
+        elif template.count >= self.spike_ratio * template.baseline_count * baseline_scale:
+            status = 'spike'
+        else:
+            status = 'steady'
+        return {
+            'template': template.template,
+            'level': template.level,
+            'count': template.count,
+            'baseline_count': template.baseline_count,
+            'status': status,
+            'example': template.example
+        }
+
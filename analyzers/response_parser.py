@@ -0,0 +1,136 @@
+"""
+Response Parser - Pure Tool
+Incrementally extracts labeled fields from streamed LLM responses
+NO state management, NO orchestration logic
+"""
+
+import re
+import logging
+from typing import Dict, Iterable, Tuple
+
+logger = logging.getLogger("response_parser")
+
+# Field name -> label regex matched at the start of a line (case-insensitive)
+ALERT_FIELDS = {
+    'service': r'service',
+    'severity': r'severity(?: level)?',
+    'description': r'description',
+}
+
+ROOT_CAUSE_FIELDS = {
+    'root_cause': r'root cause(?: hypothesis)?',
+    'confidence': r'confidence(?: level)?',
+    'solution': r'recommended solution|solution',
+    'contributing_factors': r'contributing factors',
+    'resolution_time': r'estimated resolution time|resolution time',
+}
+
+
+class StreamingFieldParser:
+    """
+    Line-oriented parser for ``Label: value`` responses
+    
+    Chunks are fed as they arrive; a field is recorded once its line is
+    complete. ``complete`` turns True as soon as every required field has
+    been seen, so the caller can stop reading the stream.
+    """
+    
+    def __init__(self, fields: Dict[str, str], required: Iterable[str]):
+        """
+        Initialize parser
+        
+        Args:
+            fields: Field name -> label regex
+            required: Field names that must be present for early exit
+        """
+        self.required = tuple(required)
+        self.fields: Dict[str, str] = {}
+        self._buffer = ""
+        self._patterns = [
+            (name, re.compile(rf'^[\W\d_]*(?:{label})\W*:\s*(.*)$', re.IGNORECASE))
+            for name, label in fields.items()
+        ]
+    
+    @property
+    def complete(self) -> bool:
+        """True once every required field has been parsed"""
+        return all(name in self.fields for name in self.required)
+    
+    def feed(self, chunk: str) -> bool:
+        """
+        Consume a chunk of streamed text
+        
+        Args:
+            chunk: Next piece of the response
+        
+        Returns:
+            True once every required field has been parsed
+        """
+        self._buffer += chunk
+        *lines, self._buffer = self._buffer.split('\n')
+        for line in lines:
+            self._parse_line(line)
+        return self.complete
+    
+    def finish(self) -> Dict[str, str]:
+        """
+        Flush the trailing partial line
+        
+        Returns:
+            Parsed fields
+        """
+        if self._buffer:
+            self._parse_line(self._buffer)
+            self._buffer = ""
+        return self.fields
+    
+    def _parse_line(self, line: str) -> None:
+        """Record the first value seen for a labeled line"""
+        line = line.strip()
+        if not line:
+            return
+        for name, pattern in self._patterns:
+            match = pattern.match(line)
+            if match:
+                value = match.group(1).strip().strip('*').strip()
+                if value and name not in self.fields:
+                    self.fields[name] = value
+                return
+
+
+def parse_stream(chunks: Iterable[str], fields: Dict[str, str],
+                 required: Iterable[str]) -> Tuple[Dict[str, str], str, bool]:
+    """
+    Parse a chunk stream, stopping as soon as the required fields are known
+    
+    Args:
+        chunks: Iterable of text chunks (a generator is closed on early exit)
+        fields: Field name -> label regex
+        required: Field names needed before the stream can be abandoned
+    
+    Returns:
+        Tuple of (parsed fields, text read so far, whether reading stopped early)
+    """
+    parser = StreamingFieldParser(fields, required)
+    received = []
+    early_exit = False
+    
+    for chunk in chunks:
+        received.append(chunk)
+        if parser.feed(chunk):
+            early_exit = True
+            break
+    
+    # Stop the producer so the backend stops streaming tokens we do not need
+    close = getattr(chunks, 'close', None)
+    if early_exit and close is not None:
+        close()
+    
+    return parser.finish(), ''.join(received), early_exit
+
+
+def parse_text(text: str, fields: Dict[str, str]) -> Dict[str, str]:
+    """Parse a complete response"""
+    parser = StreamingFieldParser(fields, required=())
+    parser.feed(text)
+    return parser.finish()
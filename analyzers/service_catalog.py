@@ -0,0 +1,255 @@
+"""
+Service Catalog - Pure Tool
+Resolves free-form service names to canonical services
+NO state management, NO orchestration logic
+"""
+
+import re
+import json
+import math
+import hashlib
+import threading
+import logging
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from config import get_config_value
+from utils.lru_cache import LRUCache
+from .alert_classifier import SERVICE_ALIASES
+
+logger = logging.getLogger("service_catalog")
+
+UNKNOWN_SERVICE = 'Unknown Service'
+
+# Shorthand expanded before matching ("auth-svc" -> "auth service")
+ABBREVIATIONS = {'svc': 'service', 'srv': 'service', 'gw': 'gateway'}
+
+# Word pairs below this trigram similarity do not count as matching at all,
+# so "notification" does not half-match "authentication"
+TOKEN_SIMILARITY = 0.6
+
+# A fuzzy match must beat the best match of any other service by this much
+AMBIGUITY_MARGIN = 0.1
+
+# Aliases fully scored per lookup, after ranking by their matching words
+MAX_CANDIDATES = 16
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def service_tokens(name: str) -> List[str]:
+    """Lowercase words of a service name with abbreviations expanded"""
+    return [ABBREVIATIONS.get(token, token) for token in _TOKEN_RE.findall((name or '').lower())]
+
+
+def _trigrams(token: str) -> Set[str]:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _token_similarity(left: str, right: str, shared: int, total: int) -> float:
+    """
+    Similarity of two words
+    
+    Args:
+        left: Query word
+        right: Alias word
+        shared: Trigrams the words have in common
+        total: Trigrams of both words together
+    
+    Returns:
+        1.0 for equal words, 0.9 when one abbreviates the other, else
+        their trigram Dice coefficient (0.0 below TOKEN_SIMILARITY)
+    """
+    if left == right:
+        return 1.0
+    if min(len(left), len(right)) >= 3 and (left.startswith(right) or right.startswith(left)):
+        return 0.9
+    dice = 2 * shared / total
+    return dice if dice >= TOKEN_SIMILARITY else 0.0
+
+
+def default_services() -> Dict[str, List[str]]:
+    """Built-in catalog: the alert classifier's services and their aliases"""
+    services = {service: [alias for alias, _ in aliases] for service, aliases in SERVICE_ALIASES.items()}
+    services[UNKNOWN_SERVICE] = []
+    return services
+
+
+class ServiceCatalog:
+    """
+    Canonical service names with aliases - reusable across workflows
+    
+    A name resolves exactly when its words (or the words run together,
+    so "payment-api", "paymentapi" and "Payment API" agree) equal a
+    service or alias. Otherwise aliases sharing a character trigram with
+    the name are scored word by word: each word counts by how rare it is
+    across aliases, so generic words like "service" or "api" carry little
+    weight. The best alias wins if it clears the threshold and is not
+    too close to a different service.
+    """
+    
+    def __init__(self, services: Optional[Dict[str, Iterable[str]]] = None,
+                 threshold: Optional[float] = None):
+        """
+        Initialize catalog
+        
+        Args:
+            services: Canonical service -> aliases (default: built-in services)
+            threshold: Minimum fuzzy match score in 0-1
+                (default: SERVICE_MATCH_THRESHOLD)
+        """
+        self.threshold = threshold if threshold is not None else \
+            float(get_config_value("SERVICE_MATCH_THRESHOLD", 0.6))
+        self._exact: Dict[str, str] = {}
+        self._aliases: List[Tuple[Tuple[str, ...], str]] = []
+        self._token_df: Counter = Counter()
+        self._token_aliases: Dict[str, List[int]] = defaultdict(list)
+        self._gram_tokens: Dict[str, Set[str]] = defaultdict(set)
+        self._token_grams: Dict[str, int] = {}
+        self._resolved = LRUCache(4096)
+        self._fingerprint: Optional[str] = None
+        self._lock = threading.Lock()
+        
+        for service, aliases in (services if services is not None else default_services()).items():
+            self.add(service, aliases)
+    
+    @classmethod
+    def from_config(cls) -> "ServiceCatalog":
+        """
+        Built-in services plus those in SERVICE_CATALOG_PATH
+        
+        The file is a JSON object of canonical service -> list of aliases;
+        its aliases extend the built-in ones.
+        """
+        services = default_services()
+        path = get_config_value("SERVICE_CATALOG_PATH", "")
+        if path:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    for service, aliases in json.load(f).items():
+                        services.setdefault(service, []).extend(aliases)
+                logger.info(f"Loaded service catalog: {path}")
+            except (OSError, ValueError) as e:
+                logger.error(f"Could not load service catalog {path}: {e}")
+        return cls(services)
+    
+    @property
+    def services(self) -> List[str]:
+        """Canonical service names"""
+        return sorted(set(self._exact.values()))
+    
+    @property
+    def fingerprint(self) -> str:
+        """Digest of the alias table; changes whenever resolution could"""
+        if self._fingerprint is None:
+            with self._lock:
+                table = json.dumps(sorted(self._exact.items()))
+                self._fingerprint = hashlib.sha1(table.encode('utf-8')).hexdigest()[:16]
+        return self._fingerprint
+    
+    def add(self, service: str, aliases: Iterable[str] = ()) -> None:
+        """
+        Register a canonical service and its aliases
+        
+        Args:
+            service: Canonical service name
+            aliases: Other names it goes by
+        """
+        with self._lock:
+            for name in [service, *aliases]:
+                tokens = tuple(service_tokens(name))
+                if not tokens or ''.join(tokens) in self._exact:
+                    continue
+                alias_id = len(self._aliases)
+                self._aliases.append((tokens, service))
+                self._exact[' '.join(tokens)] = service
+                self._exact[''.join(tokens)] = service
+                for token in set(tokens):
+                    self._token_df[token] += 1
+                    self._token_aliases[token].append(alias_id)
+                    grams = _trigrams(token)
+                    self._token_grams[token] = len(grams)
+                    for gram in grams:
+                        self._gram_tokens[gram].add(token)
+            self._resolved.clear()
+            self._fingerprint = None
+    
+    def resolve(self, name: str) -> Tuple[Optional[str], float]:
+        """
+        Resolve a free-form service name
+        
+        Args:
+            name: Service name as written in an alert
+        
+        Returns:
+            Tuple of (canonical service or None if nothing matches well
+            enough, match score in 0-1)
+        """
+        tokens = service_tokens(name)
+        if not tokens:
+            return None, 0.0
+        key = ' '.join(tokens)
+        cached = self._resolved.get(key)
+        if cached is not None:
+            return cached
+        
+        with self._lock:
+            service = self._exact.get(key) or self._exact.get(''.join(tokens))
+            result = (service, 1.0) if service else self._fuzzy_match(tokens)
+        self._resolved.put(key, result)
+        return result
+    
+    def canonical(self, name: str) -> str:
+        """Canonical service for a name, or the name itself (trimmed) when unknown"""
+        service, _ = self.resolve(name)
+        return service or ' '.join((name or '').split())
+    
+    def _fuzzy_match(self, tokens: List[str]) -> Tuple[Optional[str], float]:
+        """Score aliases with words close to the name's (caller holds the lock)"""
+        # Trigram postings give every alias word's overlap with each name word
+        similar: Dict[Tuple[str, str], float] = {}
+        for token in set(tokens):
+            grams = _trigrams(token)
+            shared = Counter(alias_token for gram in grams for alias_token in self._gram_tokens.get(gram, ()))
+            for alias_token, count in shared.items():
+                similarity = _token_similarity(token, alias_token, count, len(grams) + self._token_grams[alias_token])
+                if similarity:
+                    similar[token, alias_token] = similarity
+        
+        # Rank aliases by their matching words; fully score only the leaders
+        partial: Counter = Counter()
+        for (_, alias_token), similarity in similar.items():
+            weight = self._weight(alias_token) * similarity
+            for alias_id in self._token_aliases[alias_token]:
+                partial[alias_id] += weight
+        
+        best: Dict[str, float] = {}
+        for alias_id, _ in partial.most_common(MAX_CANDIDATES):
+            alias_tokens, service = self._aliases[alias_id]
+            score = self._score(tokens, alias_tokens, similar)
+            if score > best.get(service, 0.0):
+                best[service] = score
+        if not best:
+            return None, 0.0
+        
+        ranked = sorted(best.items(), key=lambda item: -item[1])
+        service, score = ranked[0]
+        if score < self.threshold:
+            return None, round(score, 3)
+        if len(ranked) > 1 and score - ranked[1][1] < AMBIGUITY_MARGIN:
+            logger.debug(f"Ambiguous service name {' '.join(tokens)!r}: {ranked[:2]}")
+            return None, round(score, 3)
+        return service, round(score, 3)
+    
+    def _score(self, tokens: List[str], alias_tokens: Tuple[str, ...],
+               similar: Dict[Tuple[str, str], float]) -> float:
+        """Weighted share of words on each side with a close word on the other"""
+        weights = {token: self._weight(token) for token in (*tokens, *alias_tokens)}
+        matched = sum(weights[t] * max(similar.get((t, a), 0.0) for a in alias_tokens) for t in tokens)
+        matched += sum(weights[a] * max(similar.get((t, a), 0.0) for t in tokens) for a in alias_tokens)
+        total = sum(weights[t] for t in tokens) + sum(weights[a] for a in alias_tokens)
+        return matched / total
+    
+    def _weight(self, token: str) -> float:
+        """Inverse alias frequency of a word (unseen words weigh the most)"""
+        return math.log(1 + len(self._aliases) / self._token_df.get(token, 0.5))
@@ -0,0 +1,497 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for AI-Powered Incident Response - Client Format
+
+Offline performance benchmarks. No network access is needed: the LLM is
+replaced by FakeGeminiClient and the .env file is ignored unless ENV_FILE
+is set explicitly, so no email is sent.
+
+Run with: python benchmarks.py pipeline --incidents 200 --concurrency 20
+          python benchmarks.py knowledge --sizes 10 1000 100000 1000000
+          python benchmarks.py store --sizes 10000 1000000
+          python benchmarks.py embeddings --size 100000 --nprobe 1 4 16 64
+          python benchmarks.py logs --lines 1000000
+"""
+
+import os
+import sys
+import time
+import logging
+import random
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict
+
+# Select the offline backend before any module reads configuration
+os.environ.setdefault("ENV_FILE", os.devnull)
+os.environ.setdefault("LLM_BACKEND", "fake")
+os.environ.setdefault("LLM_RATE_LIMIT_PER_MINUTE", "0")
+
+
+SAMPLE_ALERTS = [
+    "Payment API experiencing database connection timeouts",
+    "Auth Service showing memory leak symptoms",
+    "Load Balancer having network connectivity issues",
+    "Unknown service reporting critical errors",
+    "CRITICAL: Payment API down for all merchants",
+    "Checkout flow slow, users report intermittent failures",
+]
+
+# Vocabulary for synthetic knowledge bases: real incident terms first so they
+# are the most frequent, then filler terms with a long tail
+KB_TERMS = [
+    "database", "timeout", "connection", "pool", "memory", "leak", "session", "cache",
+    "latency", "error", "rate", "limit", "replication", "lag", "disk", "cpu",
+    "deadlock", "network", "dns", "certificate", "queue", "backlog", "thread", "gc",
+]
+KB_SERVICES = ["Payment API", "Auth Service", "Load Balancer", "API Gateway", "Database", "Checkout"]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds"""
+    return {
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+    }
+
+
+def synthetic_incidents(count: int, vocabulary: int = 5000, seed: int = 7) -> List[Dict[str, Any]]:
+    """Generate a knowledge base of past incidents with Zipf-distributed keywords"""
+    rng = random.Random(seed)
+    terms = KB_TERMS + [f"term{i:05d}" for i in range(max(0, vocabulary - len(KB_TERMS)))]
+    weights = [1.0 / (rank + 1) for rank in range(len(terms))]
+    
+    incidents = []
+    for i in range(count):
+        keywords = list(dict.fromkeys(rng.choices(terms, weights=weights, k=rng.randint(3, 6))))
+        incidents.append({
+            'incident_id': f"INC-{i:07d}",
+            'service': KB_SERVICES[i % len(KB_SERVICES)],
+            'anomaly': ' '.join(keywords[:2]),
+            'root_cause': f"{keywords[0]} {keywords[-1]} failure",
+            'solution': f"Mitigate {keywords[0]} issue",
+            'keywords': keywords
+        })
+    return incidents
+
+
+def synthetic_queries(count: int, seed: int = 11) -> List[str]:
+    """Generate incident descriptions drawn from the common incident terms"""
+    rng = random.Random(seed)
+    return [' '.join(rng.sample(KB_TERMS, rng.randint(2, 4))) for _ in range(count)]
+
+
+def time_calls(fn, inputs: List[Any]) -> List[float]:
+    """Latency of fn(input) for each input, in seconds"""
+    latencies = []
+    for item in inputs:
+        started = time.perf_counter()
+        fn(item)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+# ============================================================================
+# PIPELINE BENCHMARK
+# ============================================================================
+
+def bench_pipeline(incidents: int, concurrency: int, max_workers: int) -> None:
+    """Run incidents through the full workflow against the fake LLM backend"""
+    from state import IncidentState
+    from workflows.incident_workflow import build_incident_workflow
+    from agents.knowledge_lookup_agent import KnowledgeLookupAgent
+    from utils.registry import get_agent, get_model_router
+    
+    workflow = build_incident_workflow(max_workers=max_workers)
+    
+    def run_one(i: int) -> float:
+        state = IncidentState(
+            incident_id=f"BENCH-{i:06d}",
+            raw_alert=SAMPLE_ALERTS[i % len(SAMPLE_ALERTS)],
+            timestamp=time.strftime("%Y-%m-%d %H:%M:%S")
+        )
+        started = time.perf_counter()
+        workflow.run(state)
+        return time.perf_counter() - started
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(run_one, range(incidents)))
+    elapsed = time.perf_counter() - started
+    
+    stats = summarize(latencies)
+    print(f"Pipeline: {incidents} incidents, concurrency={concurrency}, "
+          f"backend={os.environ.get('LLM_BACKEND')}")
+    print(f"  Throughput: {incidents / elapsed:.1f} incidents/sec ({elapsed:.2f}s total)")
+    print(f"  Latency:    p50={stats['p50_ms']:.0f}ms  p95={stats['p95_ms']:.0f}ms  "
+          f"p99={stats['p99_ms']:.0f}ms  mean={stats['mean_ms']:.0f}ms")
+    
+    routing = get_model_router().get_metrics()
+    for task, counts in sorted(routing["decisions"].items()):
+        print(f"  Routing:    {task} -> " + ", ".join(f"{m}={n}" for m, n in sorted(counts.items())))
+    for model, observed in sorted(routing["latency"].items()):
+        print(f"  Model:      {model} p50={observed['p50'] * 1000:.0f}ms  "
+              f"p95={observed['p95'] * 1000:.0f}ms  errors={observed['errors']}")
+    
+    cache = get_agent(KnowledgeLookupAgent).searcher.get_cache_stats()
+    if cache["enabled"]:
+        print(f"  Knowledge:  cache hit rate={cache['hit_rate']:.0%} ({cache['hits']} hits, {cache['misses']} misses)")
+
+
+# ============================================================================
+# KNOWLEDGE SEARCH BENCHMARK
+# ============================================================================
+
+def linear_scan(incidents: List[Dict[str, Any]], description: str) -> List[Dict[str, Any]]:
+    """Reference search: score every incident, sort all matches, keep the top 5"""
+    terms = set(description.lower().split())
+    matches = []
+    for incident in incidents:
+        keywords = set(incident['keywords'])
+        score = len(terms & keywords) / len(keywords)
+        if score > 0.3:
+            matches.append((score, incident['incident_id']))
+    matches.sort(key=lambda m: m[0], reverse=True)
+    return matches[:5]
+
+
+def bench_knowledge(sizes: List[int], queries: int, max_scan_size: int, scorers: List[str]) -> None:
+    """Knowledge search latency by KB size and scorer, against a linear scan"""
+    from analyzers.knowledge_searcher import KnowledgeSearcher
+    
+    descriptions = synthetic_queries(queries)
+    batch = [(KB_SERVICES[i % len(KB_SERVICES)], d) for i, d in enumerate(descriptions)]
+    print(f"Knowledge search: {queries} queries per size (sharded rows search by service)")
+    
+    for size in sizes:
+        incidents = synthetic_incidents(size)
+        for scorer in scorers:
+            for sharded in (False, True):
+                searcher = KnowledgeSearcher(past_incidents=incidents, scorer=scorer, shard_by_service=sharded)
+                stores = list(searcher.store.shards.values()) if sharded else [searcher.store]
+                started = time.perf_counter()
+                for store in stores:
+                    store.bm25_index if scorer == "bm25" else store.index
+                build_s = time.perf_counter() - started
+                
+                single = summarize(time_calls(lambda q: searcher.search_similar_incidents(*q), batch))
+                started = time.perf_counter()
+                searcher.search_similar_incidents_batch(batch)
+                batch_ms = (time.perf_counter() - started) * 1000 / queries
+                label = f"{scorer}{'/shard' if sharded else ''}"
+                print(f"  {size:>9,} {label:<13}  build={build_s * 1000:8.1f}ms  "
+                      f"query p50={single['p50_ms']:8.3f}ms p95={single['p95_ms']:8.3f}ms  "
+                      f"batch={batch_ms:8.3f}ms/query")
+        if size <= max_scan_size:
+            scanned = summarize(time_calls(lambda d: linear_scan(incidents, d), descriptions))
+            print(f"  {size:>9,} scan           query p50={scanned['p50_ms']:8.3f}ms")
+
+
+def bench_store(sizes: List[int], queries: int) -> None:
+    """Knowledge store open time (cold build vs prebuilt index) and query latency"""
+    from analyzers.knowledge_searcher import KnowledgeSearcher
+    from analyzers.knowledge_store import open_knowledge_store, write_jsonl, write_sqlite
+    
+    descriptions = synthetic_queries(queries)
+    print(f"Knowledge store: {queries} queries per size")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            incidents = synthetic_incidents(size)
+            for filename, write in ((f"kb-{size}.jsonl", write_jsonl), (f"kb-{size}.db", write_sqlite)):
+                path = os.path.join(tmp, filename)
+                write(path, incidents)
+                
+                started = time.perf_counter()
+                len(open_knowledge_store(path))
+                cold_s = time.perf_counter() - started
+                
+                started = time.perf_counter()
+                store = open_knowledge_store(path)
+                len(store)
+                warm_s = time.perf_counter() - started
+                
+                searcher = KnowledgeSearcher(store=store)
+                queried = summarize(time_calls(lambda d: searcher.search_similar_incidents("Payment API", d),
+                                               descriptions))
+                index_mb = os.path.getsize(path + ".idx") / 1e6
+                print(f"  {size:>9,} {store.name:<6}  cold open={cold_s * 1000:9.1f}ms  "
+                      f"warm open={warm_s * 1000:7.1f}ms  index={index_mb:6.1f}MB  "
+                      f"query p50={queried['p50_ms']:7.3f}ms")
+            del incidents
+
+
+def bench_embeddings(size: int, queries: int, nprobes: List[int], dim: int, nlist: int) -> None:
+    """Recall@5 vs latency of the IVF embedding index against brute force"""
+    from analyzers.knowledge_bm25 import incident_text
+    from analyzers.knowledge_embeddings import HashingEmbedder, IVFIndex, recall_at_k
+    
+    incidents = synthetic_incidents(size)
+    embedder = HashingEmbedder(dim)
+    
+    started = time.perf_counter()
+    vectors = embedder.embed_batch(incident_text(incident) for incident in incidents)
+    embed_s = time.perf_counter() - started
+    started = time.perf_counter()
+    ivf = IVFIndex.build(vectors, nlist=nlist)
+    build_s = time.perf_counter() - started
+    
+    query_vectors = embedder.embed_batch(f"Payment API {d}" for d in synthetic_queries(queries))
+    print(f"Embeddings: {size:,} incidents, dim={dim}, nlist={ivf.nlist}, {queries} queries")
+    print(f"  Embed: {embed_s * 1000:.0f}ms ({size / max(embed_s, 1e-9):,.0f} docs/sec)  "
+          f"IVF build: {build_s * 1000:.0f}ms")
+    
+    exact = [ivf.search_exact(q) for q in query_vectors]
+    brute = summarize(time_calls(ivf.search_exact, list(query_vectors)))
+    print(f"  brute force   p50={brute['p50_ms']:8.3f}ms  p95={brute['p95_ms']:8.3f}ms  recall@5=1.000")
+    
+    for nprobe in nprobes:
+        approximate = [ivf.search(q, nprobe=nprobe) for q in query_vectors]
+        timed = summarize(time_calls(lambda q: ivf.search(q, nprobe=nprobe), list(query_vectors)))
+        print(f"  nprobe={nprobe:<5}  p50={timed['p50_ms']:8.3f}ms  p95={timed['p95_ms']:8.3f}ms  "
+              f"recall@5={recall_at_k(approximate, exact):.3f}")
+
+
+# Message templates for synthetic logs, roughly one in ten evidencing an anomaly
+LOG_MESSAGES = [
+    ("INFO", "Request completed in {n}ms"),
+    ("INFO", "GET /api/v1/orders/{n} 200"),
+    ("DEBUG", "Cache hit for key session:{n}"),
+    ("INFO", "Processed batch {n} with {n} items"),
+    ("WARN", "Slow query took {n}ms"),
+    ("INFO", "Health check passed"),
+    ("INFO", "User {n} logged in"),
+    ("DEBUG", "Connection pool size {n}"),
+    ("ERROR", "Connection timeout after {n}ms to db-primary"),
+    ("ERROR", "Connection refused by upstream 10.0.0.{n}"),
+]
+
+
+def write_synthetic_log(path: str, lines: int, seed: int = 5) -> None:
+    """One day of interleaved multi-service log lines"""
+    rng = random.Random(seed)
+    services = [service.lower().replace(" ", "-") for service in KB_SERVICES]
+    start = time.mktime((2024, 1, 15, 0, 0, 0, 0, 0, -1))
+    step = 86400 / max(lines, 1)
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        for i in range(lines):
+            level, message = rng.choice(LOG_MESSAGES)
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(start + i * step))
+            f.write(f"{stamp}.{i % 1000:03d} {level} [{rng.choice(services)}] "
+                    f"{message.replace('{n}', str(rng.randint(1, 999)))}\n")
+
+
+def bench_logs(lines: int, workers: List[int]) -> None:
+    """Log ingestion throughput: read, parse, signature scans, template mining, the filtered pipeline into the detectors, windowed reads, compressed reads, parallel analysis, follow mode, and rate detection"""
+    import resource
+    from datetime import datetime
+    from analyzers.log_reader import LogReader, read_lines, parse_records
+    from analyzers.log_detectors import SignatureDetector, compile_signatures
+    from analyzers.log_templates import TemplateMiner
+    from analyzers.log_analyzer import LogAnalyzer
+    
+    def scan_per_signature(path: str) -> None:
+        # Baseline: one pass over the file per signature
+        with open(path, "rb") as f:
+            data = f.read()
+        for pattern in compile_signatures(as_bytes=True).patterns:
+            sum(1 for _ in pattern.finditer(data))
+    
+    def scan_prefilter(path: str) -> None:
+        # The detectors' single pass: the combined case-folded prefilter
+        with open(path, "rb") as f:
+            data = f.read()
+        sum(1 for _ in compile_signatures(as_bytes=True).prefilter.finditer(data.lower()))
+    
+    def mine_templates(path: str) -> None:
+        miner = TemplateMiner()
+        for record in parse_records(read_lines(path)):
+            miner.add(record.message, record.level)
+    
+    def pipeline(path: str) -> None:
+        detector = SignatureDetector()
+        for record in LogReader([path]).records("Payment API", datetime(2024, 1, 15), datetime(2024, 1, 16)):
+            detector.observe(record)
+        detector.anomalies()
+    
+    stages = [
+        ("read lines", lambda path: sum(1 for _ in read_lines(path))),
+        ("parse records", lambda path: sum(1 for _ in parse_records(read_lines(path)))),
+        ("scan per rule", scan_per_signature),
+        ("scan prefilter", scan_prefilter),
+        ("parse + mine", mine_templates),
+        ("filter + detect", pipeline),
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.log")
+        write_synthetic_log(path, lines)
+        size_mb = os.path.getsize(path) / 1e6
+        print(f"Log ingestion: {lines:,} lines, {size_mb:.0f}MB")
+        
+        for name, stage in stages:
+            started = time.perf_counter()
+            stage(path)
+            elapsed = time.perf_counter() - started
+            print(f"  {name:<16} {elapsed:7.2f}s  {lines / elapsed:>11,.0f} lines/sec  {size_mb / elapsed:7.1f} MB/sec")
+        
+        # A 30 minute incident window, read whole vs through the timestamp index
+        window = (datetime(2024, 1, 15, 11, 30), datetime(2024, 1, 15, 12, 0))
+        print("  30 minute window:")
+        indexed = LogReader([path], time_index=True)
+        for name, reader in [("full scan", LogReader([path])), ("index build", indexed), ("index seek", indexed)]:
+            stats: Dict[str, int] = {}
+            started = time.perf_counter()
+            records = sum(1 for _ in reader.records(None, *window, stats))
+            elapsed = time.perf_counter() - started
+            print(f"    {name:<14} {elapsed * 1000:9.1f}ms  {records:>9,} records  {stats['bytes'] / 1e6:7.1f}MB read")
+        
+        # Rotated logs read through their decompressor vs the plain file
+        import gzip, bz2, lzma
+        print("  Compressed reads (read lines / parse records):")
+        with open(path, "rb") as f:
+            data = f.read()
+        variants = [("plain", path)]
+        for suffix, opener in ((".gz", lambda p: gzip.open(p, "wb", compresslevel=6)),
+                               (".bz2", lambda p: bz2.open(p, "wb")),
+                               (".xz", lambda p: lzma.open(p, "wb", preset=1))):
+            with opener(path + suffix) as f:
+                f.write(data)
+            variants.append((suffix, path + suffix))
+        del data
+        for name, variant in variants:
+            timings = []
+            for stage in (lambda p: sum(1 for _ in read_lines(p)), lambda p: sum(1 for _ in parse_records(read_lines(p)))):
+                started = time.perf_counter()
+                stage(variant)
+                timings.append(time.perf_counter() - started)
+            print(f"    {name:<6} {os.path.getsize(variant) / 1e6:6.1f}MB on disk  "
+                  f"{lines / timings[0]:>11,.0f} / {lines / timings[1]:>9,.0f} lines/sec")
+        
+        # Full-day analysis split into chunks across worker processes
+        print("  Full-day analysis:")
+        for count in workers:
+            analyzer = LogAnalyzer([path])
+            analyzer.workers = count
+            analyzer.window_minutes, analyzer.baseline_minutes = 720, 720
+            analyzer.chunk_bytes = max(1 << 20, os.path.getsize(path) // (4 * count))
+            analyzer.parallel_min_bytes = 0
+            # The first call starts the pool
+            analyzer.analyze_logs("Payment API", "", "2024-01-16 00:00:00")
+            started = time.perf_counter()
+            analyzer.analyze_logs("Payment API", "", "2024-01-16 00:00:00")
+            elapsed = time.perf_counter() - started
+            if analyzer._pool is not None:
+                analyzer._pool.shutdown()
+            print(f"    {count:>2} workers  {elapsed:7.2f}s  {lines / elapsed:>11,.0f} lines/sec")
+        
+        # Follow mode: the file replayed as appends, each followed by a poll and a check
+        from analyzers.log_follower import LogFollower, LogMonitor
+        followed = os.path.join(tmp, "followed.log")
+        open(followed, "w").close()
+        monitor = LogMonitor()
+        polls, poll_time, check_time = 100, 0.0, 0.0
+        with open(path, "rb") as source, LogFollower([followed]) as follower:
+            list(follower.poll())
+            batch = os.path.getsize(path) // polls + 1
+            for block in iter(lambda: source.read(batch), b""):
+                with open(followed, "ab") as f:
+                    f.write(block)
+                started = time.perf_counter()
+                for record in follower.poll():
+                    monitor.observe(record)
+                checked = time.perf_counter()
+                monitor.check()
+                poll_time += checked - started
+                check_time += time.perf_counter() - checked
+        print(f"  Follow mode: {lines / poll_time:,.0f} lines/sec tailed + observed, "
+              f"{check_time / polls * 1000:.1f}ms per check")
+    
+    # Rolling-window rate detection over a day of events per service
+    import numpy as np
+    from analyzers.log_detectors import RateDetector
+    rng = np.random.default_rng(11)
+    day = (datetime(2024, 1, 15) - datetime(1970, 1, 1)).total_seconds()
+    detector = RateDetector()
+    events = 0
+    for service in KB_SERVICES:
+        seconds = day + rng.uniform(0, 86400, lines)
+        detector.observe_times(service, "ERROR", seconds)
+        events += len(seconds)
+    started = time.perf_counter()
+    spikes = detector.anomalies()
+    elapsed = time.perf_counter() - started
+    print(f"  Rate detection: {events:,} events in {elapsed * 1000:.0f}ms ({len(spikes)} spikes)")
+    
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"  Peak RSS: {peak_mb:.0f}MB")
+
+
+def main():
+    """Benchmark entry point"""
+    parser = argparse.ArgumentParser(description="Incident Response performance benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+    
+    pipeline = subparsers.add_parser("pipeline", help="End-to-end workflow throughput")
+    pipeline.add_argument("--incidents", type=int, default=100, help="Number of incidents")
+    pipeline.add_argument("--concurrency", type=int, default=10, help="Concurrent incidents")
+    pipeline.add_argument("--max-workers", type=int, default=3, help="Parallel workers per incident")
+    
+    knowledge = subparsers.add_parser("knowledge", help="Knowledge search latency by KB size")
+    knowledge.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000, 100000, 1000000],
+                           help="Knowledge base sizes")
+    knowledge.add_argument("--queries", type=int, default=200, help="Queries per size")
+    knowledge.add_argument("--max-scan-size", type=int, default=100000,
+                           help="Largest size to also time with a linear scan")
+    knowledge.add_argument("--scorers", nargs="+", default=["keyword", "bm25"], choices=["keyword", "bm25"],
+                           help="Scorers to compare")
+    
+    store = subparsers.add_parser("store", help="On-disk knowledge store open and query time")
+    store.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                       help="Knowledge base sizes")
+    store.add_argument("--queries", type=int, default=200, help="Queries per size")
+    
+    embeddings = subparsers.add_parser("embeddings", help="IVF embedding index recall vs latency")
+    embeddings.add_argument("--size", type=int, default=100000, help="Knowledge base size")
+    embeddings.add_argument("--queries", type=int, default=200, help="Queries to time")
+    embeddings.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64],
+                            help="Cells scanned per query")
+    embeddings.add_argument("--dim", type=int, default=256, help="Embedding dimensions")
+    embeddings.add_argument("--nlist", type=int, default=0, help="IVF cells (0 = sqrt of size)")
+    
+    logs = subparsers.add_parser("logs", help="Log ingestion throughput")
+    logs.add_argument("--lines", type=int, default=1000000, help="Synthetic log lines")
+    logs.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Analysis worker processes")
+    
+    args = parser.parse_args()
+    
+    # Keep per-node logging out of the timings
+    logging.basicConfig(level=logging.ERROR)
+    
+    if args.benchmark == "pipeline":
+        bench_pipeline(args.incidents, args.concurrency, args.max_workers)
+    elif args.benchmark == "knowledge":
+        bench_knowledge(args.sizes, args.queries, args.max_scan_size, args.scorers)
+    elif args.benchmark == "store":
+        bench_store(args.sizes, args.queries)
+    elif args.benchmark == "embeddings":
+        bench_embeddings(args.size, args.queries, args.nprobe, args.dim, args.nlist)
+    elif args.benchmark == "logs":
+        bench_logs(args.lines, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -20,6 +20,66 @@ DEFAULT_CONFIG = {
     # Gemini AI Configuration
     "GEMINI_API_KEY": "",
     "GEMINI_MODEL": "gemini-2.0-flash",
+    "GEMINI_PARSE_MODEL": "gemini-2.0-flash-lite",
+    "GEMINI_ROOT_CAUSE_MODEL": "",
+    "GEMINI_FALLBACK_MODEL": "gemini-2.0-flash-lite",
+    "MODEL_LATENCY_BUDGET_P95_SECONDS": 8.0,
+    "MODEL_LATENCY_MIN_SAMPLES": 20,
+    
+    # LLM Backend Configuration ("gemini" or "fake" for offline load testing)
+    "LLM_BACKEND": "gemini",
+    "LLM_STREAMING": 1,
+    "FAKE_LLM_LATENCY_P50_MS": 800.0,
+    "FAKE_LLM_LATENCY_P99_MS": 3000.0,
+    "FAKE_LLM_ERROR_RATE": 0.0,
+    "FAKE_LLM_RATE_LIMIT_RATE": 0.0,
+    
+    # LLM Resilience Configuration (client-side quota and circuit breaker)
+    "LLM_RATE_LIMIT_PER_MINUTE": 60.0,
+    "LLM_RATE_LIMIT_BURST": 10,
+    "LLM_RATE_LIMIT_MAX_WAIT_SECONDS": 2.0,
+    "CIRCUIT_BREAKER_FAILURE_THRESHOLD": 5,
+    "CIRCUIT_BREAKER_LATENCY_SLO_SECONDS": 15.0,
+    "CIRCUIT_BREAKER_RESET_SECONDS": 30.0,
+    "LLM_SINGLE_FLIGHT_WAIT_SECONDS": 60.0,
+    
+    # Alert Triage Configuration
+    "FAST_PATH_CONFIDENCE_THRESHOLD": 0.85,
+    
+    # Root Cause Prompt Configuration
+    "ROOT_CAUSE_CONTEXT_TOKEN_BUDGET": 600,
+    "ROOT_CAUSE_HEDGE_VARIANTS": 1,
+    "ROOT_CAUSE_HEDGE_DEADLINE_SECONDS": 8.0,
+    
+    # Knowledge Base Configuration (empty path = built-in sample incidents)
+    "KNOWLEDGE_BASE_PATH": "",
+    "KNOWLEDGE_BASE_BACKEND": "auto",
+    "KNOWLEDGE_SCORER": "keyword",
+    "KNOWLEDGE_EMBEDDING_DIM": 256,
+    "KNOWLEDGE_IVF_NLIST": 0,
+    "KNOWLEDGE_IVF_NPROBE": 8,
+    "KNOWLEDGE_LEARN_RESOLVED": 0,
+    "KNOWLEDGE_COMPACT_AFTER": 500,
+    "KNOWLEDGE_SHARD_BY_SERVICE": 1,
+    "KNOWLEDGE_SHARD_WORKERS": 4,
+    "KNOWLEDGE_CACHE_SIZE": 1024,
+    "SERVICE_CATALOG_PATH": "",
+    "SERVICE_MATCH_THRESHOLD": 0.6,
+    
+    # Log Analysis Configuration (empty sources = infer from the description)
+    "LOG_SOURCES": "",
+    "LOG_WINDOW_MINUTES": 30,
+    "LOG_BASELINE_MINUTES": 60,
+    "LOG_TIME_INDEX": 1,
+    "LOG_ANALYSIS_WORKERS": 0,
+    "LOG_CHUNK_BYTES": 16777216,
+    "LOG_PARALLEL_MIN_BYTES": 33554432,
+    "LOG_ANOMALY_MIN_COUNT": 3,
+    "LOG_RATE_BIN_SECONDS": 60.0,
+    "LOG_RATE_HISTORY_BINS": 15,
+    "LOG_RATE_Z_THRESHOLD": 3.0,
+    "LOG_FOLLOW_POLL_SECONDS": 2.0,
+    "LOG_FOLLOW_COOLDOWN_SECONDS": 600,
     
     # System Thresholds
     "CONFIDENCE_THRESHOLD": 0.8,
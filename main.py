@@ -5,12 +5,16 @@ Main application entry point
 
 import sys
 import argparse
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
 import uuid
 
 from config import validate_config, get_config_value
 from state import IncidentState
 from workflows.incident_workflow import build_incident_workflow
+from analyzers.log_follower import LogFollower, LogMonitor
 from utils.logging_utils import setup_logging
 
 
@@ -28,6 +32,8 @@ def main():
     
     parser.add_argument("alert", nargs='?', help="Incident alert description")
     parser.add_argument("--demo", action="store_true", help="Run demo mode")
+    parser.add_argument("--follow", action="store_true",
+                        help="Tail LOG_SOURCES and raise incidents from log rate spikes")
     parser.add_argument("--max-workers", type=int, default=3, help="Maximum parallel workers")
     
     args = parser.parse_args()
@@ -39,6 +45,8 @@ def main():
         # Handle commands
         if args.demo:
             run_demo(args.max_workers)
+        elif args.follow:
+            follow_logs(args.max_workers)
         elif args.alert:
             process_incident(args.alert, args.max_workers)
         else:
@@ -148,6 +156,64 @@ def run_demo(max_workers: int = 3):
     process_incident(alert, max_workers)
 
 
+def follow_logs(max_workers: int = 3, sources: Optional[str] = None, monitor: Optional[LogMonitor] = None,
+                handle_alert: Optional[Callable[[str, int], None]] = None,
+                stop: Optional[threading.Event] = None, interval: Optional[float] = None):
+    """
+    Tail the configured logs and process an incident for each alert they raise
+    
+    Incidents run on a worker thread, one at a time, so tailing carries on
+    while an analysis waits on the LLM; alerts raised meanwhile queue up.
+    
+    Args:
+        max_workers: Maximum parallel workers per incident
+        sources: Log sources (default: LOG_SOURCES)
+        monitor: Detectors the records feed (default: a new LogMonitor)
+        handle_alert: Called with each alert text and max_workers
+            (default: process_incident)
+        stop: Set to stop following (default: run until Ctrl+C)
+        interval: Seconds between polls (default: LOG_FOLLOW_POLL_SECONDS)
+    """
+    sources = sources or get_config_value("LOG_SOURCES", "")
+    if not sources:
+        raise ValueError("LOG_SOURCES must be set to follow logs")
+    interval = float(interval if interval is not None else get_config_value("LOG_FOLLOW_POLL_SECONDS", 2.0))
+    monitor = monitor or LogMonitor()
+    handle_alert = handle_alert or process_incident
+    stop = stop or threading.Event()
+    # Read the rate history back first, so spikes can be told from the start
+    since = datetime.now(timezone.utc) - timedelta(seconds=monitor.history_seconds)
+    
+    print(f"\n{'='*70}")
+    print("FOLLOW MODE - watching logs for anomalies (Ctrl+C to stop)")
+    print(f"{'='*70}")
+    print(f"Sources: {sources}\n")
+    
+    incidents = ThreadPoolExecutor(max_workers=1, thread_name_prefix="follow-incident")
+    try:
+        with LogFollower(sources, since=since) as follower:
+            while not stop.is_set():
+                for record in follower.poll():
+                    monitor.observe(record)
+                for alert in monitor.check():
+                    print(f"[ALERT] {alert['alert']}")
+                    incidents.submit(_handle_alert, handle_alert, alert['alert'], max_workers)
+                stop.wait(interval)
+    except KeyboardInterrupt:
+        print("\nStopped following logs")
+    finally:
+        # Finish the incident in progress; drop the queued ones
+        incidents.shutdown(wait=True, cancel_futures=True)
+
+
+def _handle_alert(handle_alert: Callable[[str, int], None], alert: str, max_workers: int):
+    """Run one follow-mode incident, reporting failures instead of losing them in the pool"""
+    try:
+        handle_alert(alert, max_workers)
+    except Exception as e:
+        print(f"ERROR: Incident for alert failed: {e}")
+
+
 def interactive_mode():
     """Interactive mode for incident response"""
     print(f"\\n{'='*70}")
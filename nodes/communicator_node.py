@@ -7,6 +7,9 @@ Generates final report and summary.
 import logging
 from datetime import datetime
 from state import IncidentState
+from config import get_config_value
+from agents.knowledge_lookup_agent import KnowledgeLookupAgent
+from utils.registry import get_agent
 
 logger = logging.getLogger("communicator_node")
 
@@ -47,6 +50,13 @@ def communicator_node(state: IncidentState) -> IncidentState:
     
     # Update state
     state.final_report = report
+    
+    # Resolved incidents become searchable history for the next ones
+    if report["status"] == "RESOLVED" and int(get_config_value("KNOWLEDGE_LEARN_RESOLVED", 0)):
+        try:
+            get_agent(KnowledgeLookupAgent).learn(state)
+        except Exception as e:
+            logger.error(f"Could not add incident to knowledge base: {e}")
     state.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     return state
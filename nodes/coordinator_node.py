@@ -6,9 +6,7 @@ Calls CoordinatorAgent to aggregate all analysis results.
 
 from state import IncidentState
 from agents.coordinator_agent import CoordinatorAgent
-
-# Create agent instance
-agent = CoordinatorAgent()
+from utils.registry import get_agent
 
 
 def coordinator_node(state: IncidentState) -> IncidentState:
@@ -21,7 +19,7 @@ def coordinator_node(state: IncidentState) -> IncidentState:
     Returns:
         Updated state with coordination summary
     """
-    result = agent.analyze(
+    result = get_agent(CoordinatorAgent).analyze(
         state.log_analysis_results,
         state.knowledge_lookup_results,
         state.root_cause_results
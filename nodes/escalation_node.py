@@ -6,9 +6,7 @@ Calls EscalationAgent to escalate to humans (if decision is escalation).
 
 from state import IncidentState
 from agents.escalation_agent import EscalationAgent
-
-# Create agent instance
-agent = EscalationAgent()
+from utils.registry import get_agent
 
 
 def escalation_node(state: IncidentState) -> IncidentState:
@@ -23,7 +21,7 @@ def escalation_node(state: IncidentState) -> IncidentState:
     """
     # Only execute if decision is escalation
     if state.decision == "escalation":
-        result = agent.analyze(
+        result = get_agent(EscalationAgent).analyze(
             state.service,
             state.escalation_reason,
             state.incident_id,
@@ -6,9 +6,7 @@ Calls IncidentTriggerAgent to parse alert and initialize response.
 
 from state import IncidentState
 from agents.incident_trigger_agent import IncidentTriggerAgent
-
-# Create agent instance
-agent = IncidentTriggerAgent()
+from utils.registry import get_agent
 
 
 def incident_trigger_node(state: IncidentState) -> IncidentState:
@@ -21,10 +19,15 @@ def incident_trigger_node(state: IncidentState) -> IncidentState:
     Returns:
         Updated state with parsed incident data
     """
-    result = agent.analyze(state.raw_alert, state.incident_id)
+    result = get_agent(IncidentTriggerAgent).analyze(state.raw_alert, state.incident_id)
     
     state.service = result.get("service", "")
     state.severity = result.get("severity", "")
     state.description = result.get("description", "")
+    state.metadata["triage"] = {
+        "parse_tier": result.get("parse_tier", ""),
+        "rule_confidence": result.get("rule_confidence", 0.0),
+        "llm_model": result.get("llm_model", "")
+    }
     
     return state
@@ -6,9 +6,7 @@ Calls KnowledgeLookupAgent to search historical incidents.
 
 from state import IncidentState
 from agents.knowledge_lookup_agent import KnowledgeLookupAgent
-
-# Create agent instance
-agent = KnowledgeLookupAgent()
+from utils.registry import get_agent
 
 
 def knowledge_lookup_node(state: IncidentState) -> IncidentState:
@@ -21,6 +19,6 @@ def knowledge_lookup_node(state: IncidentState) -> IncidentState:
     Returns:
         Updated state with knowledge lookup results
     """
-    result = agent.analyze(state.service, state.description)
+    result = get_agent(KnowledgeLookupAgent).analyze(state.service, state.description)
     state.knowledge_lookup_results = result
     return state
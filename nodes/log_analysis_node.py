@@ -6,9 +6,7 @@ Calls LogAnalysisAgent to analyze system logs.
 
 from state import IncidentState
 from agents.log_analysis_agent import LogAnalysisAgent
-
-# Create agent instance
-agent = LogAnalysisAgent()
+from utils.registry import get_agent
 
 
 def log_analysis_node(state: IncidentState) -> IncidentState:
@@ -21,6 +19,6 @@ def log_analysis_node(state: IncidentState) -> IncidentState:
     Returns:
         Updated state with log analysis results
     """
-    result = agent.analyze(state.service, state.description)
+    result = get_agent(LogAnalysisAgent).analyze(state.service, state.description, state.timestamp)
     state.log_analysis_results = result
     return state
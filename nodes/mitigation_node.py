@@ -6,9 +6,7 @@ Calls MitigationAgent to execute automated mitigation (if decision is auto_mitig
 
 from state import IncidentState
 from agents.mitigation_agent import MitigationAgent
-
-# Create agent instance
-agent = MitigationAgent()
+from utils.registry import get_agent
 
 
 def mitigation_node(state: IncidentState) -> IncidentState:
@@ -23,7 +21,7 @@ def mitigation_node(state: IncidentState) -> IncidentState:
     """
     # Only execute if decision is auto_mitigation
     if state.decision == "auto_mitigation":
-        result = agent.analyze(
+        result = get_agent(MitigationAgent).analyze(
             state.service,
             state.root_cause_results.get("root_cause", ""),
             state.root_cause_results.get("recommended_solution", ""),
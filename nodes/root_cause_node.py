@@ -6,9 +6,7 @@ Calls RootCauseAgent to perform AI-powered root cause analysis.
 
 from state import IncidentState
 from agents.root_cause_agent import RootCauseAgent
-
-# Create agent instance
-agent = RootCauseAgent()
+from utils.registry import get_agent
 
 
 def root_cause_node(state: IncidentState) -> IncidentState:
@@ -21,7 +19,7 @@ def root_cause_node(state: IncidentState) -> IncidentState:
     Returns:
         Updated state with root cause results
     """
-    result = agent.analyze(
+    result = get_agent(RootCauseAgent).analyze(
         state.service,
         state.description,
         state.log_analysis_results,
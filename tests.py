@@ -10,10 +10,19 @@ Or with pytest: pytest tests.py -v
 
 import os
 import sys
+import time
+import threading
 import unittest
 import logging
+import tempfile
+import gzip
+import bz2
+import lzma
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+import numpy as np
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -42,8 +51,33 @@ try:
     
     # Import analyzers
     from analyzers.log_analyzer import LogAnalyzer
+    from analyzers.log_reader import LogReader, LogRecord, read_lines, parse_records, open_log
+    from analyzers.log_detectors import SignatureDetector, RateDetector, compile_signatures
+    from analyzers.log_index import TimestampIndex
+    from analyzers.log_templates import TemplateMiner, mask_message
+    from analyzers.log_follower import LogFollower, LogMonitor
+    from main import follow_logs
     from analyzers.knowledge_searcher import KnowledgeSearcher
+    from analyzers.knowledge_index import InvertedIndex
+    from analyzers.knowledge_bm25 import BM25Index, tokenize
+    from analyzers.knowledge_embeddings import HashingEmbedder, IVFIndex, recall_at_k
+    from analyzers.knowledge_store import open_knowledge_store, write_jsonl, write_sqlite
+    from analyzers.service_catalog import ServiceCatalog
     from analyzers.ai_analyzer import AIAnalyzer
+    from analyzers.alert_classifier import AlertClassifier
+    from analyzers.context_builder import ContextBuilder, estimate_tokens
+    from analyzers.response_parser import ROOT_CAUSE_FIELDS, StreamingFieldParser, parse_stream
+    
+    # Import utils
+    from utils.llm_client import LLMError, LLMRateLimitError, CircuitOpenError
+    from utils.rate_limiter import TokenBucket
+    from utils.circuit_breaker import CircuitBreaker
+    from utils.single_flight import SingleFlight
+    from utils.rw_lock import ReadWriteLock
+    from utils.lru_cache import LRUCache
+    from utils.model_router import ModelRouter
+    from utils.registry import get_agent, get_llm_client, reset_shared
+    from utils.fake_gemini_client import FakeGeminiClient
     
     # Import nodes
     from nodes.incident_trigger_node import incident_trigger_node
@@ -166,6 +200,528 @@ class TestIncidentResponseClientFormat(unittest.TestCase):
         
         logger.info("✓ LogAnalyzer tests passed")
     
+    def test_log_reader(self):
+        """Test the streaming log reader parses, groups and filters records"""
+        logger.info("Testing LogReader...")
+        
+        lines = [
+            "2024-01-15 10:20:00 INFO [payment-api] Service started",
+            "2024-01-15T10:25:01Z ERROR [payment-api] Connection timeout after 30s",
+            "    at db.connect(Db.java:10)",
+            "2024-01-15 10:25:02,500 WARN [auth-service] Token refresh slow",
+            '{"timestamp": "2024-01-15T10:26:00", "level": "error", "message": "Connection timeout"}',
+            "2024-01-15 11:00:00 ERROR Connection timeout",
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            
+            records = list(parse_records(read_lines(path), path))
+            self.assertEqual(len(records), 5, "Continuation lines should join the record before them")
+            self.assertEqual(records[1].level, "ERROR", "Level should be parsed")
+            self.assertIn("Db.java", records[1].message, "Stack frame should be part of the message")
+            self.assertEqual(records[1].timestamp, datetime(2024, 1, 15, 10, 25, 1), "UTC timestamp should be parsed")
+            self.assertEqual(records[2].timestamp.microsecond, 500000, "Comma fractions should be parsed")
+            self.assertEqual(records[3].level, "ERROR", "JSON lines should be parsed")
+            
+            # Adjacent byte ranges yield every line exactly once
+            middle = os.path.getsize(path) // 2
+            split = list(read_lines(path, 0, middle)) + list(read_lines(path, middle))
+            self.assertEqual(split, list(read_lines(path)), "Byte ranges should partition the lines")
+            
+            reader = LogReader([f"Payment API={tmp}"])
+            stats = {}
+            window = list(reader.records("payment api", datetime(2024, 1, 15, 10, 0),
+                                         datetime(2024, 1, 15, 10, 30), stats))
+            self.assertEqual([r.offset for r in window], [records[0].offset, records[1].offset, records[3].offset],
+                             "Should keep the service's records in the window, untagged lines via the source")
+            self.assertEqual(stats["lines"], len(lines), "Stats should count every line read")
+            self.assertEqual(stats["records"], 3, "Stats should count kept records")
+            
+            # Over-long lines are cut and the rest skipped, keeping offsets exact
+            long_path = os.path.join(tmp, "long.txt")
+            with open(long_path, "wb") as f:
+                f.write(b"x" * 200000 + b"\nnext\r\n" + b"y" * 70000)
+            self.assertEqual([(offset, len(line)) for offset, line in read_lines(long_path)],
+                             [(0, 65536), (200001, 4), (200007, 65536)], "Long lines should be cut at 64KB")
+            
+            # Unindexed files split at timestamped lines, keeping stack traces whole
+            trace_path = os.path.join(tmp, "traces.txt")
+            with open(trace_path, "w", encoding="utf-8") as f:
+                for second in range(200):
+                    f.write(f"2024-01-15 10:{second // 60:02d}:{second % 60:02d} ERROR [payment-api] Request failed\n")
+                    f.write("Traceback (most recent call last):\n" + "  File \"app.py\", line 1, in handler\n" * 6)
+            trace_reader = LogReader([trace_path])
+            chunks = trace_reader.chunks(chunk_bytes=997)
+            self.assertGreater(len(chunks), 10, "The file should be split")
+            for chunk in chunks:
+                first_line = next(read_lines(trace_path, chunk.start, chunk.end))[1]
+                self.assertRegex(first_line, r"^2024-01-15 ", "Chunks should start at timestamped lines")
+            self.assertEqual(list(trace_reader.records(chunks=chunks)), list(trace_reader.records()),
+                             "Split chunks should parse to the same records")
+        
+        logger.info("✓ LogReader tests passed")
+    
+    def test_compressed_logs(self):
+        """Test rotated gzip/bz2/xz logs read like plain ones"""
+        logger.info("Testing compressed log reading...")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            with open(path, "w", encoding="utf-8") as f:
+                for second in range(300):
+                    level = "ERROR" if second % 10 == 0 else "INFO"
+                    f.write(f"2024-01-15 10:{second // 60:02d}:{second % 60:02d} {level} [payment-api] "
+                            f"{'Connection timeout' if level == 'ERROR' else 'ok'} {second}\n")
+            with open(path, "rb") as f:
+                data = f.read()
+            for suffix, module in ((".gz", gzip), (".bz2", bz2), (".xz", lzma)):
+                with module.open(f"{path}.1{suffix}", "wb") as f:
+                    f.write(data)
+            
+            plain = list(read_lines(path))
+            for suffix in (".gz", ".bz2", ".xz"):
+                rotated = f"{path}.1{suffix}"
+                self.assertEqual(list(read_lines(rotated)), plain, f"{suffix} should read like the plain file")
+                plain_stats, rotated_stats = {}, {}
+                list(LogReader([path]).records(stats=plain_stats))
+                list(LogReader([rotated]).records(stats=rotated_stats))
+                self.assertEqual(rotated_stats["bytes"], plain_stats["bytes"],
+                                 f"{suffix} should count the decompressed bytes read")
+            
+            stats = {}
+            records = list(LogReader([tmp], time_index=True).records(
+                "payment-api", datetime(2024, 1, 15, 10, 0), datetime(2024, 1, 15, 10, 5), stats))
+            self.assertEqual(stats["files"], 4, "Plain and rotated files should all be read")
+            self.assertEqual(len(records), 4 * 300, "Every record of every file should be kept")
+            
+            # A truncated archive yields what it holds and logs the error
+            truncated = os.path.join(tmp, "cut", "app.log.2.gz")
+            os.makedirs(os.path.dirname(truncated))
+            with open(f"{path}.1.gz", "rb") as src, open(truncated, "wb") as dst:
+                dst.write(src.read()[:-200])
+            partial = list(LogReader([truncated]).records())
+            self.assertTrue(0 < len(partial) < 300, "Lines before the damage should still be read")
+            with open_log(f"{path}.1.gz") as f:
+                self.assertEqual(f.read(), data, "open_log should decompress transparently")
+        
+        logger.info("✓ Compressed log tests passed")
+    
+    def test_signature_prefilter(self):
+        """Test the combined prefilter lets through every line a signature matches"""
+        logger.info("Testing signature prefilter...")
+        
+        lines = [
+            "2024-01-15 10:20:00 INFO [payment-api] Request completed in 12ms",
+            "2024-01-15 10:21:00 ERROR [payment-api] Connection refused: connect timed out",
+            "2024-01-15 10:22:00 INFO [payment-api] error budget at 40%",
+            "2024-01-15 10:23:00 WARN [payment-api] Heap space low, memory usage 91%",
+            "2024-01-15 10:24:00 ERROR [payment-api] Connection timeout after 30s",
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            
+            detector = SignatureDetector(min_count=1)
+            for record in parse_records(read_lines(path), path):
+                detector.observe(record)
+            counts = {a["type"]: a["frequency"] for a in detector.anomalies()}
+            self.assertEqual(counts["database_timeout"], 2, "One line can match several signatures")
+            self.assertEqual(counts["error_spike"], 2, "Case-sensitive ERROR should skip lowercase 'error'")
+            self.assertEqual(counts["memory_leak"], 1, "Prefilter should be case-insensitive")
+        
+        compiled = compile_signatures()
+        for line in lines:
+            text = line.split("] ", 1)[1]
+            for case in (text, text.upper(), text.lower()):
+                if compiled.match_line(case):
+                    self.assertIsNotNone(compiled.prefilter.search(case.lower()),
+                                         f"Prefilter should pass {case!r}")
+        
+        logger.info("✓ Signature prefilter tests passed")
+    
+    def test_timestamp_index(self):
+        """Test the sparse timestamp index seeks to a time window and grows with the file"""
+        logger.info("Testing TimestampIndex...")
+        
+        def write(path, minutes, mode="w"):
+            with open(path, mode, encoding="utf-8") as f:
+                for minute in minutes:
+                    f.write(f"2024-01-15 10:{minute:02d}:00 INFO [payment-api] Request {minute} completed\n")
+                    f.write("    at handler(Handler.java:42)\n")
+        
+        def minutes_in(path, start, end):
+            first, last = TimestampIndex(path, stride=200).update().byte_range(start, end)
+            return {r.timestamp.minute for r in parse_records(read_lines(path, first, last), path)
+                    if r.timestamp and start <= r.timestamp <= end}
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            # Slightly out of order, like interleaved writers
+            write(path, [0, 1, 3, 2, 4, 5, 7, 6, 8, 9] + list(range(10, 40)))
+            
+            index = TimestampIndex(path, stride=200).update()
+            self.assertGreater(len(index), 5, "Should index several blocks")
+            self.assertTrue(os.path.exists(path + ".tsidx"), "Should save a sidecar")
+            start, end = datetime(2024, 1, 15, 10, 6), datetime(2024, 1, 15, 10, 12)
+            first, last = index.byte_range(start, end)
+            self.assertGreater(first, 0, "Should skip blocks before the window")
+            self.assertLess(last, os.path.getsize(path), "Should stop after the window")
+            self.assertEqual(minutes_in(path, start, end), set(range(6, 13)),
+                             "Every line in the window should be in the range despite disorder")
+            
+            write(path, [50, 51], mode="a")
+            grown = TimestampIndex(path, stride=200).update()
+            self.assertEqual(grown.offsets[:len(index)], index.offsets, "Appends should extend the saved index")
+            self.assertGreaterEqual(grown.byte_range(datetime(2024, 1, 15, 10, 50))[0], index.offsets[-1],
+                                    "Appended lines should be found by time")
+            self.assertEqual(minutes_in(path, datetime(2024, 1, 15, 10, 45), datetime(2024, 1, 15, 11, 0)),
+                             {50, 51}, "Appended lines should be in the range")
+            
+            write(path, [8])
+            self.assertEqual(minutes_in(path, start, end), {8}, "A truncated file should be re-indexed")
+            
+            # LogReader reads only the window's slice of a large file
+            big = os.path.join(tmp, "big.log")
+            with open(big, "w", encoding="utf-8") as f:
+                for second in range(12000):
+                    f.write(f"2024-01-15 {10 + second // 3600:02d}:{second // 60 % 60:02d}:{second % 60:02d} "
+                            f"INFO [payment-api] Request {second} completed\n" + "    at handler\n" * 10)
+            stats = {}
+            window = list(LogReader([big], time_index=True).records(
+                None, datetime(2024, 1, 15, 11, 0), datetime(2024, 1, 15, 11, 1), stats))
+            self.assertEqual(len(window), 61, "Should still find every record in the window")
+            self.assertLess(stats["bytes"], os.path.getsize(big) / 2, "Should not read the whole file")
+        
+        logger.info("✓ TimestampIndex tests passed")
+    
+    def test_template_miner(self):
+        """Test the incremental template miner clusters lines and flags new and spiking templates"""
+        logger.info("Testing TemplateMiner...")
+        
+        self.assertEqual(mask_message("GET /orders/42 from 10.0.0.7:443 took 12.5ms"),
+                         ["GET", "/orders/<NUM>", "from", "<IP>", "took", "<NUM>ms"], "Variables should be masked")
+        
+        miner = TemplateMiner()
+        for i in range(20):
+            miner.add(f"Request {i} completed for user u{i}", "INFO", baseline=True)
+            miner.add(f"Cache refreshed in {i}ms", "DEBUG", baseline=True)
+        for i in range(4):
+            miner.add(f"Request {i} completed for user u{i}", "INFO")
+            miner.add(f"Cache refreshed in {i}ms", "DEBUG")
+        for i in range(6):
+            miner.add(f"Connection timeout after {i}s to db-{i}", "ERROR")
+        for i in range(70):
+            miner.add(f"Cache refreshed in {i}ms", "DEBUG")
+        miner.add("Request 5 completed for user u5", "ERROR")
+        
+        self.assertEqual(len(miner), 4, "Lines differing only in variables should share a template")
+        request = miner.add("Request 7 completed for user u7", "INFO", baseline=True)
+        self.assertEqual(request.template, "Request <NUM> completed for user <*>", "Differing tokens become wildcards")
+        
+        emerging = {t["template"]: t for t in miner.emerging(min_count=3)}
+        self.assertEqual(emerging["Connection timeout after <NUM>s to db-<NUM>"]["status"], "new",
+                         "A template absent from the baseline should be new")
+        self.assertEqual(emerging["Cache refreshed in <NUM>ms"]["status"], "spike", "A rate jump should be a spike")
+        self.assertNotIn("Request <NUM> completed for user <*>", emerging, "Steady templates should not be flagged")
+        
+        logger.info("✓ TemplateMiner tests passed")
+    
+    def test_rate_detector(self):
+        """Test rolling-window rate spikes are found with real frequencies and time ranges"""
+        logger.info("Testing RateDetector...")
+        
+        def record(minute, second, level="ERROR"):
+            return LogRecord(datetime(2024, 1, 15, 10 + minute // 60, minute % 60, second),
+                             level, "payment-api", "failed", "", 0)
+        
+        detector = RateDetector(bin_seconds=60, history_bins=15, z_threshold=3.0, min_count=3)
+        for minute in range(60):
+            detector.observe(record(minute, 0, "INFO"))
+            detector.observe(record(minute, 10))
+            detector.observe(record(minute, 20))
+        for minute in (45, 46):
+            for second in range(30):
+                detector.observe(record(minute, second))
+        
+        anomalies = detector.anomalies()
+        self.assertEqual(len(anomalies), 1, "Only the burst should be flagged")
+        spike = anomalies[0]
+        self.assertEqual(spike["type"], "error_rate_spike", "Spike type should name the level")
+        self.assertEqual(spike["frequency"], 64, "Frequency should count events in the spiking bins")
+        self.assertEqual(spike["time_range"], "10:45-10:47", "Time range should cover the spiking bins")
+        self.assertEqual(spike["baseline_rate"], 2.0, "Baseline should be the rolling rate before the spike")
+        self.assertEqual(detector.anomalies(window_start=datetime(2024, 1, 15, 10, 50)), [],
+                         "Spikes before the window should only serve as history")
+        
+        # Bulk events binned in one vectorized pass
+        bulk = RateDetector(bin_seconds=60, history_bins=30, z_threshold=4.0, min_count=3)
+        rng = np.random.default_rng(7)
+        start = (datetime(2024, 1, 15) - datetime(1970, 1, 1)).total_seconds()
+        steady = start + rng.uniform(0, 86400, 500000)
+        burst = start + 43200 + rng.uniform(0, 120, 5000)
+        bulk.observe_times("payment-api", "ERROR", np.concatenate([steady, burst]))
+        spikes = bulk.anomalies()
+        self.assertEqual(len(spikes), 1, "Should find the one burst among 500k events")
+        self.assertEqual(spikes[0]["time_range"], "12:00-12:02", "Burst should be located")
+        
+        logger.info("✓ RateDetector tests passed")
+    
+    def test_log_follower(self):
+        """Test following logs reads only appended lines, across truncation and rotation"""
+        logger.info("Testing LogFollower...")
+        
+        def line(second, message="Request completed"):
+            return f"2024-01-15 10:00:{second:02d} INFO [payment-api] {message}\n"
+        
+        def messages(follower):
+            return [record.message for record in follower.poll()]
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "app.log")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(line(0, "old") + "2024-01-15 10:00:01 INFO [payment-api] still wri")
+            
+            with LogFollower([tmp]) as follower:
+                self.assertEqual(messages(follower), [], "Should start at the end of existing files")
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("ting\n" + line(2, "new") + "2024-01-15 10:00:03 INFO [payment-api] par")
+                self.assertEqual(messages(follower), ["still writing", "new"],
+                                 "Should read appended lines, finishing the line being written")
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write("tial\n")
+                self.assertEqual(messages(follower), ["partial"], "Partial lines should be read once complete")
+                self.assertEqual(messages(follower), [], "Nothing new should read nothing")
+                
+                # copytruncate
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(line(4, "after truncate"))
+                self.assertEqual(messages(follower), ["after truncate"], "Truncated files should be read from the start")
+                
+                # Rename rotation: the old file is finished, the new one read from its start
+                with open(path, "a", encoding="utf-8") as f:
+                    f.write(line(5, "last before rotation"))
+                os.rename(path, path + ".1")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(line(6, "first after rotation"))
+                self.assertEqual(sorted(messages(follower)), ["first after rotation", "last before rotation"],
+                                 "Rotation should lose and repeat no line")
+                with open(path + ".1", "a", encoding="utf-8") as f:
+                    f.write(line(7, "late write"))
+                self.assertEqual(messages(follower), ["late write"], "Rotated files should be followed by identity")
+            
+            # History can be read back on start
+            with LogFollower([f"payment-api={path}"], since=datetime(2024, 1, 15)) as follower:
+                records = list(follower.poll())
+                self.assertEqual([r.message for r in records], ["first after rotation"],
+                                 "Should read files from the given time")
+                self.assertEqual(records[0].source, path, "Records should name their file")
+        
+        logger.info("✓ LogFollower tests passed")
+    
+    def test_log_monitor(self):
+        """Test the follow-mode monitor alerts on spikes in the latest bins, once per cooldown"""
+        logger.info("Testing LogMonitor...")
+        
+        def record(minute, second, level="INFO", message="Request completed"):
+            return LogRecord(datetime(2024, 1, 15, 10 + minute // 60, minute % 60, second),
+                             level, "payment-api", message, "", 0)
+        
+        monitor = LogMonitor(cooldown_seconds=600, bin_seconds=60, history_bins=10, z_threshold=3.0, min_count=3)
+        for minute in range(30):
+            monitor.observe(record(minute, 0))
+            monitor.observe(record(minute, 10, "ERROR", "Payment declined"))
+            self.assertEqual(monitor.check(), [], "A steady error rate should raise no alert")
+        
+        for second in range(20):
+            monitor.observe(record(30, second, "ERROR", "Connection timeout after 30s to db-1"))
+        alerts = monitor.check()
+        self.assertEqual(len(alerts), 1, "A burst should raise one alert per service")
+        alert = alerts[0]
+        self.assertEqual(alert["service"], "payment-api", "Alert should name the service")
+        self.assertIn(alert["type"], ("error_rate_spike", "database_timeout_rate_spike"), "Alert should name the spike")
+        self.assertIn("Payment API", alert["alert"], "Alert text should use the canonical service name")
+        self.assertIn("Connection timeout after 30s", alert["alert"], "Alert text should quote the log")
+        
+        for second in range(20, 40):
+            monitor.observe(record(31, second, "ERROR", "Connection timeout after 30s to db-1"))
+        self.assertEqual(monitor.check(), [], "A service in cooldown should not raise another alert")
+        
+        # Only the rate history is kept
+        for minute in range(32, 180):
+            monitor.observe(record(minute, 10, "ERROR", "Payment declined"))
+            monitor.check()
+        oldest = min(float(np.frombuffer(events).min()) for events in monitor.level_rates._events.values())
+        self.assertGreaterEqual(oldest, (datetime(2024, 1, 15, 12, 47) - datetime(1970, 1, 1)).total_seconds(),
+                                "Events older than the history should be dropped")
+        
+        logger.info("✓ LogMonitor tests passed")
+    
+    def test_follow_logs_does_not_block(self):
+        """Test follow mode keeps polling while a slow incident is processed"""
+        logger.info("Testing follow mode incident hand-off...")
+        
+        class TrippingMonitor(LogMonitor):
+            """Raises one alert on the first check, then counts the checks"""
+            def __init__(self):
+                super().__init__()
+                self.checks = 0
+            
+            def check(self):
+                self.checks += 1
+                return [{"alert": "Payment API: error rate spike"}] if self.checks == 1 else []
+        
+        started, release, handled = threading.Event(), threading.Event(), []
+        
+        def slow_incident(alert, max_workers):
+            started.set()
+            release.wait(5)
+            handled.append(alert)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            open(os.path.join(tmp, "app.log"), "w").close()
+            monitor, stop = TrippingMonitor(), threading.Event()
+            follower = threading.Thread(target=follow_logs, kwargs=dict(
+                sources=tmp, monitor=monitor, handle_alert=slow_incident, stop=stop, interval=0.01))
+            follower.start()
+            try:
+                self.assertTrue(started.wait(5), "The alert should be handed to the incident handler")
+                checks = monitor.checks
+                deadline = time.monotonic() + 5
+                while monitor.checks < checks + 3 and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                self.assertGreaterEqual(monitor.checks, checks + 3, "Polling should go on during the incident")
+                self.assertEqual(handled, [], "The incident should still be running")
+            finally:
+                release.set()
+                stop.set()
+                follower.join(5)
+            self.assertFalse(follower.is_alive(), "Follow mode should stop when asked")
+            self.assertEqual(handled, ["Payment API: error rate spike"], "The incident should finish")
+        
+        logger.info("✓ Follow mode hand-off tests passed")
+    
+    def test_log_analyzer_log_sources(self):
+        """Test LogAnalyzer detects anomalies from real log lines"""
+        logger.info("Testing LogAnalyzer with log sources...")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "payment.log")
+            with open(path, "w", encoding="utf-8") as f:
+                for minute in range(20):
+                    f.write(f"2024-01-15 10:{minute:02d}:00 INFO [payment-api] Request completed in 12ms\n")
+                for second in range(7):
+                    f.write(f"2024-01-15 10:25:{second:02d} ERROR [payment-api] Connection timeout after 30s\n")
+                f.write("2024-01-15 10:26:00 ERROR [auth-service] Connection timeout after 30s\n")
+            
+            results = LogAnalyzer([path]).analyze_logs("Payment API", "checkout is slow", "2024-01-15 10:30:00")
+            self.assertEqual(results["log_source"], "logs", "Should analyze the log file")
+            anomalies = {a["type"]: a for a in results["anomalies"]}
+            self.assertIn("database_timeout", anomalies, "Should detect timeouts the description does not mention")
+            self.assertEqual(anomalies["database_timeout"]["frequency"], 7, "Frequency should count this service's lines")
+            self.assertEqual(anomalies["database_timeout"]["time_range"], "10:25-10:25", "Time range should be real")
+            self.assertNotIn("memory_leak", anomalies, "Should not fabricate anomalies")
+            self.assertEqual(anomalies["error_rate_spike"]["frequency"], 7, "Error burst should be a rate spike")
+            self.assertEqual(anomalies["error_rate_spike"]["time_range"], "10:25-10:26", "Spike bin should be real")
+            self.assertEqual(results["log_patterns"][0], "ERROR: Payment API - Connection timeout after <NUM>s",
+                             "Log patterns should be the mined templates, errors first")
+            
+            confidence = LogAnalyzer._log_confidence
+            self.assertEqual(confidence([], [], 3.0), 0.6, "Nothing found should score lowest")
+            self.assertEqual(confidence([], [{"z_score": 3.0}], 3.0), 0.8, "A spike at the threshold should score 0.8")
+            strong = confidence([], [{"z_score": 30.0}], 3.0)
+            self.assertGreater(strong, 0.8, "Stronger spikes should score higher")
+            self.assertLess(strong, 0.95, "Spikes alone should stay below the cap")
+            self.assertEqual(confidence([{}], [{"z_score": 3.0}], 3.0), 0.85, "Both kinds together should add 0.05")
+            
+            early = LogAnalyzer([path]).analyze_logs("Payment API", "checkout is slow", "2024-01-15 10:10:00")
+            self.assertFalse(early["anomalies_found"], "Lines after the incident should be outside the window")
+            
+            # UTC-stamped logs, with the incident time local to a UTC-5 host
+            utc_path = os.path.join(tmp, "utc.log")
+            with open(utc_path, "w", encoding="utf-8") as f:
+                for second in range(7):
+                    f.write(f"2024-01-15T15:25:{second:02d}Z ERROR [payment-api] Connection timeout after 30s\n")
+            saved_tz = os.environ.get("TZ")
+            os.environ["TZ"] = "EST+05"
+            time.tzset()
+            try:
+                local = LogAnalyzer([utc_path]).analyze_logs("Payment API", "checkout is slow", "2024-01-15 10:30:00")
+            finally:
+                if saved_tz is None:
+                    os.environ.pop("TZ")
+                else:
+                    os.environ["TZ"] = saved_tz
+                time.tzset()
+            self.assertEqual(local["log_window"], "2024-01-15 15:00:00 - 2024-01-15 15:30:00",
+                             "Local incident times should be windowed in UTC")
+            self.assertIn("database_timeout", [a["type"] for a in local["anomalies"]],
+                          "UTC-stamped lines should fall in the local incident's window")
+            
+            missing = LogAnalyzer([os.path.join(tmp, "missing.log")]).analyze_logs("Payment API", "database timeout")
+            self.assertEqual(missing["log_source"], "description", "Unreadable sources should fall back")
+            self.assertTrue(missing["anomalies_found"], "Fallback should infer anomalies from the description")
+        
+        logger.info("✓ LogAnalyzer log source tests passed")
+    
+    def test_log_analyzer_parallel(self):
+        """Test chunked analysis in a process pool merges to the in-process result"""
+        logger.info("Testing parallel LogAnalyzer...")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for host in range(3):
+                with open(os.path.join(tmp, f"payment-{host}.log"), "w", encoding="utf-8") as f:
+                    for second in range(0, 3600, 4):
+                        f.write(f"2024-01-15 10:{second // 60:02d}:{second % 60:02d} "
+                                f"INFO [payment-api] Request {second} completed in {host}ms\n")
+                        if second >= 3300 and second % 12 == 0:
+                            f.write(f"2024-01-15 10:{second // 60:02d}:{second % 60:02d} "
+                                    f"ERROR [payment-api] Connection timeout after {host}s\n")
+            
+            serial = LogAnalyzer([tmp])
+            serial.workers = 1
+            expected = serial.analyze_logs("Payment API", "slow", "2024-01-15 11:00:00")
+            self.assertTrue(expected["anomalies_found"], "The error burst should be found")
+            
+            parallel = LogAnalyzer([tmp])
+            parallel.workers = 2
+            parallel.chunk_bytes = 20000
+            parallel.parallel_min_bytes = 0
+            try:
+                chunks = parallel.reader.chunks(None, None, parallel.chunk_bytes)
+                self.assertGreater(len(chunks), 3, "Large files should be split into several chunks")
+                results = parallel.analyze_logs("Payment API", "slow", "2024-01-15 11:00:00")
+            finally:
+                if parallel._pool is not None:
+                    parallel._pool.shutdown()
+            
+            self.assertIsNotNone(parallel._pool, "Should have used the process pool")
+            for key in ("anomalies", "log_patterns", "log_templates", "analysis_confidence"):
+                self.assertEqual(results[key], expected[key], f"Parallel {key} should match the serial result")
+            self.assertEqual(results["log_stats"], expected["log_stats"], "Merged stats should match")
+            
+            # A pool that fails is shut down, not just forgotten
+            class FailingPool:
+                def __init__(self):
+                    self.shutdown_calls = []
+                
+                def submit(self, *args):
+                    raise OSError("cannot start workers")
+                
+                def shutdown(self, wait=True, cancel_futures=False):
+                    self.shutdown_calls.append((wait, cancel_futures))
+            
+            failing = FailingPool()
+            parallel._pool = failing
+            results = parallel.analyze_logs("Payment API", "slow", "2024-01-15 11:00:00")
+            self.assertEqual(results["anomalies"], expected["anomalies"], "Should fall back to in-process analysis")
+            self.assertIsNone(parallel._pool, "The failed pool should be dropped")
+            self.assertEqual(failing.shutdown_calls, [(False, True)], "The failed pool should be shut down")
+        
+        logger.info("✓ Parallel LogAnalyzer tests passed")
+    
     def test_knowledge_searcher(self):
         """Test KnowledgeSearcher (pure tool)"""
         logger.info("Testing KnowledgeSearcher...")
@@ -180,6 +736,383 @@ class TestIncidentResponseClientFormat(unittest.TestCase):
         
         logger.info("✓ KnowledgeSearcher tests passed")
     
+    def test_knowledge_index(self):
+        """Test InvertedIndex ranks like a full keyword-overlap scan"""
+        logger.info("Testing InvertedIndex...")
+        
+        documents = [
+            ['database', 'timeout', 'connection', 'pool'],
+            ['memory', 'leak'],
+            ['database', 'timeout'],
+            ['database', 'query', 'timeout', 'error'],
+        ]
+        index = InvertedIndex.build(documents)
+        self.assertEqual(index.postings['database'], [0, 2, 3], "Postings should list documents in order")
+        
+        results = index.search({'database', 'timeout'}, top_k=2, min_score=0.3)
+        self.assertEqual([doc_id for doc_id, _, _ in results], [2, 0], "Should rank by keyword coverage")
+        self.assertEqual(results[0][1], 1.0, "Full coverage should score 1.0")
+        self.assertEqual(index.search({'cpu'}), [], "Unknown terms should match nothing")
+        
+        searcher = KnowledgeSearcher()
+        similar = searcher.search_similar_incidents("Payment API", "database connection timeout")["similar_incidents"]
+        self.assertEqual(similar[0]["incident_id"], "INC-001", "Best historical match should rank first")
+        
+        logger.info("✓ InvertedIndex tests passed")
+    
+    def test_knowledge_store_backends(self):
+        """Test JSONL and SQLite knowledge stores with a persisted index"""
+        logger.info("Testing knowledge store backends...")
+        
+        incidents = KnowledgeSearcher().store.incidents
+        expected = KnowledgeSearcher().search_similar_incidents("Payment API", "database connection timeout")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for filename, write in (("kb.jsonl", write_jsonl), ("kb.db", write_sqlite)):
+                path = os.path.join(tmp, filename)
+                write(path, incidents)
+                
+                store = open_knowledge_store(path)
+                self.assertEqual(len(store), len(incidents), f"{filename}: should index every incident")
+                self.assertTrue(os.path.exists(path + ".idx"), f"{filename}: should persist the index")
+                self.assertEqual(store.get(5)["incident_id"], "INC-006", f"{filename}: should read records lazily")
+                
+                reopened = open_knowledge_store(path)
+                results = KnowledgeSearcher(store=reopened).search_similar_incidents(
+                    "Payment API", "database connection timeout"
+                )
+                self.assertEqual(results["similar_incidents"], expected["similar_incidents"],
+                                 f"{filename}: should match in-memory search")
+                
+                bm25_results = KnowledgeSearcher(store=open_knowledge_store(path), scorer="bm25", shard_by_service=False)
+                self.assertEqual(
+                    bm25_results.search_similar_incidents("Payment API", "database connection timeout"),
+                    KnowledgeSearcher(scorer="bm25", shard_by_service=False).search_similar_incidents(
+                        "Payment API", "database connection timeout"),
+                    f"{filename}: BM25 should match in-memory search"
+                )
+                self.assertTrue(os.path.exists(path + ".bm25.npz"), f"{filename}: should persist the BM25 index")
+                
+                embedding_results = KnowledgeSearcher(store=open_knowledge_store(path), scorer="embedding",
+                                                      shard_by_service=False)
+                self.assertGreater(
+                    embedding_results.search_similar_incidents("Payment API", "database timeout")["total_matches"], 0,
+                    f"{filename}: embedding search should find matches"
+                )
+                self.assertTrue(os.path.exists(path + ".emb.vectors.npy"), f"{filename}: should persist vectors")
+            
+            jsonl_path = os.path.join(tmp, "kb.jsonl")
+            write_jsonl(jsonl_path, incidents[:3])
+            self.assertEqual(len(open_knowledge_store(jsonl_path)), 3, "Stale index should be rebuilt")
+        
+        self.assertIsNone(open_knowledge_store(""), "No path should mean no on-disk store")
+        
+        logger.info("✓ Knowledge store tests passed")
+    
+    def test_knowledge_bm25(self):
+        """Test BM25 scoring, batch queries and the bm25 searcher"""
+        logger.info("Testing BM25 knowledge scoring...")
+        
+        index = BM25Index.build([
+            "Payment API database connection timeout pool",
+            "Auth Service memory leak session",
+            "Payment API database query timeout index",
+        ])
+        queries = [tokenize("database connection timeout"), tokenize("memory leak"), tokenize("unrelated words")]
+        batch = index.search_batch(queries, top_k=2)
+        self.assertEqual([doc_id for doc_id, _, _ in batch[0]], [0, 2], "Should rank by BM25 relevance")
+        self.assertEqual(batch[0], index.search(queries[0], top_k=2), "Batch should match single queries")
+        self.assertTrue(all(0.0 < score <= 1.0 for _, score, _ in batch[0]), "Scores should be normalized to 0-1")
+        self.assertEqual(batch[1][0][2], ["leak", "memory"], "Should report matched terms")
+        self.assertEqual(batch[2], [], "Unknown terms should match nothing")
+        
+        searcher = KnowledgeSearcher(scorer="bm25")
+        results = searcher.search_similar_incidents("Payment API", "database connection timeout")
+        self.assertEqual(results["similar_incidents"][0]["incident_id"], "INC-001", "Best match should rank first")
+        self.assertEqual(set(results), {"similar_incidents", "total_matches", "confidence", "recommended_solutions"},
+                         "Result shape should not change")
+        batched = searcher.search_similar_incidents_batch([("Payment API", "database connection timeout")])
+        self.assertEqual(batched[0], results, "Batch search should match single search")
+        
+        logger.info("✓ BM25 knowledge scoring tests passed")
+    
+    def test_knowledge_embeddings(self):
+        """Test hashed embeddings, IVF search and the embedding searcher"""
+        logger.info("Testing knowledge embeddings...")
+        
+        embedder = HashingEmbedder(dim=128)
+        vectors = embedder.embed_batch(["database connection timeout", "database connections timing out",
+                                        "memory leak in sessions"])
+        self.assertAlmostEqual(float(vectors[0] @ vectors[0]), 1.0, places=5, msg="Vectors should be unit length")
+        self.assertGreater(float(vectors[0] @ vectors[1]), float(vectors[0] @ vectors[2]),
+                           "Paraphrases should be closer than unrelated text")
+        
+        rng = np.random.default_rng(3)
+        data = rng.normal(size=(500, 32)).astype(np.float32)
+        data /= np.linalg.norm(data, axis=1, keepdims=True)
+        ivf = IVFIndex.build(data, nlist=10)
+        queries = data[:20]
+        exact = [ivf.search_exact(q, top_k=5) for q in queries]
+        probed_all = [ivf.search(q, top_k=5, nprobe=10) for q in queries]
+        self.assertEqual(recall_at_k(probed_all, exact), 1.0, "Probing every cell should be exact")
+        self.assertEqual(recall_at_k(exact, exact), 1.0, "Recall against itself should be 1.0")
+        self.assertEqual(ivf.search(data[7], top_k=1, nprobe=1)[0][0], 7, "A stored vector should find itself")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            prefix = os.path.join(tmp, "kb.emb")
+            ivf.save(prefix)
+            loaded, _ = IVFIndex.load(prefix)
+            self.assertIsInstance(loaded.vectors, np.memmap, "Vectors should be memory-mapped")
+            self.assertEqual(loaded.search(data[7], top_k=3), ivf.search(data[7], top_k=3), "Reload should match")
+        
+        results = KnowledgeSearcher(scorer="embedding").search_similar_incidents(
+            "Payment API", "db connections timing out"
+        )
+        self.assertIn("INC-006", [i["incident_id"] for i in results["similar_incidents"]],
+                      "Should find paraphrased connection incidents")
+        
+        logger.info("✓ Knowledge embeddings tests passed")
+    
+    def test_knowledge_ingestion(self):
+        """Test adding resolved incidents to the knowledge base"""
+        logger.info("Testing knowledge base ingestion...")
+        
+        def resolved(incident_id):
+            return IncidentState(
+                incident_id=incident_id, service="Checkout API",
+                description="Redis cache eviction storm causing checkout latency",
+                root_cause_results={"root_cause": "Redis maxmemory too low for cart sessions",
+                                    "recommended_solution": "Raise Redis maxmemory"},
+                final_report={"status": "RESOLVED", "actions_taken": ["Raised Redis maxmemory"]}
+            )
+        
+        searcher = KnowledgeSearcher()
+        escalated = resolved("TEST-ESC")
+        escalated.final_report = {"status": "ESCALATED"}
+        self.assertIsNone(searcher.add_incident(escalated), "Escalated incidents should not be learned")
+        self.assertEqual(searcher.add_incident(resolved("TEST-NEW")), 8, "Should append after the built-in incidents")
+        results = searcher.search_similar_incidents("Checkout API", "redis cache eviction")
+        self.assertEqual(results["similar_incidents"][0]["incident_id"], "TEST-NEW",
+                         "Keyword search should see the new incident immediately")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            for filename, write in (("kb.jsonl", write_jsonl), ("kb.db", write_sqlite)):
+                path = os.path.join(tmp, filename)
+                write(path, KnowledgeSearcher().store.incidents)
+                store = open_knowledge_store(path)
+                bm25 = KnowledgeSearcher(store=store, scorer="bm25", shard_by_service=False)
+                embedding = KnowledgeSearcher(store=store, scorer="embedding", shard_by_service=False)
+                bm25.search_similar_incidents("Payment API", "database timeout")  # Build the main indexes
+                embedding.search_similar_incidents("Payment API", "database timeout")
+                
+                bm25.add_incident(resolved("TEST-NEW"))
+                self.assertEqual(len(store.bm25_index), 8, f"{filename}: append should not rebuild the main index")
+                for searcher in (bm25, embedding):
+                    ids = [i["incident_id"] for i in searcher.search_similar_incidents(
+                        "Checkout API", "redis cache eviction")["similar_incidents"]]
+                    self.assertEqual(ids[:1], ["TEST-NEW"], f"{filename}: {searcher.scorer} should search the delta")
+                
+                store.compact()
+                self.assertEqual(len(store.bm25_index), 9, f"{filename}: compaction should fold in the delta")
+                reopened = open_knowledge_store(path)
+                self.assertEqual(reopened.get(8)["incident_id"], "TEST-NEW", f"{filename}: append should persist")
+                self.assertEqual(len(reopened.bm25_index), 9, f"{filename}: should reload the compacted index")
+            
+            # Lock-free record reads racing appends must always see whole records
+            path = os.path.join(tmp, "race.jsonl")
+            write_jsonl(path, KnowledgeSearcher().store.incidents)
+            store = open_knowledge_store(path)
+            template = dict(store.get(0))
+            stop, errors = threading.Event(), []
+            
+            def read_records():
+                while not stop.is_set():
+                    try:
+                        for doc_id in range(len(store._offsets) - 1):
+                            store.get(doc_id)
+                    except Exception as e:
+                        errors.append(e)
+                        return
+            
+            readers = [threading.Thread(target=read_records) for _ in range(4)]
+            for reader in readers:
+                reader.start()
+            for i in range(200):
+                store.append(dict(template, incident_id=f"RACE-{i}"))
+            stop.set()
+            for reader in readers:
+                reader.join()
+            self.assertEqual(errors, [], "Reads during appends should not fail")
+            self.assertEqual(store.get(len(store._offsets) - 2)["incident_id"], "RACE-199",
+                             "Appended records should be readable")
+        
+        logger.info("✓ Knowledge base ingestion tests passed")
+    
+    def test_knowledge_shards(self):
+        """Test per-service shards with fan-out to other services"""
+        logger.info("Testing service-sharded knowledge search...")
+        
+        incidents = KnowledgeSearcher().store.incidents
+        many = incidents + [
+            {"incident_id": f"PAY-{i}", "service": "Payment API", "anomaly": "Database timeout",
+             "root_cause": "Slow query", "solution": "Add index", "keywords": ["database", "timeout", "slow"]}
+            for i in range(5)
+        ]
+        # Keyword and cosine scores do not depend on the shard (BM25 uses per-shard term statistics)
+        for scorer in ("keyword", "embedding"):
+            sharded = KnowledgeSearcher(past_incidents=incidents, scorer=scorer)
+            flat = KnowledgeSearcher(past_incidents=incidents, scorer=scorer, shard_by_service=False)
+            self.assertEqual(
+                {i["incident_id"] for i in sharded.search_similar_incidents("Auth Service", "memory leak")["similar_incidents"]},
+                {i["incident_id"] for i in flat.search_similar_incidents("Auth Service", "memory leak")["similar_incidents"]},
+                f"{scorer}: fan-out should find the same incidents as a full search"
+            )
+        
+        searcher = KnowledgeSearcher(past_incidents=many)
+        self.assertEqual(len(searcher.store.shards["payment api"]), 8, "Shard should hold the service's incidents")
+        results = searcher.search_similar_incidents("Payment API", "database timeout")
+        self.assertTrue(all(i["service"] == "Payment API" for i in results["similar_incidents"]),
+                        "A full page from the service's own shard should skip the fan-out")
+        self.assertIsNone(searcher.store.shards["auth service"]._index, "Other shards should stay untouched")
+        
+        batched = KnowledgeSearcher(past_incidents=many, scorer="bm25").search_similar_incidents_batch(
+            [("Payment API", "database timeout"), ("Auth Service", "memory leak"), ("Unknown", "cache slow")]
+        )
+        single = KnowledgeSearcher(past_incidents=many, scorer="bm25")
+        self.assertEqual(batched, [single.search_similar_incidents(*q) for q in
+                                   [("Payment API", "database timeout"), ("Auth Service", "memory leak"),
+                                    ("Unknown", "cache slow")]], "Sharded batch should match single searches")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "kb.jsonl")
+            write_jsonl(path, incidents)
+            KnowledgeSearcher(store=open_knowledge_store(path), scorer="bm25").search_similar_incidents(
+                "Payment API", "database timeout")
+            shard_files = os.listdir(path + ".shards")
+            self.assertIn("partition.idx", shard_files, "Should persist the service partition")
+            self.assertTrue(any(name.endswith(".bm25.npz") for name in shard_files), "Should persist shard indexes")
+            
+            store = open_knowledge_store(path)
+            KnowledgeSearcher(store=store).add_incident(IncidentState(
+                incident_id="TEST-NEW", service="Payment API", description="Checkout database deadlock",
+                root_cause_results={"root_cause": "Lock ordering"}, final_report={"status": "RESOLVED"}
+            ))
+            self.assertEqual(store.shards["payment api"].get(3)["incident_id"], "TEST-NEW",
+                             "Appends should reach the service's shard")
+        
+        logger.info("✓ Service-sharded knowledge search tests passed")
+    
+    def test_knowledge_cache(self):
+        """Test the LRU knowledge search result cache"""
+        logger.info("Testing knowledge search cache...")
+        
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        self.assertIsNone(cache.get("b"), "Least recently used entry should be evicted")
+        self.assertEqual(cache.get("a"), 1, "Recently used entry should survive")
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"]), (2, 1, 1), "Should count lookups")
+        self.assertAlmostEqual(stats["hit_rate"], 0.667, places=3, msg="Hit rate should be hits over lookups")
+        
+        searcher = KnowledgeSearcher()
+        first = searcher.search_similar_incidents("Payment API", "database connection timeout")
+        first["similar_incidents"].clear()
+        again = searcher.search_similar_incidents("payment api", "Timeout  database CONNECTION")
+        self.assertGreater(again["total_matches"], 0, "Callers mutating a result should not corrupt the cache")
+        self.assertEqual(searcher.get_cache_stats()["hits"], 1, "Normalized repeat query should hit the cache")
+        
+        batched = searcher.search_similar_incidents_batch([("Payment API", "database connection timeout")] * 3)
+        self.assertEqual(batched, [again] * 3, "Batch should serve repeats from the cache")
+        self.assertEqual(searcher.get_cache_stats()["hits"], 4, "Every repeat in the batch should hit")
+        
+        searcher.store.append({"incident_id": "TEST-NEW", "service": "Payment API", "anomaly": "Timeout",
+                               "root_cause": "Pool", "solution": "Resize pool",
+                               "keywords": ["database", "connection", "timeout"]})
+        updated = searcher.search_similar_incidents("Payment API", "database connection timeout")
+        self.assertEqual(updated["similar_incidents"][0]["incident_id"], "TEST-NEW",
+                         "Adding incidents should invalidate cached results")
+        self.assertEqual(KnowledgeSearcher().get_cache_stats()["size"], 0, "Each searcher should have its own cache")
+        
+        logger.info("✓ Knowledge search cache tests passed")
+    
+    def test_service_catalog(self):
+        """Test fuzzy service name resolution and its use in knowledge search"""
+        logger.info("Testing service catalog...")
+        
+        catalog = ServiceCatalog()
+        for name in ("Payment API", "payment-api", "Payments API", "paymentapi", "pay api", "paymnt api"):
+            self.assertEqual(catalog.canonical(name), "Payment API", f"{name!r} should resolve to Payment API")
+        self.assertEqual(catalog.canonical("auth-svc"), "Auth Service", "Abbreviations should be expanded")
+        self.assertEqual(catalog.resolve("Payments API"), ("Payment API", 1.0), "Aliases should match exactly")
+        for name in ("notification service", "Search API", "payment gateway"):
+            self.assertIsNone(catalog.resolve(name)[0], f"{name!r} should not be forced onto a known service")
+        self.assertEqual(catalog.canonical("  Inventory   Service "), "Inventory Service",
+                         "Unknown names should keep their own spelling")
+        
+        custom = ServiceCatalog({"Checkout": ["cart service", "checkout-web"]})
+        self.assertEqual(custom.canonical("Cart Svc"), "Checkout", "Custom aliases should resolve")
+        self.assertNotEqual(custom.fingerprint, catalog.fingerprint, "Fingerprint should track the alias table")
+        
+        searcher = KnowledgeSearcher()
+        expected = searcher.search_similar_incidents("Payment API", "database connection timeout")
+        self.assertEqual(searcher.search_similar_incidents("payments-api", "database connection timeout"), expected,
+                         "Service spellings should search like the canonical name")
+        self.assertEqual(searcher.get_cache_stats()["hits"], 1, "Service spellings should share a cache entry")
+        
+        aliased = KnowledgeSearcher().store.incidents + [
+            {"incident_id": "TEST-ALIAS", "service": "payment-api", "anomaly": "Timeout", "root_cause": "Pool",
+             "solution": "Resize pool", "keywords": ["database", "timeout"]}
+        ]
+        shards = KnowledgeSearcher(past_incidents=aliased).store.shards
+        self.assertNotIn("payment-api", shards, "Aliased history should not get its own shard")
+        self.assertEqual(len(shards["payment api"]), 4, "Aliased history should join the canonical shard")
+        
+        logger.info("✓ Service catalog tests passed")
+    
+    def test_read_write_lock(self):
+        """Test that writers exclude readers and background compaction"""
+        logger.info("Testing read-write lock...")
+        
+        lock = ReadWriteLock()
+        active = {"readers": 0, "writers": 0}
+        overlaps = []
+        
+        def reader():
+            with lock.read():
+                active["readers"] += 1
+                if active["writers"]:
+                    overlaps.append("reader during write")
+                time.sleep(0.001)
+                active["readers"] -= 1
+        
+        def writer():
+            with lock.write():
+                active["writers"] += 1
+                if active["readers"] or active["writers"] > 1:
+                    overlaps.append("writer not exclusive")
+                time.sleep(0.001)
+                active["writers"] -= 1
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for future in [pool.submit(writer if i % 5 == 0 else reader) for i in range(100)]:
+                future.result()
+        self.assertEqual(overlaps, [], "Writers should hold the lock exclusively")
+        
+        searcher = KnowledgeSearcher(scorer="bm25", shard_by_service=False)
+        searcher.store.compact_after = 2
+        searcher.search_similar_incidents("Payment API", "database timeout")
+        for i in range(2):
+            searcher.store.append({"incident_id": f"TEST-{i}", "service": "Search API",
+                                   "anomaly": "Index shard unavailable", "root_cause": "Disk full",
+                                   "solution": "Expand disk", "keywords": ["shard", "disk"]})
+        searcher.store.wait_for_compaction(timeout=5)
+        self.assertEqual(len(searcher.store.bm25_index), 10, "Background compaction should rebuild the index")
+        
+        logger.info("✓ Read-write lock tests passed")
+    
     def test_ai_analyzer(self):
         """Test AIAnalyzer (pure tool)"""
         logger.info("Testing AIAnalyzer...")
@@ -196,6 +1129,352 @@ class TestIncidentResponseClientFormat(unittest.TestCase):
         
         logger.info("✓ AIAnalyzer tests passed")
     
+    def test_alert_classifier(self):
+        """Test AlertClassifier rule-based triage (pure tool)"""
+        logger.info("Testing AlertClassifier...")
+        
+        classifier = AlertClassifier()
+        
+        confident = classifier.classify("CRITICAL: Payment API returning 500s")
+        self.assertEqual(confident["service"], "Payment API", "Should resolve service alias")
+        self.assertEqual(confident["severity"], "HIGH", "Should pick up severity cue")
+        self.assertGreaterEqual(confident["confidence"], 0.85, "Obvious alert should be confident")
+        
+        vague = classifier.classify("Something is wrong somewhere")
+        self.assertEqual(vague["service"], "Unknown Service", "Unknown alert should not guess")
+        self.assertLess(vague["confidence"], 0.5, "Vague alert should have low confidence")
+        
+        logger.info("✓ AlertClassifier tests passed")
+    
+    def test_ai_analyzer_fast_path(self):
+        """Test AIAnalyzer skips the LLM for confidently classified alerts"""
+        logger.info("Testing AIAnalyzer fast path...")
+        
+        analyzer = AIAnalyzer()
+        
+        parsed = analyzer.parse_incident_alert("CRITICAL: Auth Service down for all users")
+        self.assertEqual(parsed["parse_tier"], "fast_path", "Confident alert should use fast path")
+        self.assertEqual(parsed["service"], "Auth Service", "Fast path should set service")
+        
+        parsed = analyzer.parse_incident_alert("Something is wrong somewhere")
+        self.assertNotEqual(parsed["parse_tier"], "fast_path", "Vague alert should fall through")
+        
+        logger.info("✓ AIAnalyzer fast path tests passed")
+    
+    def test_context_builder(self):
+        """Test ContextBuilder ranks, deduplicates and respects the token budget"""
+        logger.info("Testing ContextBuilder...")
+        
+        log_results = {
+            "anomalies": [
+                {"type": "database_timeout", "severity": "HIGH", "pattern": "Connection timeout after 30s", "frequency": 40},
+                {"type": "database_timeout", "severity": "HIGH", "pattern": "Connection timeout after 30s", "frequency": 40},
+                {"type": "error_spike", "severity": "MEDIUM", "pattern": "Error rate above threshold", "frequency": 5},
+            ]
+        }
+        knowledge_results = {
+            "similar_incidents": [
+                {"root_cause": "Unrelated cache issue " * 20, "similarity_score": 0.31},
+                {"root_cause": "Traffic spike exceeded connection pool limits", "similarity_score": 0.75},
+            ]
+        }
+        
+        builder = ContextBuilder(token_budget=60)
+        context = builder.build("database connection timeout", log_results, knowledge_results)
+        
+        self.assertLessEqual(estimate_tokens(context), 60, "Context should fit the budget")
+        self.assertEqual(context.count("database_timeout"), 1, "Duplicate evidence should be dropped")
+        self.assertIn("connection pool", context, "Most relevant incident should be kept")
+        self.assertNotIn("Unrelated cache issue", context, "Oversized low-value evidence should be dropped")
+        
+        logger.info("✓ ContextBuilder tests passed")
+    
+    def test_streaming_field_parser(self):
+        """Test StreamingFieldParser stops reading once required fields arrive"""
+        logger.info("Testing StreamingFieldParser...")
+        
+        parser = StreamingFieldParser(ROOT_CAUSE_FIELDS, required=("root_cause", "confidence"))
+        self.assertFalse(parser.feed("**Root Cause:** Pool exh"), "Partial line should not count")
+        self.assertFalse(parser.feed("austion\nConfid"), "Confidence not yet complete")
+        self.assertTrue(parser.feed("ence: 0.9\n"), "Both required fields should be complete")
+        self.assertEqual(parser.fields["root_cause"], "Pool exhaustion", "Chunks should be joined")
+        
+        pulled = []
+        def chunks():
+            for chunk in ["Root Cause: leak\n", "Confidence: 0.8\n", "Solution: restart\n", "tail " * 50]:
+                pulled.append(chunk)
+                yield chunk
+        
+        fields, _, early_exit = parse_stream(chunks(), ROOT_CAUSE_FIELDS, ("root_cause", "confidence"))
+        self.assertTrue(early_exit, "Should stop early")
+        self.assertEqual(len(pulled), 2, "Should not read past the required fields")
+        self.assertEqual(fields["confidence"], "0.8", "Should parse confidence")
+        
+        logger.info("✓ StreamingFieldParser tests passed")
+    
+    def test_ai_analyzer_with_fake_backend(self):
+        """Test AIAnalyzer end-to-end against the offline LLM backend"""
+        logger.info("Testing AIAnalyzer with FakeGeminiClient...")
+        
+        client = FakeGeminiClient(latency_p50_ms=0, latency_p99_ms=0, seed=1)
+        analyzer = AIAnalyzer(client=client)
+        
+        parsed = analyzer.parse_incident_alert("Something is wrong with checkout")
+        self.assertEqual(parsed["parse_tier"], "llm", "Unclear alert should go to the LLM")
+        self.assertEqual(parsed["severity"], "MEDIUM", "Severity should be parsed from response")
+        
+        result = analyzer.analyze_root_cause("Payment API", "database timeout", {}, {})
+        self.assertAlmostEqual(result["confidence"], 0.85, places=2, msg="Confidence should be parsed")
+        self.assertTrue(result["root_cause"].startswith("Connection pool"), "Label should be stripped")
+        
+        # Streams stop once the decision fields are read; later fields default
+        class RecordingClient(FakeGeminiClient):
+            def _generate_stream(self, prompt, model_name=None):
+                for chunk in super()._generate_stream(prompt, model_name):
+                    self.pulled.append(chunk)
+                    yield chunk
+        
+        def streamed(response):
+            client = RecordingClient(responses=[response], latency_p50_ms=0, latency_p99_ms=0, seed=1)
+            client.pulled = []
+            analyzer = AIAnalyzer(client=client)
+            analyzer.streaming = True
+            return analyzer, client.pulled
+        
+        analyzer, pulled = streamed(
+            "Root Cause: Connection pool exhausted\nConfidence: 0.9\n"
+            "Recommended Solution: Raise the pool size to handle the traffic surge safely\n"
+            "Contributing Factors: traffic surge, slow queries\nEstimated Resolution Time: 15 minutes\n"
+        )
+        with self.assertLogs("ai_analyzer", level="DEBUG") as logs:
+            result = analyzer.analyze_root_cause("Payment API", "database timeout", {}, {})
+        self.assertTrue(any("Stopped streaming early" in line for line in logs.output), "Root cause should exit early")
+        self.assertNotIn("Contributing", "".join(pulled), "Trailing fields should not be read")
+        self.assertAlmostEqual(result["confidence"], 0.9, places=2, msg="Decision fields should be parsed")
+        self.assertEqual(result["contributing_factors"], [], "Unread fields should default")
+        self.assertEqual(result["estimated_resolution_time"], "30 minutes", "Unread fields should default")
+        
+        analyzer, pulled = streamed(
+            "Service: Checkout API\nSeverity: HIGH\n"
+            "Description: Checkout requests are failing for a large share of customers in every region\n"
+        )
+        with self.assertLogs("ai_analyzer", level="DEBUG") as logs:
+            parsed = analyzer.parse_incident_alert("Something is wrong with checkout")
+        self.assertTrue(any("Stopped streaming early" in line for line in logs.output), "Alert parse should exit early")
+        self.assertNotIn("every region", "".join(pulled), "The description should not be waited for")
+        self.assertEqual((parsed["service"], parsed["severity"]), ("Checkout API", "HIGH"), "Decision fields should be parsed")
+        
+        logger.info("✓ AIAnalyzer fake backend tests passed")
+    
+    # ========================================================================
+    # UTILITY TESTS
+    # ========================================================================
+    
+    def test_fake_gemini_client(self):
+        """Test FakeGeminiClient scripted responses and failure injection"""
+        logger.info("Testing FakeGeminiClient...")
+        
+        client = FakeGeminiClient(responses=["first", "second"], latency_p50_ms=0, seed=1)
+        self.assertEqual(client.generate_content("a"), "first", "Should return scripted responses")
+        self.assertEqual(client.generate_content("b"), "second", "Should advance the script")
+        self.assertEqual(client.generate_content("c"), "first", "Should cycle the script")
+        
+        throttled = FakeGeminiClient(latency_p50_ms=0, rate_limit_rate=1.0, seed=1)
+        with self.assertRaises(LLMRateLimitError):
+            throttled.generate_content("prompt")
+        
+        failing = FakeGeminiClient(latency_p50_ms=0, error_rate=1.0, seed=1)
+        with self.assertRaises(LLMError):
+            failing.generate_content("prompt")
+        
+        logger.info("✓ FakeGeminiClient tests passed")
+    
+    def test_token_bucket(self):
+        """Test TokenBucket burst and refill behaviour"""
+        logger.info("Testing TokenBucket...")
+        
+        bucket = TokenBucket(rate_per_second=100.0, capacity=2)
+        self.assertTrue(bucket.try_acquire(), "First token should be available")
+        self.assertTrue(bucket.try_acquire(), "Burst token should be available")
+        self.assertFalse(bucket.try_acquire(timeout=0.0), "Empty bucket should not block")
+        self.assertTrue(bucket.try_acquire(timeout=0.1), "Token should refill within timeout")
+        
+        logger.info("✓ TokenBucket tests passed")
+    
+    def test_circuit_breaker(self):
+        """Test CircuitBreaker open, half-open and close transitions"""
+        logger.info("Testing CircuitBreaker...")
+        
+        breaker = CircuitBreaker("test", failure_threshold=2, latency_slo=1.0, reset_timeout=0.05)
+        breaker.record_failure("error")
+        self.assertEqual(breaker.state, "closed", "Single failure should not trip")
+        breaker.record_success(latency=5.0)
+        self.assertEqual(breaker.state, "open", "SLO breach should count as failure")
+        self.assertFalse(breaker.allow_request(), "Open breaker should reject calls")
+        
+        time.sleep(0.06)
+        self.assertTrue(breaker.allow_request(), "Half-open breaker should allow a probe")
+        self.assertFalse(breaker.allow_request(), "Only one probe at a time")
+        breaker.record_success(latency=0.1)
+        self.assertEqual(breaker.state, "closed", "Successful probe should close breaker")
+        
+        logger.info("✓ CircuitBreaker tests passed")
+    
+    def test_single_flight(self):
+        """Test SingleFlight coalesces concurrent identical calls"""
+        logger.info("Testing SingleFlight...")
+        
+        flight = SingleFlight()
+        release = threading.Event()
+        executions = []
+        
+        def slow_call():
+            executions.append(1)
+            release.wait(2)
+            return {"answer": 42}
+        
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            futures = [executor.submit(flight.do, "same-prompt", slow_call) for _ in range(5)]
+            while flight.stats["coalesced"] < 4:
+                time.sleep(0.01)
+            release.set()
+            results = [f.result() for f in futures]
+        
+        self.assertEqual(len(executions), 1, "Only one call should execute")
+        self.assertTrue(all(r == {"answer": 42} for r in results), "All callers should share the result")
+        
+        def failing_call():
+            raise LLMError("backend down")
+        
+        with self.assertRaises(LLMError):
+            flight.do("failing-prompt", failing_call)
+        self.assertEqual(flight.in_flight(), 0, "Finished calls should be cleared")
+        
+        logger.info("✓ SingleFlight tests passed")
+    
+    def test_model_router(self):
+        """Test ModelRouter falls back when a model is over its latency budget"""
+        logger.info("Testing ModelRouter...")
+        
+        router = ModelRouter({"parse": "lite", "root_cause": "pro"}, fallback_model="lite",
+                             latency_budget=1.0, min_samples=3, probe_every=4)
+        self.assertEqual(router.select("parse"), "lite", "Parse should use its own model")
+        self.assertEqual(router.select("root_cause"), "pro", "Root cause should use its own model")
+        
+        for _ in range(3):
+            router.record("pro", latency=5.0)
+        picks = [router.select("root_cause") for _ in range(8)]
+        self.assertEqual(picks.count("pro"), 2, "Slow primary should only receive probes")
+        self.assertEqual(picks.count("lite"), 6, "Slow primary should route to fallback")
+        
+        for _ in range(100):
+            router.record("pro", latency=0.2)
+        self.assertEqual(router.select("root_cause"), "pro", "Recovered primary should be used again")
+        
+        metrics = router.get_metrics()
+        self.assertEqual(metrics["decisions"]["root_cause"]["lite"], 6, "Decisions should be counted")
+        self.assertAlmostEqual(metrics["latency"]["pro"]["p95"], 0.2, places=3, msg="p95 should be tracked")
+        
+        logger.info("✓ ModelRouter tests passed")
+    
+    def test_ai_analyzer_hedged_root_cause(self):
+        """Test hedged root cause returns early on a confident variant"""
+        logger.info("Testing hedged root cause analysis...")
+        
+        def respond(prompt):
+            if "resource exhaustion" in prompt:
+                return "Root Cause: Connection pool exhausted\nConfidence: 0.9\nRecommended Solution: Raise pool size\n"
+            time.sleep(0.5)
+            return "Root Cause: Unclear\nConfidence: 0.4\nRecommended Solution: Investigate\n"
+        
+        client = FakeGeminiClient(responses=respond, latency_p50_ms=0, latency_p99_ms=0, seed=1)
+        analyzer = AIAnalyzer(client=client, router=ModelRouter({"root_cause": "pro"}))
+        
+        started = time.monotonic()
+        result = analyzer.analyze_root_cause_hedged("Checkout API", "pool timeout", {}, {},
+                                                    variants=3, deadline=2.0, confidence_threshold=0.8)
+        self.assertLess(time.monotonic() - started, 0.4, "Should not wait for slow variants")
+        self.assertEqual(result["root_cause"], "Connection pool exhausted", "Confident variant should win")
+        self.assertTrue(result["ensemble"]["early_exit"], "Should report early exit")
+        
+        result = analyzer.analyze_root_cause_hedged("Auth Service", "login errors", {}, {},
+                                                    variants=3, deadline=0.2, confidence_threshold=0.95)
+        self.assertAlmostEqual(result["confidence"], 0.9, places=2, msg="Best result by deadline should be kept")
+        self.assertEqual(result["ensemble"]["completed"], 1, "Slow variants should be abandoned")
+        
+        logger.info("✓ Hedged root cause tests passed")
+    
+    def test_ai_analyzer_model_routing(self):
+        """Test AIAnalyzer sends each task to its routed model and records latency"""
+        logger.info("Testing AIAnalyzer model routing...")
+        
+        client = FakeGeminiClient(latency_p50_ms=0, latency_p99_ms=0, seed=1)
+        router = ModelRouter({"parse": "lite", "root_cause": "pro"}, fallback_model="lite")
+        analyzer = AIAnalyzer(client=client, router=router)
+        
+        parsed = analyzer.parse_incident_alert("Something is wrong with checkout")
+        result = analyzer.analyze_root_cause("Payment API", "database timeout", {}, {})
+        self.assertEqual(parsed["llm_model"], "lite", "Parse should report its model")
+        self.assertEqual(result["llm_model"], "pro", "Root cause should report its model")
+        
+        latency = analyzer.get_routing_metrics()["latency"]
+        self.assertEqual(latency["lite"]["samples"], 1, "Parse latency should be recorded")
+        self.assertEqual(latency["pro"]["samples"], 1, "Root cause latency should be recorded")
+        
+        # Fast failures must not make a failing model look fast
+        failing = AIAnalyzer(client=FakeGeminiClient(latency_p50_ms=0, error_rate=1.0, seed=1),
+                             router=ModelRouter({"root_cause": "pro"}))
+        failing.analyze_root_cause("Payment API", "database timeout", {}, {})
+        latency = failing.get_routing_metrics()["latency"]
+        self.assertGreaterEqual(latency["pro"]["errors"], 1, "Failures should be counted")
+        self.assertEqual(latency["pro"]["samples"], 0, "Failures should add no latency sample")
+        
+        def time_out(prompt):
+            raise TimeoutError("request timed out")
+        
+        timing_out = AIAnalyzer(client=FakeGeminiClient(responses=time_out, latency_p50_ms=0, seed=1),
+                                router=ModelRouter({"root_cause": "pro"}))
+        timing_out.analyze_root_cause("Payment API", "database timeout", {}, {})
+        self.assertEqual(timing_out.get_routing_metrics()["latency"]["pro"]["samples"], 1,
+                         "Timeouts should count their wait as a penalty")
+        
+        logger.info("✓ AIAnalyzer model routing tests passed")
+    
+    def test_shared_registry(self):
+        """Test agents and clients are created lazily and shared"""
+        logger.info("Testing shared registry...")
+        
+        self.assertIs(get_agent(LogAnalysisAgent), get_agent(LogAnalysisAgent), "Agent should be shared")
+        self.assertIs(AIAnalyzer().client, AIAnalyzer().client, "LLM client should be shared")
+        self.assertIs(IncidentTriggerAgent().ai_analyzer.client, RootCauseAgent().ai_analyzer.client,
+                      "Agents should share one LLM client")
+        
+        agent = get_agent(CoordinatorAgent)
+        reset_shared("agent.CoordinatorAgent")
+        self.assertIsNot(get_agent(CoordinatorAgent), agent, "Reset should drop the shared agent")
+        
+        logger.info("✓ Shared registry tests passed")
+    
+    def test_llm_client_fails_fast_when_circuit_open(self):
+        """Test AIAnalyzer falls back immediately while the breaker is open"""
+        logger.info("Testing LLM client circuit breaker integration...")
+        
+        client = FakeGeminiClient(latency_p50_ms=0, error_rate=1.0, seed=1)
+        client.circuit_breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        
+        for _ in range(2):
+            with self.assertRaises(LLMError):
+                client.generate_content("prompt")
+        with self.assertRaises(CircuitOpenError):
+            client.generate_content("prompt")
+        self.assertEqual(client.stats["calls"], 2, "Open breaker should not reach backend")
+        
+        analyzer = AIAnalyzer(client=client)
+        result = analyzer.analyze_root_cause("Payment API", "database timeout", {}, {})
+        self.assertEqual(result["confidence"], 0.5, "Should use default root cause fallback")
+        
+        logger.info("✓ LLM client circuit breaker tests passed")
+    
     # ========================================================================
     # AGENT TESTS (Coordinators)
     # ========================================================================
@@ -6,6 +6,25 @@ Utility functions and helpers
 
 from .logging_utils import setup_logging, get_logger
 from .email_notifier import EmailNotifier
+from .rate_limiter import TokenBucket
+from .circuit_breaker import CircuitBreaker
+from .single_flight import SingleFlight
+from .rw_lock import ReadWriteLock
+from .lru_cache import LRUCache
+from .model_router import ModelRouter
+from .llm_client import BaseLLMClient, LLMError, LLMRateLimitError, CircuitOpenError, create_llm_client
 from .gemini_client import GeminiClient
+from .fake_gemini_client import FakeGeminiClient
+from .registry import (
+    get_shared, reset_shared, get_llm_client, get_model_router, get_knowledge_store,
+    get_service_catalog, get_email_notifier, get_agent
+)
 
-__all__ = ['setup_logging', 'get_logger', 'EmailNotifier', 'GeminiClient']
+__all__ = [
+    'setup_logging', 'get_logger', 'EmailNotifier',
+    'TokenBucket', 'CircuitBreaker', 'SingleFlight', 'ReadWriteLock', 'LRUCache', 'ModelRouter',
+    'BaseLLMClient', 'LLMError', 'LLMRateLimitError', 'CircuitOpenError', 'create_llm_client',
+    'GeminiClient', 'FakeGeminiClient',
+    'get_shared', 'reset_shared', 'get_llm_client', 'get_model_router', 'get_knowledge_store',
+    'get_service_catalog', 'get_email_notifier', 'get_agent'
+]
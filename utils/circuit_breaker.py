@@ -0,0 +1,127 @@
+"""
+Circuit Breaker - Utility Service
+Fails fast while a downstream dependency is erroring or too slow
+"""
+
+import threading
+import time
+import logging
+from typing import Any, Dict
+
+logger = logging.getLogger("circuit_breaker")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Three-state circuit breaker - reusable across workflows
+    
+    CLOSED: calls pass through; consecutive failures (errors or calls
+    slower than the latency SLO) are counted.
+    OPEN: calls are rejected immediately until ``reset_timeout`` elapses.
+    HALF_OPEN: a limited number of probe calls are let through; a success
+    closes the breaker, a failure re-opens it.
+    """
+    
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 latency_slo: float = 10.0, reset_timeout: float = 30.0,
+                 half_open_max_calls: int = 1):
+        """
+        Initialize circuit breaker
+        
+        Args:
+            name: Breaker name for logging
+            failure_threshold: Consecutive failures that trip the breaker
+            latency_slo: Seconds above which a successful call counts as a failure
+            reset_timeout: Seconds to stay open before probing
+            half_open_max_calls: Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.latency_slo = latency_slo
+        self.reset_timeout = reset_timeout
+        self.half_open_max_calls = max(1, half_open_max_calls)
+        
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_in_flight = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def state(self) -> str:
+        """Current state, moving OPEN to HALF_OPEN once the reset timeout passed"""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return self._state
+    
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may proceed
+        
+        Returns:
+            True if the call may proceed (caller must then report the outcome
+            with record_success() or record_failure()), False to fail fast
+        """
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+                self._probes_in_flight += 1
+                return True
+            return False
+    
+    def record_success(self, latency: float) -> None:
+        """
+        Report a completed call
+        
+        Args:
+            latency: Call duration in seconds; above the SLO it counts as a failure
+        """
+        if self.latency_slo > 0 and latency > self.latency_slo:
+            self.record_failure(f"latency {latency:.2f}s above SLO {self.latency_slo:.2f}s")
+            return
+        
+        with self._lock:
+            if self._state == HALF_OPEN:
+                logger.info(f"Circuit '{self.name}' closed after successful probe")
+            self._state = CLOSED
+            self._failures = 0
+            self._probes_in_flight = 0
+    
+    def record_failure(self, reason: str = "") -> None:
+        """
+        Report a failed call
+        
+        Args:
+            reason: Failure description for logging
+        """
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.warning(f"Circuit '{self.name}' opened after {self._failures} "
+                                   f"consecutive failure(s): {reason}")
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._probes_in_flight = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Breaker state snapshot for metrics"""
+        with self._lock:
+            self._maybe_half_open(time.monotonic())
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures
+            }
+    
+    def _maybe_half_open(self, now: float) -> None:
+        """Move OPEN to HALF_OPEN after the reset timeout (lock must be held)"""
+        if self._state == OPEN and now - self._opened_at >= self.reset_timeout:
+            self._state = HALF_OPEN
+            self._probes_in_flight = 0
+            logger.info(f"Circuit '{self.name}' half-open, probing")
@@ -0,0 +1,166 @@
+"""
+Fake Gemini Client - Utility Service
+Local stand-in for Gemini with scripted responses and simulated latency,
+errors and rate limiting. Used for offline load testing and benchmarks.
+"""
+
+import math
+import random
+import re
+import threading
+import time
+import logging
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+from config import get_config_value
+from .llm_client import BaseLLMClient, LLMError, LLMRateLimitError
+
+logger = logging.getLogger("fake_gemini_client")
+
+# z-score of the 99th percentile of a standard normal distribution
+Z_P99 = 2.3263
+
+Responder = Callable[[str], str]
+
+# Words per simulated stream chunk
+STREAM_CHUNK_WORDS = 4
+
+
+class FakeGeminiClient(BaseLLMClient):
+    """Offline Gemini stand-in - reusable across workflows and benchmarks"""
+    
+    def __init__(self, responses: Optional[Union[List[str], Responder]] = None,
+                 latency_p50_ms: Optional[float] = None,
+                 latency_p99_ms: Optional[float] = None,
+                 error_rate: Optional[float] = None,
+                 rate_limit_rate: Optional[float] = None,
+                 seed: Optional[int] = None,
+                 model_latencies_ms: Optional[Dict[str, Tuple[float, float]]] = None):
+        """
+        Initialize fake client
+        
+        Args:
+            responses: Scripted responses returned in order (cycling), or a
+                callable mapping prompt to response. Canned responses are
+                used when omitted.
+            latency_p50_ms: Median simulated latency in milliseconds
+            latency_p99_ms: 99th percentile simulated latency in milliseconds
+            error_rate: Fraction of requests that fail with LLMError
+            rate_limit_rate: Fraction of requests rejected with LLMRateLimitError
+            seed: Random seed for reproducible runs
+            model_latencies_ms: Per-model (p50, p99) overrides, for exercising
+                model routing offline
+        """
+        super().__init__("fake")
+        self.model = "fake-gemini"
+        
+        self.responses = responses
+        self.latency_p50_ms = self._setting(latency_p50_ms, "FAKE_LLM_LATENCY_P50_MS", 800.0)
+        self.latency_p99_ms = max(self.latency_p50_ms,
+                                  self._setting(latency_p99_ms, "FAKE_LLM_LATENCY_P99_MS", 3000.0))
+        self.error_rate = self._setting(error_rate, "FAKE_LLM_ERROR_RATE", 0.0)
+        self.rate_limit_rate = self._setting(rate_limit_rate, "FAKE_LLM_RATE_LIMIT_RATE", 0.0)
+        self.model_latencies_ms = dict(model_latencies_ms or {})
+        
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._script_index = 0
+        self.stats = {"calls": 0, "errors": 0, "rate_limited": 0}
+        
+        logger.info(f"Fake Gemini client initialized (p50={self.latency_p50_ms}ms, "
+                    f"p99={self.latency_p99_ms}ms, error_rate={self.error_rate}, "
+                    f"rate_limit_rate={self.rate_limit_rate})")
+    
+    @staticmethod
+    def _setting(value: Optional[float], key: str, default: float) -> float:
+        """Use an explicit argument, falling back to configuration"""
+        return float(value if value is not None else get_config_value(key, default))
+    
+    def _generate(self, prompt: str, model_name: Optional[str] = None) -> str:
+        """
+        Simulate a Gemini call
+        
+        Args:
+            prompt: Prompt text
+            model_name: Simulated model (selects per-model latency)
+        
+        Returns:
+            Scripted or canned response text
+        """
+        return ''.join(self._generate_stream(prompt, model_name))
+    
+    def _generate_stream(self, prompt: str, model_name: Optional[str] = None) -> Iterator[str]:
+        """
+        Simulate a streamed Gemini call
+        
+        The sampled latency is spread evenly over the chunks, so a caller
+        that stops reading early also saves the remaining latency.
+        
+        Args:
+            prompt: Prompt text
+            model_name: Simulated model (selects per-model latency)
+        
+        Yields:
+            Response text in chunks of a few words
+        """
+        with self._lock:
+            self.stats["calls"] += 1
+            delay = self._sample_latency(model_name)
+            roll = self._rng.random()
+        
+        if roll < self.rate_limit_rate:
+            time.sleep(delay)
+            with self._lock:
+                self.stats["rate_limited"] += 1
+            raise LLMRateLimitError("429 Resource has been exhausted (fake backend)")
+        if roll < self.rate_limit_rate + self.error_rate:
+            time.sleep(delay)
+            with self._lock:
+                self.stats["errors"] += 1
+            raise LLMError("500 Internal error (fake backend)")
+        
+        words = re.split(r'(?<=\s)', self._respond(prompt))
+        chunks = [''.join(words[i:i + STREAM_CHUNK_WORDS])
+                  for i in range(0, len(words), STREAM_CHUNK_WORDS)] or ['']
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield chunk
+    
+    def _sample_latency(self, model_name: Optional[str] = None) -> float:
+        """Sample a latency in seconds from a log-normal fitted to p50/p99"""
+        p50, p99 = self.model_latencies_ms.get(model_name, (self.latency_p50_ms, self.latency_p99_ms))
+        if p50 <= 0:
+            return 0.0
+        sigma = math.log(max(p50, p99) / p50) / Z_P99
+        return self._rng.lognormvariate(math.log(p50), sigma) / 1000.0
+    
+    def _respond(self, prompt: str) -> str:
+        """Return the next scripted response or a canned one"""
+        if callable(self.responses):
+            return self.responses(prompt)
+        
+        if self.responses:
+            with self._lock:
+                response = self.responses[self._script_index % len(self.responses)]
+                self._script_index += 1
+            return response
+        
+        return self._canned_response(prompt)
+    
+    @staticmethod
+    def _canned_response(prompt: str) -> str:
+        """Plausible Gemini-shaped answers for the prompts AIAnalyzer sends"""
+        if prompt.startswith("Parse this incident alert"):
+            match = re.search(r'^Alert: (.*)$', prompt, re.MULTILINE)
+            alert = match.group(1).strip() if match else ""
+            words = alert.split()
+            service = " ".join(words[:2]) if words else "Unknown Service"
+            severity = "HIGH" if re.search(r'critical|outage|down', alert, re.IGNORECASE) else "MEDIUM"
+            return (f"Service: {service}\n"
+                    f"Severity: {severity}\n"
+                    f"Description: {alert[:100]}")
+        
+        return ("Root Cause: Connection pool exhaustion under sustained traffic spike\n"
+                "Confidence: 0.85\n"
+                "Recommended Solution: Increase connection pool size and restart service\n"
+                "Contributing Factors: pool size too small, retry storm from clients\n"
+                "Estimated Resolution Time: 15 minutes")
@@ -4,44 +4,87 @@ Interfaces with Google Gemini AI for incident analysis
 """
 
 import logging
-from typing import Dict, Any, Optional
-import google.generativeai as genai
+import threading
+from typing import Dict, Any, Iterator, Optional
 from config import get_config_value
+from .llm_client import BaseLLMClient
 
 logger = logging.getLogger("gemini_client")
 
 
-class GeminiClient:
+class GeminiClient(BaseLLMClient):
     """Gemini AI client utility - reusable across workflows"""
     
     def __init__(self):
+        super().__init__("gemini")
         api_key = get_config_value("GEMINI_API_KEY", "")
         model_name = get_config_value("GEMINI_MODEL", "gemini-2.0-flash")
+        self.model_name = model_name
+        self._models = {}
+        self._models_lock = threading.Lock()
         
         if not api_key:
             logger.warning("Gemini API key not configured")
             self.model = None
         else:
             try:
+                # Imported lazily: the SDK is slow to import and unused without a key
+                import google.generativeai as genai
                 genai.configure(api_key=api_key)
+                self._genai = genai
                 self.model = genai.GenerativeModel(model_name)
+                self._models[model_name] = self.model
                 logger.info(f"Gemini client initialized with model: {model_name}")
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini: {e}")
                 self.model = None
     
-    def generate_content(self, prompt: str) -> str:
+    def _get_model(self, model_name: Optional[str]):
+        """Return the GenerativeModel for a model name, creating it on first use"""
+        if not model_name or model_name == self.model_name:
+            return self.model
+        
+        model = self._models.get(model_name)
+        if model is None:
+            with self._models_lock:
+                model = self._models.get(model_name)
+                if model is None:
+                    model = self._genai.GenerativeModel(model_name)
+                    self._models[model_name] = model
+                    logger.info(f"Gemini model initialized: {model_name}")
+        return model
+    
+    def _generate(self, prompt: str, model_name: Optional[str] = None) -> str:
         """
         Generate content using Gemini
         
         Args:
             prompt: Prompt text
+            model_name: Gemini model to use (default: GEMINI_MODEL)
         
         Returns:
             Generated text response
         """
-        if not self.model:
-            raise Exception("Gemini API not available")
-        
-        response = self.model.generate_content(prompt)
+        response = self._get_model(model_name).generate_content(prompt)
         return response.text if hasattr(response, 'text') else str(response)
+    
+    def _generate_stream(self, prompt: str, model_name: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream content from Gemini chunk by chunk
+        
+        Args:
+            prompt: Prompt text
+            model_name: Gemini model to use (default: GEMINI_MODEL)
+        
+        Yields:
+            Text of each streamed chunk
+        """
+        response = self._get_model(model_name).generate_content(prompt, stream=True)
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunks without text parts (e.g. safety metadata) carry nothing to parse
+                continue
+            if text:
+                yield text
@@ -0,0 +1,180 @@
+"""
+LLM Client Interface - Utility Service
+Pluggable backend interface shared by the Gemini client and local stand-ins
+"""
+
+import time
+import logging
+from typing import Any, Dict, Iterator, Optional
+from config import get_config_value
+from .rate_limiter import TokenBucket
+from .circuit_breaker import CircuitBreaker, OPEN
+
+logger = logging.getLogger("llm_client")
+
+
+class LLMError(Exception):
+    """Raised when an LLM backend cannot produce a response"""
+
+
+class LLMRateLimitError(LLMError):
+    """Raised when an LLM backend rejects a request for exceeding its quota"""
+
+
+class CircuitOpenError(LLMError):
+    """Raised without calling the backend while its circuit breaker is open"""
+
+
+class BaseLLMClient:
+    """
+    Base class for LLM backends - reusable across workflows
+    
+    Subclasses set ``self.model`` to a truthy value once the backend is
+    usable and implement ``_generate()``. Callers only rely on ``model``
+    and ``generate_content()``.
+    
+    Every call goes through a client-side token bucket matched to the
+    provider quota and a circuit breaker, so a throttled or degraded
+    backend fails fast into the caller's fallback path.
+    """
+    
+    def __init__(self, name: str):
+        """
+        Initialize base client
+        
+        Args:
+            name: Backend name for logging and identification
+        """
+        self.name = name
+        self.model = None
+        
+        per_minute = float(get_config_value("LLM_RATE_LIMIT_PER_MINUTE", 60.0))
+        self.rate_limiter = TokenBucket(
+            rate_per_second=per_minute / 60.0,
+            capacity=float(get_config_value("LLM_RATE_LIMIT_BURST", 10))
+        )
+        self.rate_limit_max_wait = float(get_config_value("LLM_RATE_LIMIT_MAX_WAIT_SECONDS", 2.0))
+        self.circuit_breaker = CircuitBreaker(
+            name=name,
+            failure_threshold=int(get_config_value("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5)),
+            latency_slo=float(get_config_value("CIRCUIT_BREAKER_LATENCY_SLO_SECONDS", 15.0)),
+            reset_timeout=float(get_config_value("CIRCUIT_BREAKER_RESET_SECONDS", 30.0))
+        )
+    
+    def generate_content(self, prompt: str, model_name: Optional[str] = None) -> str:
+        """
+        Generate content for a prompt
+        
+        Args:
+            prompt: Prompt text
+            model_name: Model to use (default: the client's configured model)
+        
+        Returns:
+            Generated text response
+        
+        Raises:
+            CircuitOpenError: If the circuit breaker is open
+            LLMRateLimitError: If no quota token frees up within the max wait
+            LLMError: If the backend is unavailable or the request fails
+        """
+        self._admit()
+        
+        started = time.monotonic()
+        try:
+            text = self._generate(prompt, model_name)
+        except Exception as e:
+            self.circuit_breaker.record_failure(str(e))
+            raise
+        
+        self.circuit_breaker.record_success(time.monotonic() - started)
+        return text
+    
+    def generate_content_stream(self, prompt: str, model_name: Optional[str] = None) -> Iterator[str]:
+        """
+        Generate content for a prompt as a stream of text chunks
+        
+        Closing the generator early stops reading from the backend; the
+        call is still reported to the circuit breaker as a success.
+        
+        Args:
+            prompt: Prompt text
+            model_name: Model to use (default: the client's configured model)
+        
+        Yields:
+            Text chunks in arrival order
+        
+        Raises:
+            Same errors as generate_content(), on the first iteration
+        """
+        self._admit()
+        
+        started = time.monotonic()
+        try:
+            for chunk in self._generate_stream(prompt, model_name):
+                if chunk:
+                    yield chunk
+        except GeneratorExit:
+            self.circuit_breaker.record_success(time.monotonic() - started)
+            raise
+        except Exception as e:
+            self.circuit_breaker.record_failure(str(e))
+            raise
+        
+        self.circuit_breaker.record_success(time.monotonic() - started)
+    
+    def _admit(self) -> None:
+        """Apply availability, circuit breaker and rate limit checks"""
+        if not self.model:
+            raise LLMError(f"{self.name} backend not available")
+        
+        # Cheap check first so an open breaker never waits on the rate limiter
+        if self.circuit_breaker.state == OPEN:
+            raise CircuitOpenError(f"{self.name} circuit open - skipping request")
+        
+        if not self.rate_limiter.try_acquire(self.rate_limit_max_wait):
+            raise LLMRateLimitError(f"{self.name} client-side rate limit reached")
+        
+        if not self.circuit_breaker.allow_request():
+            raise CircuitOpenError(f"{self.name} circuit open - skipping request")
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Resilience state snapshot for metrics"""
+        return {
+            "backend": self.name,
+            "circuit_breaker": self.circuit_breaker.get_stats()
+        }
+    
+    def _generate(self, prompt: str, model_name: Optional[str] = None) -> str:
+        """
+        Backend-specific generation - to be implemented by subclasses
+        
+        Raises:
+            NotImplementedError: If not implemented by subclass
+        """
+        raise NotImplementedError(f"{self.__class__.__name__} must implement _generate() method")
+    
+    def _generate_stream(self, prompt: str, model_name: Optional[str] = None) -> Iterator[str]:
+        """Backend-specific streaming - defaults to one chunk from _generate()"""
+        yield self._generate(prompt, model_name)
+
+
+def create_llm_client() -> BaseLLMClient:
+    """
+    Create the LLM client selected by the LLM_BACKEND setting
+    
+    Returns:
+        GeminiClient for "gemini" (default), FakeGeminiClient for "fake"
+    
+    Raises:
+        ValueError: If LLM_BACKEND names an unknown backend
+    """
+    backend = str(get_config_value("LLM_BACKEND", "gemini")).strip().lower()
+    
+    if backend == "gemini":
+        from .gemini_client import GeminiClient
+        return GeminiClient()
+    if backend == "fake":
+        from .fake_gemini_client import FakeGeminiClient
+        return FakeGeminiClient()
+    
+    raise ValueError(f"Unknown LLM_BACKEND: {backend}")
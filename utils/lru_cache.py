@@ -0,0 +1,78 @@
+"""
+LRU Cache - Utility Service
+Bounded least-recently-used cache with hit-rate statistics
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Thread-safe bounded LRU cache - reusable across workflows
+    
+    Holds at most ``maxsize`` entries; adding past that evicts the entry
+    used least recently. Lookups are counted so callers can report how
+    much work the cache saves.
+    """
+    
+    def __init__(self, maxsize: int = 1024):
+        """
+        Initialize cache
+        
+        Args:
+            maxsize: Maximum entries kept
+        
+        Raises:
+            ValueError: If maxsize is not positive
+        """
+        if maxsize <= 0:
+            raise ValueError(f"maxsize must be positive, got {maxsize}")
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+    
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        """Cached value for key (marking it most recently used), else default"""
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.stats["misses"] += 1
+                return default
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return value
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry if full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats["evictions"] += 1
+    
+    def clear(self) -> None:
+        """Drop every entry (statistics are kept)"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Cache statistics
+        
+        Returns:
+            {'size', 'maxsize', 'hits', 'misses', 'evictions', 'hit_rate'}
+        """
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return dict(
+                self.stats, size=len(self._entries), maxsize=self.maxsize,
+                hit_rate=round(self.stats["hits"] / lookups, 3) if lookups else 0.0
+            )
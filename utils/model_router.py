@@ -0,0 +1,158 @@
+"""
+Model Router - Utility Service
+Per-task LLM model selection with latency-aware fallback
+"""
+
+import threading
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+from config import get_config_value
+
+logger = logging.getLogger("model_router")
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+class ModelRouter:
+    """
+    Routes LLM tasks to models - reusable across workflows
+    
+    Each task (e.g. "parse", "root_cause") has a primary model. When the
+    observed p95 latency of a primary exceeds the latency budget, requests
+    move to the fallback model; every ``probe_every``-th request still
+    goes to the primary so its latency window keeps refreshing and the
+    route recovers once it speeds up again.
+    """
+    
+    def __init__(self, routes: Dict[str, str], fallback_model: str = "",
+                 latency_budget: float = 8.0, min_samples: int = 20,
+                 window: int = 100, probe_every: int = 10):
+        """
+        Initialize router
+        
+        Args:
+            routes: Task name -> primary model name
+            fallback_model: Faster model used while a primary is over budget ("" = none)
+            latency_budget: p95 latency budget in seconds
+            min_samples: Observations needed before a primary can be judged slow
+            window: Latest observations kept per model
+            probe_every: While degraded, send every Nth request to the primary
+        """
+        self.routes = dict(routes)
+        self.fallback_model = fallback_model
+        self.latency_budget = latency_budget
+        self.min_samples = min_samples
+        self.probe_every = max(1, probe_every)
+        
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._window = window
+        self._errors: Dict[str, int] = {}
+        self._decisions: Dict[str, Dict[str, int]] = {}
+        self._degraded_requests: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls) -> "ModelRouter":
+        """Build the router from GEMINI_*_MODEL and MODEL_LATENCY_* settings"""
+        default_model = get_config_value("GEMINI_MODEL", "gemini-2.0-flash")
+        return cls(
+            routes={
+                "parse": get_config_value("GEMINI_PARSE_MODEL", "") or default_model,
+                "root_cause": get_config_value("GEMINI_ROOT_CAUSE_MODEL", "") or default_model,
+            },
+            fallback_model=get_config_value("GEMINI_FALLBACK_MODEL", ""),
+            latency_budget=float(get_config_value("MODEL_LATENCY_BUDGET_P95_SECONDS", 8.0)),
+            min_samples=int(get_config_value("MODEL_LATENCY_MIN_SAMPLES", 20))
+        )
+    
+    def select(self, task: str) -> str:
+        """
+        Choose the model for a task
+        
+        Args:
+            task: Task name
+        
+        Returns:
+            Model name to use for this request
+        """
+        primary = self.routes.get(task) or next(iter(self.routes.values()), "")
+        
+        with self._lock:
+            model = primary
+            if self._over_budget(primary):
+                count = self._degraded_requests.get(task, 0) + 1
+                self._degraded_requests[task] = count
+                if count % self.probe_every != 0:
+                    model = self.fallback_model
+            else:
+                self._degraded_requests.pop(task, None)
+            
+            task_decisions = self._decisions.setdefault(task, {})
+            task_decisions[model] = task_decisions.get(model, 0) + 1
+        
+        if model != primary:
+            logger.debug(f"Routing {task} to fallback {model} (primary {primary} over budget)")
+        return model
+    
+    def record(self, model: str, latency: Optional[float] = None, success: bool = True) -> None:
+        """
+        Record the outcome of a request
+        
+        Args:
+            model: Model that served the request
+            latency: Seconds taken (successful requests, and failures whose
+                wait should count against the model, such as timeouts)
+            success: Whether the request succeeded
+        """
+        with self._lock:
+            if not success:
+                self._errors[model] = self._errors.get(model, 0) + 1
+            if latency is not None:
+                self._latencies.setdefault(model, deque(maxlen=self._window)).append(latency)
+    
+    def p95(self, model: str) -> float:
+        """Observed p95 latency of a model in seconds"""
+        with self._lock:
+            return _percentile(list(self._latencies.get(model, ())), 95)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Routing decisions and observed latencies
+        
+        Returns:
+            {'routes', 'fallback_model', 'decisions': {task: {model: count}},
+             'latency': {model: {'samples', 'p50', 'p95', 'errors'}}}
+        """
+        with self._lock:
+            latency = {}
+            for model in set(self._latencies) | set(self._errors):
+                values = list(self._latencies.get(model, ()))
+                latency[model] = {
+                    "samples": len(values),
+                    "p50": round(_percentile(values, 50), 3),
+                    "p95": round(_percentile(values, 95), 3),
+                    "errors": self._errors.get(model, 0)
+                }
+            return {
+                "routes": dict(self.routes),
+                "fallback_model": self.fallback_model,
+                "decisions": {task: dict(counts) for task, counts in self._decisions.items()},
+                "latency": latency
+            }
+    
+    def _over_budget(self, model: str) -> bool:
+        """Whether a primary should be avoided (lock must be held)"""
+        if not self.fallback_model or model == self.fallback_model:
+            return False
+        values = self._latencies.get(model)
+        if not values or len(values) < self.min_samples:
+            return False
+        return _percentile(list(values), 95) > self.latency_budget
@@ -0,0 +1,61 @@
+"""
+Rate Limiter - Utility Service
+Thread-safe token bucket used to keep LLM calls within quota
+"""
+
+import threading
+import time
+import logging
+
+logger = logging.getLogger("rate_limiter")
+
+
+class TokenBucket:
+    """Token bucket rate limiter - reusable across workflows"""
+    
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Initialize token bucket
+        
+        Args:
+            rate_per_second: Tokens added per second (sustained request rate)
+            capacity: Maximum tokens held (allowed burst size)
+        """
+        self.rate_per_second = rate_per_second
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def try_acquire(self, timeout: float = 0.0) -> bool:
+        """
+        Take one token, waiting up to ``timeout`` seconds for a refill
+        
+        Args:
+            timeout: Maximum seconds to wait (0 = do not wait)
+        
+        Returns:
+            True if a token was taken, False if the wait would exceed timeout
+        """
+        if self.rate_per_second <= 0:
+            return True
+        
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate_per_second
+            
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+    
+    def _refill(self, now: float) -> None:
+        """Add tokens accrued since the last update (lock must be held)"""
+        elapsed = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate_per_second)
+        self._updated = now
@@ -0,0 +1,98 @@
+"""
+Shared Instance Registry - Utility Service
+Lazily creates process-wide shared clients and agents on first use
+"""
+
+import threading
+import logging
+from typing import Any, Callable, Dict, Optional, Type, TypeVar
+
+logger = logging.getLogger("registry")
+
+T = TypeVar("T")
+
+_instances: Dict[str, Any] = {}
+_lock = threading.RLock()
+
+
+def get_shared(key: str, factory: Callable[[], T]) -> T:
+    """
+    Return the shared instance for a key, creating it on first use
+    
+    Args:
+        key: Registry key
+        factory: Zero-argument constructor called once per key
+    
+    Returns:
+        The shared instance
+    """
+    instance = _instances.get(key)
+    if instance is not None:
+        return instance
+    
+    # Re-entrant so factories may request their own shared dependencies
+    with _lock:
+        instance = _instances.get(key)
+        if instance is None:
+            instance = factory()
+            _instances[key] = instance
+            logger.debug(f"Created shared instance: {key}")
+        return instance
+
+
+def reset_shared(key: Optional[str] = None) -> None:
+    """
+    Drop shared instances so the next lookup creates fresh ones
+    
+    Args:
+        key: Registry key to drop (default: drop everything)
+    """
+    with _lock:
+        if key is None:
+            _instances.clear()
+        else:
+            _instances.pop(key, None)
+
+
+def get_llm_client():
+    """Shared LLM client for the backend selected by LLM_BACKEND"""
+    from .llm_client import create_llm_client
+    return get_shared("llm_client", create_llm_client)
+
+
+def get_model_router():
+    """Shared per-task model router"""
+    from .model_router import ModelRouter
+    return get_shared("model_router", ModelRouter.from_config)
+
+
+def get_knowledge_store():
+    """Shared on-disk knowledge store for KNOWLEDGE_BASE_PATH (None when unset)"""
+    from analyzers.knowledge_store import open_knowledge_store
+    # False stands in for "not configured" since None means "not created yet"
+    return get_shared("knowledge_store", lambda: open_knowledge_store() or False) or None
+
+
+def get_service_catalog():
+    """Shared service catalog (built-in services plus SERVICE_CATALOG_PATH)"""
+    from analyzers.service_catalog import ServiceCatalog
+    return get_shared("service_catalog", ServiceCatalog.from_config)
+
+
+def get_email_notifier():
+    """Shared email notifier"""
+    from .email_notifier import EmailNotifier
+    return get_shared("email_notifier", EmailNotifier)
+
+
+def get_agent(agent_class: Type[T]) -> T:
+    """
+    Shared instance of an agent class
+    
+    Args:
+        agent_class: Agent class to instantiate without arguments
+    
+    Returns:
+        The shared agent instance
+    """
+    return get_shared(f"agent.{agent_class.__name__}", agent_class)
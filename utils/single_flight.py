@@ -0,0 +1,93 @@
+"""
+Single Flight - Utility Service
+Coalesces identical concurrent calls into one in-flight execution
+"""
+
+import copy
+import threading
+import logging
+from typing import Any, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger("single_flight")
+
+
+class _Call:
+    """One in-flight execution shared by its leader and followers"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """
+    Duplicate call suppression - reusable across workflows
+    
+    The first caller for a key (the leader) runs the function; callers
+    arriving with the same key while it is running (followers) wait for
+    and share its outcome. Errors propagate to every waiter. A follower
+    can stop waiting after a timeout without affecting the leader.
+    """
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.stats = {"executions": 0, "coalesced": 0}
+    
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run ``fn`` once per key across concurrent callers
+        
+        Args:
+            key: Identity of the call (e.g. model and prompt)
+            fn: Zero-argument function producing the result
+            timeout: Seconds a follower waits before giving up (None = no limit)
+        
+        Returns:
+            The function result (a private deep copy when it was shared)
+        
+        Raises:
+            TimeoutError: If a follower's wait exceeds the timeout
+            Exception: Whatever the leader's call raised
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.stats["executions"] += 1
+                leader = True
+            else:
+                call.followers += 1
+                self.stats["coalesced"] += 1
+                leader = False
+        
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+                if call.followers:
+                    logger.debug(f"Shared one execution with {call.followers} waiting caller(s)")
+            
+            if call.error is not None:
+                raise call.error
+            # Keep the shared result pristine for followers still copying it
+            return copy.deepcopy(call.result) if call.followers else call.result
+        
+        if not call.done.wait(timeout):
+            raise TimeoutError(f"Timed out after {timeout}s waiting for in-flight call")
+        if call.error is not None:
+            raise call.error
+        return copy.deepcopy(call.result)
+    
+    def in_flight(self) -> int:
+        """Number of keys currently executing"""
+        with self._lock:
+            return len(self._calls)